@@ -6,20 +6,25 @@ import os
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from gateway_manager import GatewayManager
+from gateway_control import GatewayClient, start_data_plane
 from web_dashboard import WebDashboard
 from connection_manager import ConnectionManager
 from forge_manager import ForgeManager
+from log_store import SegmentedLogHandler
 
 
-def main():
-    """Main gateway server entry point"""
+def main(forge_manager=None, gateway=None, supervisor=None):
+    """Main gateway server entry point
+
+    The dashboard only talks to the gateway data plane over its control socket;
+    the data plane is started as a separate process if it is not running yet.
+    """
     # Setup comprehensive logging
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler('logs/gateway_server.log'),
+            SegmentedLogHandler('logs/gateway_server.log'),
             logging.StreamHandler()
         ]
     )
@@ -27,13 +32,19 @@ def main():
 
     logger.info("🚀 Starting Minecraft Gateway Server...")
 
+    data_plane = None
     try:
         # Initialize managers
-        gateway = GatewayManager()
-        forge_manager = ForgeManager()
+        if gateway is None:
+            gateway = GatewayClient()
+        if not gateway.is_available():
+            logger.info("Starting gateway data plane...")
+            data_plane = start_data_plane()
+        if forge_manager is None:
+            forge_manager = ForgeManager()
 
         # Initialize web dashboard with both managers
-        dashboard = WebDashboard(gateway, forge_manager)
+        dashboard = WebDashboard(gateway, forge_manager, supervisor)
 
         # Add connection manager to dashboard
         connection_manager = ConnectionManager(gateway)
@@ -53,6 +64,9 @@ def main():
     except Exception as e:
         logger.error(f"❌ Failed to start gateway server: {e}")
         sys.exit(1)
+    finally:
+        if data_plane:
+            data_plane.terminate()
 
 
 if __name__ == "__main__":
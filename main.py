@@ -11,16 +11,21 @@ from pathlib import Path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from forge_manager import ForgeManager
-from gateway_manager import GatewayManager
+from gateway_control import GatewayClient, start_data_plane
 from mod_manager import ModManager
+from server_supervisor import ServerSupervisor
+from log_store import SegmentedLogHandler
 
 
 class ForgeServerApp:
     def __init__(self):
         self.setup_logging()
         self.forge_manager = ForgeManager()
-        self.gateway_manager = GatewayManager()
+        self.gateway_manager = GatewayClient()
+        self.gateway_process = None
         self.mod_manager = ModManager()
+        self.supervisor = ServerSupervisor(self.forge_manager)
+        self.supervisor.add_state_listener(self.gateway_manager.set_backend_state)
         self.running = False
 
     def setup_logging(self):
@@ -32,25 +37,29 @@ class ForgeServerApp:
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler('logs/app.log'),
+                SegmentedLogHandler('logs/app.log'),
                 logging.StreamHandler()
             ]
         )
         self.logger = logging.getLogger(__name__)
 
     def start_gateway(self):
-        """Start the gateway in a separate thread"""
+        """Start the dashboard in a separate thread; it drives the data plane over its control socket"""
 
         def run_gateway():
             try:
                 from gateway_server import main as gateway_main
-                gateway_main()
+                gateway_main(
+                    forge_manager=self.forge_manager,
+                    gateway=self.gateway_manager,
+                    supervisor=self.supervisor
+                )
             except Exception as e:
                 self.logger.error(f"Gateway error: {e}")
 
         gateway_thread = threading.Thread(target=run_gateway, daemon=True)
         gateway_thread.start()
-        self.logger.info("Gateway server started in separate thread")
+        self.logger.info("Gateway dashboard started in separate thread")
 
     def start(self):
         """Start the complete Forge server system"""
@@ -63,9 +72,21 @@ class ForgeServerApp:
         if self.mod_manager.config["auto_download"]:
             self.mod_manager.download_all_mods()
 
+        # The gateway data plane forwards players in its own process; start it first
+        # so it hears about server state changes from the supervisor
+        if self.gateway_manager.is_available():
+            self.logger.info("Using the gateway data plane that is already running")
+        else:
+            self.logger.info("Starting gateway data plane...")
+            try:
+                self.gateway_process = start_data_plane()
+            except RuntimeError as e:
+                self.logger.error(f"❌ Failed to start gateway data plane: {e}")
+                return False
+
         # Start Forge server
         self.logger.info("Starting Forge server...")
-        if not self.forge_manager.start_server():
+        if not self.supervisor.start():
             self.logger.error("❌ Failed to start Forge server")
             return False
 
@@ -131,7 +152,10 @@ class ForgeServerApp:
     def stop(self):
         """Stop everything gracefully"""
         self.logger.info("🛑 Shutting down Forge server system...")
-        self.forge_manager.stop_server()
+        self.supervisor.stop()
+        if self.gateway_process and self.gateway_process.poll() is None:
+            self.gateway_process.terminate()
+            self.gateway_process.wait(timeout=10)
         self.running = False
         self.logger.info("✅ Server system stopped")
 
@@ -147,15 +171,11 @@ class ForgeServerApp:
             if self.start():
                 self.logger.info("✅ Server system is running. Press Ctrl+C to stop.")
 
-                # Main monitoring loop
+                # Crashes are handled by the supervisor; a crash loop leaves the
+                # dashboard up so the server can be restarted from there
                 while self.running:
                     time.sleep(1)
 
-                    # Check if Forge server is still running
-                    if not self.forge_manager.is_running():
-                        self.logger.warning("⚠️ Forge server stopped unexpectedly")
-                        break
-
         except KeyboardInterrupt:
             self.logger.info("Received interrupt signal")
         except Exception as e:
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from world_analyzer import WorldAnalyzer
+
+
+def _mb(value):
+    return f"{value / 1024 / 1024:.1f} MB"
+
+
+def _option(args, name, default=None):
+    if name not in args:
+        return default
+    position = args.index(name)
+    value = args[position + 1] if position + 1 < len(args) else default
+    del args[position:position + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    prune = "--prune" in args
+    if prune:
+        args.remove("--prune")
+    below = _option(args, "--below")
+    top = int(_option(args, "--top", 10))
+    output = _option(args, "--json")
+    world_dir = args[0] if args else "server/world"
+
+    if not os.path.isdir(world_dir):
+        print(f"❌ {world_dir} not found")
+        return False
+    if prune and below is None:
+        print("Usage: analyze_world.py [world] [--below SECONDS [--prune]] [--top N] [--json out]")
+        return False
+
+    analyzer = WorldAnalyzer(world_dir)
+    report = analyzer.analyze(float(below) if below is not None else None)
+
+    print(f"🗺️  {world_dir}: {report['chunks']} chunks, {_mb(report['file_bytes'])} "
+          f"({report['seconds']}s)")
+    for dimension, summary in sorted(report["dimensions"].items(), key=lambda item: -item[1]["file_bytes"]):
+        slack = summary["file_bytes"] - summary["chunk_bytes"] - len(summary["regions"]) * 8192
+        print(f"\n📁 {dimension}: {len(summary['regions'])} regions, {summary['chunks']} chunks, "
+              f"{_mb(summary['file_bytes'])} ({_mb(max(0, slack))} unused sectors)")
+        statuses = ", ".join(f"{status} {count}" for status, count in summary["statuses"].most_common())
+        print(f"   Status: {statuses or 'none'}")
+        if summary["errors"]:
+            print(f"   ⚠️  {summary['errors']} unreadable chunks")
+        if below is not None:
+            print(f"   Inhabited < {below}s: {summary['low_chunks']} chunks, {_mb(summary['low_bytes'])}")
+        for region in sorted(summary["regions"], key=lambda r: -r["file_bytes"])[:top]:
+            print(f"   {region['name']:<20} {_mb(region['file_bytes']):>10}  {region['chunks']:>5} chunks"
+                  f"  {region['inhabited_ticks'] / 20 / 3600:>8.1f} player-hours")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved report to {output}")
+
+    if prune:
+        try:
+            freed = analyzer.prune(report)
+        except RuntimeError as e:
+            print(f"\n❌ {e}")
+            return False
+        print(f"\n✂️  Pruned {sum(d['low_chunks'] for d in report['dimensions'].values())} chunks, freed {_mb(freed)}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -5,11 +5,49 @@ import shutil
 import datetime
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
 
+from config_loader import ConfigLoader
+from rcon_client import RconClient, RconError
+from backup_catalog import BackupCatalog
+from backup_scheduler import TokenBucket, IoThrottle
+from world_snapshot import WorldSnapshot
+from block_archive import FORMATS, write_archive, extract_archive
 
-def create_backup():
+
+def _mb(value):
+    return f"{value / 1024 / 1024:.1f} MB"
+
+
+def load_catalog():
+    """Backup catalog configured like the server's"""
+    backups = ConfigLoader.load_server_config().get("backups", {})
+    return BackupCatalog(store_dir=backups.get("store_dir", "backups/store"), retention=backups.get("retention"))
+
+
+def make_throttle():
+    """Disk bandwidth cap shared with scheduled backups, so a manual run does not stall the server"""
+    bandwidth = ConfigLoader.load_server_config().get("backups", {}).get("schedule", {}).get("bandwidth", 0)
+    return IoThrottle(TokenBucket(bandwidth))
+
+
+def make_snapshot(world_dir, backups_dir):
+    """WorldSnapshot that pauses saving over the server's RCON"""
+    properties = ConfigLoader.load_server_config()["server_properties"]
+    rcon = RconClient(port=int(properties.get("rcon.port", 25575)), password=str(properties.get("rcon.password", "")))
+    return WorldSnapshot(rcon.command, world_dir, backups_dir / ".snapshot")
+
+
+def print_window(report):
+    print(f"📸 Snapshot taken with saving off for {report['window_seconds'] * 1000:.0f} ms "
+          f"(flush {report['flush_seconds'] * 1000:.0f} ms, {report['reflinked']} reflinked, "
+          f"{report['linked']} linked, {report['copied']} copied)")
+    if not report["reflinks"]:
+        print(f"   No reflinks: {report['precopied']} files were copied first with saving on")
+
+
+def create_backup(mode="incremental", compression="gzip", snapshot=False):
     """Create a backup of the Minecraft world"""
     world_dir = Path("server/world")
     backups_dir = Path("backups")
@@ -19,6 +57,34 @@ def create_backup():
         return False
 
     backups_dir.mkdir(exist_ok=True)
+    frozen = make_snapshot(world_dir, backups_dir) if snapshot else None
+
+    if mode == "incremental":
+        try:
+            print("💾 Creating incremental backup...")
+            record = load_catalog().create(frozen, throttle=make_throttle())
+            if record["save_off_seconds"] is not None:
+                print(f"📸 Saving was paused for {record['save_off_seconds'] * 1000:.0f} ms")
+            print(f"✅ Backup created successfully: {record['name']}")
+            print(f"   {record['chunks_changed']}/{record['chunks']} chunks changed, "
+                  f"{_mb(record['stored_bytes'])} written in {record['seconds']:.1f}s "
+                  f"({record['throttle']['throttled_seconds']} worker-seconds throttled)")
+            return True
+        except RconError as e:
+            print(f"❌ Could not pause saving over RCON: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ Backup failed: {e}")
+            return False
+
+    source_dir = world_dir
+    if frozen:
+        try:
+            print_window(frozen.take())
+        except RconError as e:
+            print(f"❌ Could not pause saving over RCON: {e}")
+            return False
+        source_dir = frozen.snapshot_dir
 
     # Create backup filename with timestamp
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -26,13 +92,74 @@ def create_backup():
     backup_path = backups_dir / backup_name
 
     try:
-        print(f"💾 Creating backup: {backup_name}")
-        shutil.copytree(world_dir, backup_path)
-        print(f"✅ Backup created successfully: {backup_name}")
+        if mode == "archive":
+            archive_path = backups_dir / f"{backup_name}{FORMATS[compression]}"
+            print(f"💾 Creating archive: {archive_path.name}")
+            stats = write_archive(source_dir, archive_path, compression=compression, arcname="world")
+            print(f"✅ Backup created successfully: {archive_path.name}")
+            print(f"   {_mb(stats['bytes'])} -> {_mb(stats['archive_bytes'])} "
+                  f"in {stats['seconds']:.1f}s on {stats['workers']} workers")
+        else:
+            print(f"💾 Creating backup: {backup_name}")
+            shutil.copytree(source_dir, backup_path, ignore=shutil.ignore_patterns("session.lock"))
+            print(f"✅ Backup created successfully: {backup_name}")
         return True
     except Exception as e:
         print(f"❌ Backup failed: {e}")
         return False
+    finally:
+        if frozen:
+            frozen.release()
+
+
+def restore_backup(name, target=None):
+    """Rebuild a backup into target, or swap an incremental backup in as server/world"""
+    archive_path = Path("backups") / name
+    if archive_path.is_file():
+        target = target or "server/world_restored"
+        extract_archive(archive_path, target)
+        print(f"✅ Extracted {name} into {target}")
+        return True
+
+    catalog = load_catalog()
+    if name not in catalog.records:
+        print(f"❌ Backup {name} not found")
+        return False
+    if target:
+        elapsed = catalog.backup.restore(name, target)
+        print(f"✅ Restored {name} into {target} in {elapsed:.1f}s")
+        return True
+    try:
+        report = catalog.restore(name)
+    except RuntimeError as e:
+        print(f"❌ {e}; stop the server first")
+        return False
+    print(f"✅ Restored {name}: rebuilt in {report['rebuild_seconds']:.1f}s, "
+          f"swapped in {report['swap_seconds'] * 1000:.0f} ms (previous world kept in {report['previous']})")
+    return True
+
+
+def verify_backups(name=None):
+    """Re-hash the objects of one or all incremental backups"""
+    catalog = load_catalog()
+    names = [name] if name else [record["name"] for record in catalog.list_backups()]
+    ok = True
+    for backup in names:
+        result = catalog.verify(backup, make_throttle())
+        ok = ok and result["ok"]
+        status = "✅" if result["ok"] else "❌"
+        print(f"{status} {backup}: {result['objects']} objects checked in {result['seconds']}s")
+        for problem in result["problems"]:
+            print(f"   - {problem}")
+    return ok
+
+
+def prune_backups():
+    """Apply the retention policy and delete unreferenced objects"""
+    result = load_catalog().apply_retention()
+    print(f"🧹 Removed {len(result['removed'])} backups, freed {_mb(result['freed_bytes'])}")
+    for name in result["removed"]:
+        print(f"   - {name}")
 
 
 def list_backups():
@@ -43,19 +170,43 @@ def list_backups():
         print("ℹ️  No backups found")
         return
 
-    backups = [d for d in backups_dir.iterdir() if d.is_dir()]
+    backups = [d for d in backups_dir.iterdir()
+               if (d.is_dir() and d.name not in ("store", ".snapshot")) or d.name.endswith(tuple(FORMATS.values()))]
+    records = load_catalog().list_backups()
 
-    if not backups:
+    if not backups and not records:
         print("ℹ️  No backups found")
         return
 
-    print(f"📋 Available backups ({len(backups)}):")
-    for backup in sorted(backups):
-        print(f"   - {backup.name}")
+    if records:
+        print(f"📋 Incremental backups ({len(records)}):")
+        for record in records:
+            verified = record["verified"]
+            status = "unverified" if not verified else ("verified" if verified["ok"] else "CORRUPT")
+            print(f"   - {record['name']}  {_mb(record['size'])} ({_mb(record['stored_bytes'])} new)  "
+                  f"{record['seconds']:.1f}s  {status}  sha1 {record['checksum'][:12]}")
+    if backups:
+        print(f"📋 Full copies and archives ({len(backups)}):")
+        for backup in sorted(backups):
+            print(f"   - {backup.name}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "list":
+    args = [arg for arg in sys.argv[1:] if arg != "--snapshot"]
+    snapshot = "--snapshot" in sys.argv
+    command = args[0] if args else "incremental"
+    if command == "list":
         list_backups()
+    elif command == "restore" and len(args) > 1:
+        restore_backup(*args[1:3])
+    elif command == "verify":
+        sys.exit(0 if verify_backups(*args[1:2]) else 1)
+    elif command == "prune":
+        prune_backups()
+    elif command in ("incremental", "full"):
+        create_backup(command, snapshot=snapshot)
+    elif command == "archive":
+        create_backup(command, args[1] if len(args) > 1 else "gzip", snapshot=snapshot)
     else:
-        create_backup()
\ No newline at end of file
+        print("Usage: backup_world.py [--snapshot] [incremental|full|archive [gzip|xz]|list|verify [name]|prune|"
+              "restore <name> [target]]")
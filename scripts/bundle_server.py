@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config_loader import ConfigLoader
+from src.server_bundle import ServerBundle
+
+
+def main():
+    config = ConfigLoader.load_server_config()
+    mc_version = config["minecraft_version"]
+    forge_version = config["forge_version"]
+    bundles = config.get("bundles", {})
+    server_bundle = ServerBundle(bundle_dir=bundles.get("dir", "cache/bundles"), workers=bundles.get("workers"))
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "info"
+
+    if command == "create":
+        print(f"📦 Bundling installed server for Forge {mc_version}-{forge_version}...")
+        started = time.time()
+        path = server_bundle.create("server", mc_version, forge_version)
+        if not path:
+            print("❌ No installed server files found in server/")
+            return False
+        print(f"✅ Bundle created: {path} ({time.time() - started:.1f}s)")
+
+    elif command == "restore":
+        print(f"📥 Restoring Forge {mc_version}-{forge_version} server bundle...")
+        elapsed = server_bundle.restore("server", mc_version, forge_version)
+        if elapsed is None:
+            print("❌ No bundle found for the configured versions")
+            return False
+        print(f"✅ Restored in {elapsed:.1f}s")
+
+    metadata = server_bundle.load_metadata(mc_version, forge_version)
+    if not metadata:
+        print(f"ℹ️  No bundle for Forge {mc_version}-{forge_version}")
+        return True
+
+    print(f"📋 Bundle {server_bundle.bundle_path(mc_version, forge_version).name}:")
+    print(f"   Files: {metadata.get('files')} ({metadata.get('bytes', 0) / 1024 / 1024:.1f} MB, "
+          f"{metadata.get('archive_bytes', 0) / 1024 / 1024:.1f} MB archived)")
+    if metadata.get("install_seconds"):
+        print(f"   Cold start with installer: {metadata['install_seconds']}s")
+    restores = metadata.get("restores", [])
+    if restores:
+        print(f"   Cold start from bundle: {restores[-1]['seconds']}s (last of {len(restores)} restores)")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
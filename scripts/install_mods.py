@@ -4,10 +4,10 @@ import sys
 import logging
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
 
-from src.mod_manager import ModManager
+from mod_manager import ModManager
 
 
 def main():
@@ -34,6 +34,12 @@ def main():
     else:
         print("ℹ️  No mods installed. Add mod .jar files to the 'mods/' directory.")
 
+    # Catch dependency problems before the server spends minutes loading
+    problems = mods_manager.check_mods()
+    for problem in problems:
+        icon = "❌" if problem["severity"] == "error" else "⚠️ "
+        print(f"{icon} {problem['file']}: {problem['message']}")
+
     print("\n📝 Next: Run 'python main.py' to start the server with mods")
 
 
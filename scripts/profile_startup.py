@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mod_index import ModIndex
+from startup_profiler import (StartupProfiler, save_profile, load_profile, format_report,
+                              compare_profiles, format_comparison)
+
+
+def main():
+    args = sys.argv[1:]
+
+    if args and args[0] == "compare":
+        if len(args) != 3:
+            print("Usage: profile_startup.py compare <old.json> <new.json>")
+            return False
+        print(format_comparison(compare_profiles(load_profile(args[1]), load_profile(args[2]))))
+        return True
+
+    output = None
+    if "--json" in args:
+        position = args.index("--json")
+        output = args[position + 1] if position + 1 < len(args) else "startup-profile.json"
+        del args[position:position + 2]
+    log_path = args[0] if args else "server/logs/debug.log"
+
+    if not os.path.exists(log_path):
+        print(f"❌ {log_path} not found; start the server once to produce it")
+        return False
+
+    index = ModIndex("server/mods")
+    profiler = StartupProfiler(
+        packages=index.get_packages(),
+        mod_ids=[mod["mod_id"] for mod in index.get_mods()]
+    )
+    profile = profiler.profile(log_path)
+    if not profile:
+        print(f"❌ No Forge log records in {log_path}")
+        return False
+
+    print(format_report(profile))
+    if output:
+        print(f"\n💾 Saved profile to {save_profile(profile, output)}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
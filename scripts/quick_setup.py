@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 import os
+import sys
 import subprocess
-import requests
 from pathlib import Path
 
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.artifact_cache import ArtifactCache, print_progress
+
 def main():
     print("🚀 Quick Minecraft Forge Setup")
     
@@ -17,18 +22,7 @@ def main():
         url = "https://maven.minecraftforge.net/net/minecraftforge/forge/1.20.1-47.2.0/forge-1.20.1-47.2.0-installer.jar"
         
         try:
-            response = requests.get(url, stream=True, timeout=60)
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open("server/forge-installer.jar", "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            percent = (downloaded / total_size) * 100
-                            print(f"Progress: {percent:.1f}%", end='\r')
+            ArtifactCache().fetch(url, destination="server/forge-installer.jar", progress=print_progress("Progress"))
             print("\n✅ Download complete")
         except Exception as e:
             print(f"❌ Download failed: {e}")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from config_loader import ConfigLoader
+from map_renderer import MapRenderer
+
+
+def main():
+    args = sys.argv[1:]
+    dimensions = []
+    while "--dimension" in args:
+        position = args.index("--dimension")
+        dimensions.extend(args[position + 1:position + 2])
+        del args[position:position + 2]
+    world_dir = args[0] if args else "server/world"
+
+    if not os.path.isdir(world_dir):
+        print(f"❌ {world_dir} not found")
+        print("Usage: render_map.py [world] [--dimension minecraft:overworld ...]")
+        return False
+
+    config = ConfigLoader.load_server_config().get("map", {})
+    renderer = MapRenderer(
+        world_dir,
+        output_dir=config.get("output_dir", "cache/map"),
+        dimensions=dimensions or config.get("dimensions"),
+        palette=config.get("palette")
+    )
+    index = renderer.render()
+    print(f"🗺️  Map updated in {index['seconds']}s -> {renderer.output_dir}")
+    for dimension in renderer.dimensions:
+        tiles = index["dimensions"][dimension]["tiles"]
+        print(f"   {dimension}: {len(tiles)} tiles")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
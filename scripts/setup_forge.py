@@ -20,11 +20,8 @@ def main():
     url = "https://maven.minecraftforge.net/net/minecraftforge/forge/1.20.1-47.2.0/forge-1.20.1-47.2.0-installer.jar"
     
     try:
-        import requests
-        response = requests.get(url, stream=True, timeout=60)
-        with open("server/forge-installer.jar", "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        from src.artifact_cache import ArtifactCache
+        ArtifactCache().fetch(url, destination="server/forge-installer.jar")
         print("✅ Download complete")
     except Exception as e:
         print(f"❌ Download failed: {e}")
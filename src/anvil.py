@@ -0,0 +1,150 @@
+import os
+import sys
+import re
+import gzip
+import mmap
+import zlib
+import struct
+from array import array
+from pathlib import Path
+
+
+SECTOR = 4096
+HEADER_SIZE = 2 * SECTOR
+CHUNKS_PER_REGION = 1024
+MAX_SECTORS = 255
+
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+EXTERNAL_FLAG = 0x80
+
+REGION_NAME = re.compile(r"^r\.(-?\d+)\.(-?\d+)\.mca$")
+
+
+def region_coords(path):
+    """(region x, region z) from an r.X.Z.mca file name"""
+    match = REGION_NAME.match(Path(path).name)
+    if not match:
+        raise ValueError(f"Not a region file: {path}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def chunk_coords(region_x, region_z, index):
+    """Absolute chunk coordinates of a header slot"""
+    return region_x * 32 + index % 32, region_z * 32 + index // 32
+
+
+def parse_header(data):
+    """Big-endian location and timestamp tables of a region as two array('I') of 1024 entries"""
+    locations = array("I")
+    timestamps = array("I")
+    if len(data) >= HEADER_SIZE:
+        locations.frombytes(data[:SECTOR])
+        timestamps.frombytes(data[SECTOR:HEADER_SIZE])
+        if sys.byteorder == "little":
+            locations.byteswap()
+            timestamps.byteswap()
+    else:
+        locations.extend([0] * CHUNKS_PER_REGION)
+        timestamps.extend([0] * CHUNKS_PER_REGION)
+    return locations, timestamps
+
+
+def decompress(stored):
+    """Uncompressed NBT of a stored chunk (compression type byte + payload)"""
+    kind, payload = stored[0] & ~EXTERNAL_FLAG, stored[1:]
+    if kind == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if kind == COMPRESSION_GZIP:
+        return gzip.decompress(payload)
+    if kind == COMPRESSION_NONE:
+        return bytes(payload)
+    raise ValueError(f"Unsupported chunk compression {kind}")
+
+
+class RegionFile:
+    """Read-only, memory-mapped Anvil region file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        # Minecraft leaves empty region files behind; they cannot be mapped
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.locations, self.timestamps = parse_header(self.data)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def chunks(self):
+        """Yield (index, timestamp, sector offset, sector count) for every present chunk"""
+        for index in range(CHUNKS_PER_REGION):
+            location = self.locations[index]
+            if location:
+                yield index, self.timestamps[index], location >> 8, location & 0xFF
+
+    def read_stored(self, index):
+        """Compression type byte + compressed payload of a chunk, or None if absent or corrupt"""
+        location = self.locations[index]
+        if not location:
+            return None
+        start = (location >> 8) * SECTOR
+        if start + 5 > len(self.data):
+            return None
+        length = struct.unpack(">I", self.data[start:start + 4])[0]
+        if length == 0 or start + 4 + length > len(self.data):
+            return None
+        kind = self.data[start + 4]
+        if kind & EXTERNAL_FLAG:
+            x, z = chunk_coords(*region_coords(self.path), index)
+            try:
+                payload = (self.path.parent / f"c.{x}.{z}.mcc").read_bytes()
+            except OSError:
+                return None
+            return bytes([kind & ~EXTERNAL_FLAG]) + payload
+        return self.data[start + 4:start + 4 + length]
+
+    def read_nbt(self, index):
+        stored = self.read_stored(index)
+        return decompress(stored) if stored else None
+
+
+def write_region(path, chunks):
+    """Write a region file from (index, timestamp, stored bytes) entries; oversized chunks go to .mcc files"""
+    path = Path(path)
+    region_x, region_z = region_coords(path)
+    locations = array("I", [0] * CHUNKS_PER_REGION)
+    timestamps = array("I", [0] * CHUNKS_PER_REGION)
+    body = bytearray()
+    sector = HEADER_SIZE // SECTOR
+
+    for index, timestamp, stored in sorted(chunks, key=lambda entry: entry[0]):
+        record = struct.pack(">I", len(stored)) + stored
+        if len(record) > MAX_SECTORS * SECTOR:
+            x, z = chunk_coords(region_x, region_z, index)
+            (path.parent / f"c.{x}.{z}.mcc").write_bytes(stored[1:])
+            record = struct.pack(">I", 1) + bytes([stored[0] | EXTERNAL_FLAG])
+        sectors = -(-len(record) // SECTOR)
+        body += record + b"\0" * (sectors * SECTOR - len(record))
+        locations[index] = sector << 8 | sectors
+        timestamps[index] = timestamp
+        sector += sectors
+
+    if sys.byteorder == "little":
+        locations.byteswap()
+        timestamps.byteswap()
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(locations.tobytes())
+        f.write(timestamps.tobytes())
+        f.write(body)
+    os.replace(tmp, path)
@@ -0,0 +1,273 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class ArtifactError(Exception):
+    pass
+
+
+class ArtifactCache:
+    """Content-addressed download cache with checksum verification, resume and ranged parallel fetches"""
+
+    def __init__(self, cache_dir="cache/artifacts", chunk_size=1024 * 1024, parallel_segments=4,
+                 segment_threshold=32 * 1024 * 1024, timeout=60, session=None):
+        self.cache_dir = Path(cache_dir)
+        self.chunk_size = chunk_size
+        self.parallel_segments = parallel_segments
+        self.segment_threshold = segment_threshold
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.fetch_locks = {}
+        self.partial_dir = self.cache_dir / "partial"
+        self.url_map_path = self.cache_dir / "urls.json"
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+
+    # Cache layout
+
+    def path_for(self, algorithm, digest):
+        """Location of an object in the cache"""
+        digest = digest.lower()
+        return self.cache_dir / algorithm / digest[:2] / digest
+
+    def lookup(self, sha1=None, sha256=None):
+        """Get the cached path of an artifact by digest, or None"""
+        for algorithm, digest in (("sha256", sha256), ("sha1", sha1)):
+            if digest:
+                path = self.path_for(algorithm, digest)
+                if path.exists():
+                    return path
+        return None
+
+    def _load_url_map(self):
+        try:
+            return json.loads(self.url_map_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _remember_url(self, url, digests):
+        with self.lock:
+            url_map = self._load_url_map()
+            url_map[url] = digests
+            tmp = self.url_map_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(url_map, indent=2))
+            os.replace(tmp, self.url_map_path)
+
+    def _store(self, source, digests):
+        """Move a verified file into the cache under both digests"""
+        target = self.path_for("sha256", digests["sha256"])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+        alias = self.path_for("sha1", digests["sha1"])
+        if not alias.exists():
+            alias.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(target, alias)
+            except OSError:
+                shutil.copy2(target, alias)
+        return target
+
+    # Checksums
+
+    def fetch_sidecar_digests(self, url):
+        """Read Maven-style .sha256/.sha1 sidecar files published next to an artifact"""
+        digests = {}
+        for algorithm, length in (("sha256", 64), ("sha1", 40)):
+            try:
+                response = self.session.get(f"{url}.{algorithm}", timeout=self.timeout)
+                if response.status_code == 200:
+                    digest = response.text.strip().split()[0].lower() if response.text.strip() else ""
+                    if len(digest) == length and all(c in "0123456789abcdef" for c in digest):
+                        digests[algorithm] = digest
+            except requests.RequestException:
+                continue
+        return digests
+
+    @staticmethod
+    def hash_file(path, chunk_size=1024 * 1024):
+        """Compute sha1 and sha256 of a file in one pass"""
+        sha1 = hashlib.sha1()
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha1.update(chunk)
+                sha256.update(chunk)
+        return {"sha1": sha1.hexdigest(), "sha256": sha256.hexdigest()}
+
+    # Fetching
+
+    def fetch(self, url, destination=None, sha1=None, sha256=None, use_sidecar=True, progress=None):
+        """Get an artifact from the cache or download it; returns the path of the cached copy"""
+        expected = {key: value.lower() for key, value in (("sha1", sha1), ("sha256", sha256)) if value}
+
+        cached = self.lookup(**expected) if expected else None
+        if cached is None and not expected:
+            # Versioned artifacts are immutable, so a URL fetched before needs no network at all
+            known = self._load_url_map().get(url)
+            if known:
+                cached = self.lookup(**known)
+        if cached is None and use_sidecar and not expected:
+            expected = self.fetch_sidecar_digests(url)
+            cached = self.lookup(**expected) if expected else None
+
+        if cached is not None:
+            self.logger.info(f"Using cached artifact for {url}")
+        else:
+            cached = self._download(url, expected, progress)
+
+        if destination:
+            self._materialize(cached, Path(destination))
+        return cached
+
+    def _materialize(self, cached, destination):
+        """Place a cached object at destination, hardlinking when possible"""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destination.with_name(destination.name + ".tmp")
+        if tmp.exists():
+            tmp.unlink()
+        try:
+            os.link(cached, tmp)
+        except OSError:
+            shutil.copy2(cached, tmp)
+        os.replace(tmp, destination)
+
+    def _download(self, url, expected, progress):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        with self.lock:
+            fetch_lock = self.fetch_locks.setdefault(key, threading.Lock())
+        # Fetches of one URL share its .partial file, so they take turns
+        with fetch_lock:
+            cached = self.lookup(**(expected or self._load_url_map().get(url, {})))
+            if cached is not None:
+                # Downloaded by another thread while this one waited
+                return cached
+            return self._download_locked(url, self.partial_dir / key, expected, progress)
+
+    def _download_locked(self, url, part, expected, progress):
+        total, ranges, validator = self._probe(url)
+
+        # Partial bytes are only resumed for the same version of the artifact, identified
+        # by the ETag or Last-Modified they were downloaded under
+        validator_path = part.with_name(f"{part.name}.validator")
+        saved = validator_path.read_text() if validator_path.exists() else None
+        if saved != validator or validator is None:
+            for stale in self.partial_dir.glob(f"{part.name}*"):
+                stale.unlink()
+            if validator:
+                validator_path.write_text(validator)
+
+        if (ranges and total and total >= self.segment_threshold and self.parallel_segments > 1
+                and not part.exists()):
+            self._download_segmented(url, part, total, progress, validator)
+        else:
+            self._download_stream(url, part, total, progress, validator=validator)
+        if validator_path.exists():
+            validator_path.unlink()
+
+        digests = self.hash_file(part, self.chunk_size)
+        for algorithm, digest in expected.items():
+            if digests[algorithm] != digest:
+                part.unlink()
+                raise ArtifactError(f"{algorithm} mismatch for {url}: expected {digest}, got {digests[algorithm]}")
+
+        cached = self._store(part, digests)
+        self._remember_url(url, digests)
+        self.logger.info(f"Downloaded {url} ({cached.stat().st_size} bytes, sha256 {digests['sha256'][:12]})")
+        return cached
+
+    def _probe(self, url):
+        """Get (content length, range support, If-Range validator) of a URL"""
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code >= 400:
+                return None, False, None
+            length = int(response.headers.get("content-length", 0)) or None
+            # If-Range only accepts a strong ETag
+            etag = response.headers.get("etag")
+            validator = etag if etag and not etag.startswith("W/") else response.headers.get("last-modified")
+            return length, response.headers.get("accept-ranges", "").lower() == "bytes", validator
+        except (requests.RequestException, ValueError):
+            return None, False, None
+
+    def _download_stream(self, url, part, total, progress, start=0, end=None, validator=None):
+        """Download (a range of) url into part, resuming from what part already holds
+
+        Ranges are sent with If-Range, so a server holding a different version answers
+        with the whole file instead of bytes that would be spliced onto the old ones.
+        """
+        offset = part.stat().st_size if part.exists() else 0
+        if end is not None and start + offset > end:
+            return
+
+        headers = {}
+        if start + offset or end is not None:
+            headers["Range"] = f"bytes={start + offset}-{'' if end is None else end}"
+            if validator:
+                headers["If-Range"] = validator
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and offset:
+                # The partial file is already complete
+                return
+            response.raise_for_status()
+            if headers and response.status_code != 206:
+                if start or end is not None:
+                    part.unlink(missing_ok=True)
+                    raise ArtifactError(f"Server ignored range request for {url} or the artifact changed")
+                self.logger.info(f"Server did not resume (unsupported or artifact changed), restarting {url}")
+                offset = 0
+
+            if offset:
+                self.logger.info(f"Resuming {url} at byte {start + offset}")
+            with open(part, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        if progress:
+                            progress(len(chunk), total)
+
+    def _download_segmented(self, url, part, total, progress, validator=None):
+        """Download a large file as parallel byte ranges, each resumable on its own"""
+        size = -(-total // self.parallel_segments)
+        segments = []
+        for n in range(self.parallel_segments):
+            start = n * size
+            end = min(start + size, total) - 1
+            if start <= end:
+                segments.append((self.partial_dir / f"{part.name}.seg{n}", start, end))
+
+        self.logger.info(f"Downloading {url} in {len(segments)} parallel segments")
+        with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+            futures = [pool.submit(self._download_stream, url, path, total, progress, start, end, validator)
+                       for path, start, end in segments]
+            for future in futures:
+                future.result()
+
+        with open(part, "wb") as out:
+            for path, start, end in segments:
+                if path.stat().st_size != end - start + 1:
+                    raise ArtifactError(f"Segment {path.name} of {url} is incomplete")
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out, self.chunk_size)
+        for path, _, _ in segments:
+            path.unlink()
+
+
+def print_progress(label="Download progress"):
+    """Progress callback printing a percentage on one line"""
+    state = {"done": 0}
+
+    def callback(count, total):
+        state["done"] += count
+        if total:
+            print(f"{label}: {state['done'] / total * 100:.1f}%", end='\r')
+    return callback
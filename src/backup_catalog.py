@@ -0,0 +1,330 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from world_backup import IncrementalBackup
+from world_analyzer import world_in_use
+
+
+DEFAULT_RETENTION = {"last": 3, "hourly": 24, "daily": 7, "weekly": 4}
+
+# Objects younger than this are never collected, so a backup running in another
+# process cannot lose chunks it has stored but not yet referenced in a manifest
+GC_GRACE_SECONDS = 3600
+
+
+def gfs_retain(timestamps, last=3, hourly=24, daily=7, weekly=4):
+    """Names to keep under grandfather-father-son retention
+
+    Keeps the newest `last` backups plus the newest backup of each of the most
+    recent `hourly` hours, `daily` days and `weekly` ISO weeks that have one.
+    """
+    ordered = sorted(timestamps, key=timestamps.get, reverse=True)
+    keep = set(ordered[:last])
+    for count, bucket in ((hourly, "%Y-%m-%d %H"), (daily, "%Y-%m-%d"), (weekly, "%G-%V")):
+        seen = set()
+        for name in ordered:
+            key = time.strftime(bucket, time.localtime(timestamps[name]))
+            if key in seen:
+                continue
+            if len(seen) >= count:
+                break
+            seen.add(key)
+            keep.add(name)
+    return keep
+
+
+def _sha1_file(path, chunk_size=1024 * 1024):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+class BackupCatalog:
+    """Catalog of incremental world backups with retention, verification and restore
+
+    Every snapshot gets a record with its size, duration, save-off window and the
+    sha1 of its manifest. Retention prunes snapshots GFS-style and collects the
+    objects no remaining snapshot references; a background thread re-hashes the
+    objects of the least recently verified snapshot.
+    """
+
+    def __init__(self, world_dir="server/world", store_dir="backups/store", retention=None,
+                 verify_interval=3600, workers=None):
+        self.backup = IncrementalBackup(world_dir, store_dir, workers)
+        self.world_dir = Path(world_dir)
+        self.store_dir = Path(store_dir)
+        self.catalog_path = self.store_dir / "catalog.json"
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self.verify_interval = verify_interval
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.RLock()
+        # Held for a whole backup, which can take minutes when throttled; self.lock only guards the records
+        self.create_lock = threading.RLock()
+        self.restore_status = None
+        self.throttle_factory = None
+        self.running = False
+        self.thread = None
+        self.records = self._load()
+
+    # Catalog
+
+    def _load(self):
+        try:
+            records = json.loads(self.catalog_path.read_text())
+        except (OSError, ValueError):
+            records = {}
+        # Snapshots made before the catalog existed, or by another process
+        for name in self.backup.list_snapshots():
+            if name not in records:
+                records[name] = self._describe(name)
+        for name in [name for name in records if not self._manifest_path(name).exists()]:
+            del records[name]
+        return records
+
+    def _save(self):
+        tmp = self.catalog_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.records, indent=2))
+        os.replace(tmp, self.catalog_path)
+
+    def _manifest_path(self, name):
+        return self.backup.snapshots_dir / f"{name}.json"
+
+    def _describe(self, name, window=None):
+        manifest = self.backup.load_snapshot(name)
+        stats = manifest["stats"]
+        return {
+            "name": name,
+            "created_at": manifest["created_at"],
+            "timestamp": time.mktime(time.strptime(manifest["created_at"], "%Y-%m-%dT%H:%M:%S")),
+            "size": manifest["size"],
+            "stored_bytes": stats["bytes_written"],
+            "files": len(manifest["entries"]),
+            "chunks": stats["chunks"],
+            "chunks_changed": stats["chunks"] - stats["chunks_reused"],
+            "seconds": stats["seconds"],
+            "save_off_seconds": window["window_seconds"] if window else None,
+            "checksum": _sha1_file(self._manifest_path(name)),
+            "throttle": None,
+            "verified": None
+        }
+
+    def list_backups(self):
+        """Catalog records, newest first"""
+        with self.lock:
+            self.records = self._load()
+            return sorted(self.records.values(), key=lambda record: record["timestamp"], reverse=True)
+
+    # Backup and retention
+
+    def create(self, snapshot=None, throttle=None, **extra):
+        """Back up the world, through a WorldSnapshot when the server is running; returns the record
+
+        Extra keyword arguments are stored in the record as they are.
+        """
+        with self.create_lock:
+            with self.lock:
+                # Damage found since the last backup means every region is re-read so lost objects are replaced
+                latest = max((record["created_at"] for record in self.records.values()), default="")
+                rescan = any(record["verified"] and not record["verified"]["ok"]
+                             and record["verified"]["at"] >= latest for record in self.records.values())
+            window = None
+            source = None
+            if snapshot is not None:
+                window = snapshot.take()
+                source = snapshot.snapshot_dir
+            try:
+                manifest = self.backup.create(source_dir=source, rescan=rescan, throttle=throttle)
+            finally:
+                if snapshot is not None:
+                    snapshot.release()
+            record = self._describe(manifest["name"], window)
+            if throttle:
+                record["throttle"] = throttle.get_stats()
+            record.update(extra)
+            with self.lock:
+                self.records[record["name"]] = record
+                self._save()
+            self.apply_retention()
+            return record
+
+    def apply_retention(self):
+        """Delete snapshots outside the retention policy and their unreferenced objects
+
+        Waits for a running backup, which may be reusing objects only old snapshots reference.
+        """
+        with self.create_lock, self.lock:
+            timestamps = {name: record["timestamp"] for name, record in self.records.items()}
+            keep = gfs_retain(timestamps, **self.retention)
+            removed = sorted(set(timestamps) - keep)
+            for name in removed:
+                self._manifest_path(name).unlink(missing_ok=True)
+                del self.records[name]
+            self._save()
+            freed = self.collect_garbage() if removed else 0
+        if removed:
+            self.logger.info(f"Retention removed {len(removed)} backups, freed {freed} bytes")
+        return {"removed": removed, "freed_bytes": freed}
+
+    def _referenced(self, name, problems=None):
+        """Every object digest a snapshot needs, loading its chunk tables"""
+        digests = set()
+        for relative, entry in self.backup.load_snapshot(name)["entries"].items():
+            digests.add(entry["object"])
+            if entry["type"] != "region":
+                continue
+            try:
+                table = self.backup.objects.get_json(entry["object"])
+            except Exception as e:
+                if problems is None:
+                    raise
+                problems.append(f"{relative}: unreadable chunk table ({e})")
+                continue
+            digests.update(digest for _, _, digest, *_ in table["chunks"])
+        return digests
+
+    def collect_garbage(self):
+        """Remove objects no snapshot references; returns bytes freed"""
+        with self.lock:
+            referenced = set()
+            for name in self.records:
+                referenced |= self._referenced(name)
+            cutoff = time.time() - GC_GRACE_SECONDS
+            freed = 0
+            for path in self.backup.objects.objects_dir.rglob("*"):
+                if path.is_file() and path.name not in referenced:
+                    stat = path.stat()
+                    if stat.st_mtime < cutoff:
+                        path.unlink()
+                        freed += stat.st_size
+            return freed
+
+    # Verification
+
+    def verify(self, name, throttle=None):
+        """Re-hash every object of a snapshot; stores and returns the result"""
+        started = time.time()
+        io = throttle or (lambda amount: None)
+        problems = []
+        record = self.records.get(name)
+        if record and _sha1_file(self._manifest_path(name)) != record["checksum"]:
+            problems.append("manifest checksum mismatch")
+        digests = self._referenced(name, problems)
+
+        def check(digest):
+            path = self.backup.objects.path_for(digest)
+            if not path.exists():
+                return f"{digest}: missing"
+            io(path.stat().st_size)
+            if _sha1_file(path) != digest:
+                # Dropped so the next backup stores a good copy instead of reusing it
+                path.unlink()
+                return f"{digest}: corrupt"
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.backup.workers) as pool:
+            problems.extend(problem for problem in pool.map(check, sorted(digests)) if problem)
+
+        result = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "ok": not problems,
+            "objects": len(digests),
+            "problems": problems[:20],
+            "seconds": round(time.time() - started, 2),
+            "throttle": throttle.get_stats() if throttle else None
+        }
+        with self.lock:
+            if name in self.records:
+                self.records[name]["verified"] = result
+                self._save()
+        log = self.logger.info if result["ok"] else self.logger.error
+        log(f"Verified backup {name}: {len(digests)} objects, {len(problems)} problems in {result['seconds']}s")
+        return result
+
+    def start(self):
+        if self.running or not self.verify_interval:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.verify_interval)
+            records = self.list_backups()
+            if not records:
+                continue
+            # Never-verified snapshots first, then the one verified longest ago
+            oldest = min(records, key=lambda record: (record["verified"] or {}).get("at", ""))
+            try:
+                self.verify(oldest["name"], self.throttle_factory() if self.throttle_factory else None)
+            except Exception as e:
+                self.logger.warning(f"Backup verification failed: {e}")
+
+    # Restore
+
+    def restore(self, name, before_swap=None, after_swap=None):
+        """Rebuild a snapshot next to the world, then swap it in with two renames
+
+        The slow rebuild happens while the server may still be running; before_swap
+        (e.g. stopping the server) and after_swap (starting it again) bracket only
+        the swap. The replaced world is kept as <world>.before-restore.
+        """
+        staging = self.world_dir.with_name(self.world_dir.name + ".restoring")
+        previous = self.world_dir.with_name(self.world_dir.name + ".before-restore")
+        self.restore_status = {"name": name, "phase": "rebuilding", "started_at": time.time()}
+        try:
+            if staging.exists():
+                shutil.rmtree(staging)
+            rebuild_seconds = self.backup.restore(name, staging)
+
+            self.restore_status["phase"] = "swapping"
+            downtime_started = time.time()
+            if before_swap:
+                before_swap()
+            try:
+                if world_in_use(self.world_dir):
+                    raise RuntimeError(f"{self.world_dir} is in use by a running server")
+                swap_started = time.time()
+                if previous.exists():
+                    shutil.rmtree(previous)
+                moved = self.world_dir.exists()
+                if moved:
+                    os.rename(self.world_dir, previous)
+                try:
+                    os.rename(staging, self.world_dir)
+                except OSError:
+                    # Never leave the server to start without a world (it would generate a new one)
+                    if moved:
+                        os.rename(previous, self.world_dir)
+                    raise
+                swap_seconds = time.time() - swap_started
+            finally:
+                # Whatever happened, the server stopped by before_swap comes back
+                if after_swap:
+                    after_swap()
+        except Exception as e:
+            self.restore_status.update(phase="failed", error=str(e))
+            raise
+
+        self.restore_status.update(
+            phase="done",
+            rebuild_seconds=round(rebuild_seconds, 2),
+            swap_seconds=round(swap_seconds, 3),
+            downtime_seconds=round(time.time() - downtime_started, 2),
+            previous=str(previous)
+        )
+        self.logger.info(f"Restored backup {name} into {self.world_dir}: rebuilt in {rebuild_seconds:.1f}s, "
+                         f"swapped in {swap_seconds * 1000:.0f} ms")
+        return dict(self.restore_status)
@@ -0,0 +1,212 @@
+import time
+import logging
+import threading
+
+from distance_controller import PLAYERS_LINE
+
+
+class TokenBucket:
+    """Thread-safe byte budget refilled at `rate` bytes per second
+
+    Callers take what they need up front and sleep off any debt, so concurrent
+    readers and writers share one bandwidth cap. A rate of 0 disables the cap.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount, rate=None):
+        """Take amount bytes at rate (default self.rate); returns the seconds slept"""
+        rate = rate or self.rate
+        if not rate:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class IoThrottle:
+    """Per-job I/O throttle: a shared TokenBucket, slowed further while Forge MSPT is high
+
+    Called with the number of bytes about to be read or written. Above mspt_backoff
+    the job runs at backoff_factor of the bandwidth; above mspt_pause it stops
+    (for at most max_pause seconds per call) until ticks recover. Waits are summed
+    over all threads using the throttle.
+    """
+
+    def __init__(self, bucket, get_mspt=None, mspt_backoff=40.0, mspt_pause=50.0, backoff_factor=0.25,
+                 max_pause=300):
+        self.bucket = bucket
+        self.get_mspt = get_mspt
+        self.mspt_backoff = mspt_backoff
+        self.mspt_pause = mspt_pause
+        self.backoff_factor = backoff_factor
+        self.max_pause = max_pause
+        self.mspt = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+        self.stats = {
+            "bytes": 0,
+            "throttled_seconds": 0.0,
+            "paused_seconds": 0.0,
+            "backoff_bytes": 0,
+            "max_mspt": None
+        }
+
+    def _current_mspt(self):
+        now = time.monotonic()
+        if now - self.checked >= 1.0 and self.get_mspt:
+            self.checked = now
+            try:
+                self.mspt = self.get_mspt()
+            except Exception:
+                self.mspt = None
+            if self.mspt is not None:
+                with self.lock:
+                    self.stats["max_mspt"] = max(self.stats["max_mspt"] or 0.0, round(self.mspt, 2))
+        return self.mspt
+
+    def __call__(self, amount):
+        paused = 0.0
+        mspt = self._current_mspt()
+        while mspt is not None and mspt >= self.mspt_pause and paused < self.max_pause:
+            time.sleep(1.0)
+            paused += 1.0
+            mspt = self._current_mspt()
+
+        slow = mspt is not None and mspt >= self.mspt_backoff
+        rate = self.bucket.rate * self.backoff_factor if slow else self.bucket.rate
+        waited = self.bucket.consume(amount, rate)
+        with self.lock:
+            self.stats["bytes"] += amount
+            self.stats["throttled_seconds"] += waited
+            self.stats["paused_seconds"] += paused
+            if slow:
+                self.stats["backoff_bytes"] += amount
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats,
+                        throttled_seconds=round(self.stats["throttled_seconds"], 2),
+                        paused_seconds=round(self.stats["paused_seconds"], 2))
+
+
+class BackupScheduler:
+    """Runs throttled backups every `interval` seconds, preferring moments with nobody online
+
+    A due backup waits up to idle_window seconds for the player count to reach zero
+    before running anyway. Reads and writes share a token bucket of `bandwidth`
+    bytes per second that backs off as MSPT rises.
+    """
+
+    def __init__(self, forge_manager):
+        self.forge_manager = forge_manager
+        self.config = forge_manager.config["backups"]["schedule"]
+        self.logger = logging.getLogger(__name__)
+        self.bucket = TokenBucket(self.config["bandwidth"])
+        self.status = "idle"
+        self.due_since = None
+        self.last_run = None
+        self.running = False
+        self.stopped = None
+        self.thread = None
+
+    def make_throttle(self):
+        return IoThrottle(
+            self.bucket,
+            get_mspt=self._mspt,
+            mspt_backoff=self.config["mspt_backoff"],
+            mspt_pause=self.config["mspt_pause"]
+        )
+
+    def _mspt(self):
+        if not self.forge_manager.is_running():
+            return None
+        return self.forge_manager.tick_monitor.get_mspt()
+
+    def _players(self):
+        """Online player count, 0 when the server is stopped, None if unknown"""
+        if not self.forge_manager.is_running():
+            return 0
+        try:
+            match = PLAYERS_LINE.search(self.forge_manager.send_rcon_command("list") or "")
+        except Exception:
+            return None
+        return int(match.group("online")) if match else None
+
+    def start(self):
+        if self.running or not self.config["enabled"]:
+            return
+        self.running = True
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.stopped,), daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started backup scheduler (every {self.config['interval']}s, "
+                         f"{self.config['bandwidth'] / 1024 / 1024:.0f} MB/s)")
+
+    def stop(self):
+        self.running = False
+        if self.stopped:
+            self.stopped.set()
+
+    def _run(self, stopped):
+        while not stopped.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                self.status = "failed"
+                self.logger.error(f"Scheduled backup failed: {e}")
+            stopped.wait(self.config["check_interval"])
+
+    def next_due(self):
+        backups = self.forge_manager.backups.list_backups()
+        return backups[0]["timestamp"] + self.config["interval"] if backups else time.time()
+
+    def check(self):
+        """Run a backup if one is due and the server is idle enough; returns its record"""
+        now = time.time()
+        due = self.next_due()
+        if now < due:
+            self.status, self.due_since = "idle", None
+            return None
+        self.due_since = self.due_since or now
+        players = self._players()
+        waited = now - self.due_since
+        if players != 0 and waited < self.config["idle_window"]:
+            self.status = "waiting_for_idle"
+            return None
+
+        self.status = "running"
+        throttle = self.make_throttle()
+        record = self.forge_manager.backups.create(
+            self.forge_manager.world_snapshot if self.forge_manager.is_running() else None,
+            throttle=throttle,
+            scheduled={"players": players, "waited_for_idle_seconds": round(waited, 1)}
+        )
+        self.status, self.due_since = "idle", None
+        self.last_run = record
+        stats = record["throttle"]
+        self.logger.info(f"Scheduled backup {record['name']} took {record['seconds']}s "
+                         f"(throttled {stats['throttled_seconds']}s, paused {stats['paused_seconds']}s for MSPT, "
+                         f"{players if players is not None else '?'} players online)")
+        return record
+
+    def get_status(self):
+        return {
+            "enabled": self.config["enabled"],
+            "status": self.status if self.config["enabled"] else "disabled",
+            "next_due": self.next_due(),
+            "due_since": self.due_since,
+            "bandwidth": self.config["bandwidth"],
+            "last_run": self.last_run
+        }
@@ -0,0 +1,183 @@
+import os
+import io
+import gzip
+import json
+import lzma
+import time
+import tarfile
+import logging
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+
+FORMATS = {"gzip": ".tar.gz", "xz": ".tar.xz"}
+
+# Refuse absolute paths and links out of the target where tarfile supports it
+EXTRACT_OPTIONS = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+
+
+def _compress_block(data, compression, level):
+    # Each block is a complete gzip member / xz stream; concatenated they are a normal .tar.gz / .tar.xz
+    if compression == "xz":
+        return lzma.compress(data, format=lzma.FORMAT_XZ, preset=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _decompress_block(data, compression):
+    if compression == "xz":
+        return lzma.decompress(data)
+    return gzip.decompress(data)
+
+
+def index_path(archive_path):
+    """Sidecar listing the compressed blocks of an archive"""
+    return Path(f"{archive_path}.blocks.json")
+
+
+class _BlockWriter(io.RawIOBase):
+    """File object for tarfile that compresses fixed-size blocks on a process pool
+
+    At most `window` blocks are in flight; finished blocks are written in order,
+    so memory stays around (window + 1) * block_size whatever the world size.
+    """
+
+    def __init__(self, output, pool, compression, level, block_size, window):
+        self.output = output
+        self.pool = pool
+        self.compression = compression
+        self.level = level
+        self.block_size = block_size
+        self.window = window
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.blocks = []
+        self.offset = 0
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block):
+        if len(self.pending) >= self.window:
+            self._drain_one()
+        self.pending.append((len(block), self.pool.submit(_compress_block, block, self.compression, self.level)))
+        self.size += len(block)
+
+    def _drain_one(self):
+        raw_size, future = self.pending.popleft()
+        compressed = future.result()
+        self.output.write(compressed)
+        self.blocks.append([self.offset, len(compressed), raw_size])
+        self.offset += len(compressed)
+
+    def finish(self):
+        if self.buffer:
+            self._submit(bytes(self.buffer))
+            self.buffer.clear()
+        while self.pending:
+            self._drain_one()
+
+
+class _BlockReader(io.RawIOBase):
+    """Sequential reader over blocks decompressed ahead on a process pool"""
+
+    def __init__(self, source, blocks, pool, compression, window):
+        self.source = source
+        self.blocks = iter(blocks)
+        self.pool = pool
+        self.compression = compression
+        self.window = window
+        self.pending = deque()
+        self.current = b""
+        self.position = 0
+        for _ in range(window):
+            self._prefetch()
+
+    def readable(self):
+        return True
+
+    def _prefetch(self):
+        block = next(self.blocks, None)
+        if block is not None:
+            offset, size, _ = block
+            self.source.seek(offset)
+            self.pending.append(self.pool.submit(_decompress_block, self.source.read(size), self.compression))
+
+    def readinto(self, target):
+        while self.position >= len(self.current):
+            if not self.pending:
+                return 0
+            self.current, self.position = self.pending.popleft().result(), 0
+            self._prefetch()
+        count = min(len(target), len(self.current) - self.position)
+        target[:count] = self.current[self.position:self.position + count]
+        self.position += count
+        return count
+
+
+def write_archive(source_dir, output_path, compression="gzip", level=6, block_size=4 * 1024 * 1024,
+                  workers=None, arcname=None):
+    """Stream source_dir into a block-compressed tar; returns archive statistics
+
+    Files are read once and compressed straight into the archive, so nothing is
+    staged on disk. The block index is written next to the archive so extraction
+    can decompress in parallel; without it the archive still opens with tar.
+    """
+    if compression not in FORMATS:
+        raise ValueError(f"Unsupported compression {compression}")
+    source_dir = Path(source_dir)
+    output_path = Path(output_path)
+    workers = workers or os.cpu_count() or 2
+    started = time.time()
+    tmp = output_path.with_name(output_path.name + ".tmp")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(tmp, "wb") as output:
+        writer = _BlockWriter(output, pool, compression, level, block_size, window=workers * 2)
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            tar.add(source_dir, arcname=arcname or source_dir.name,
+                    filter=lambda info: None if info.name.endswith("session.lock") else info)
+        writer.finish()
+    os.replace(tmp, output_path)
+
+    stats = {
+        "compression": compression,
+        "block_size": block_size,
+        "blocks": writer.blocks,
+        "bytes": writer.size,
+        "archive_bytes": writer.offset,
+        "workers": workers,
+        "seconds": round(time.time() - started, 3)
+    }
+    index_path(output_path).write_text(json.dumps(stats, separators=(",", ":")))
+    logging.getLogger(__name__).info(
+        f"Archived {source_dir} into {output_path.name}: {writer.size} -> {writer.offset} bytes "
+        f"in {len(writer.blocks)} blocks, {stats['seconds']}s on {workers} workers"
+    )
+    return stats
+
+
+def extract_archive(archive_path, target_dir, workers=None):
+    """Extract a block-compressed tar, decompressing blocks in parallel when the index exists"""
+    archive_path = Path(archive_path)
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        index = json.loads(index_path(archive_path).read_text())
+    except (OSError, ValueError):
+        with tarfile.open(archive_path, "r:*") as tar:
+            tar.extractall(target_dir, **EXTRACT_OPTIONS)
+        return
+
+    workers = workers or os.cpu_count() or 2
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(archive_path, "rb") as source:
+        reader = io.BufferedReader(_BlockReader(source, index["blocks"], pool, index["compression"], workers * 2))
+        with tarfile.open(fileobj=reader, mode="r|") as tar:
+            tar.extractall(target_dir, **EXTRACT_OPTIONS)
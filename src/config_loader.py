@@ -28,7 +28,9 @@ class ConfigLoader:
         """Load gateway configuration with defaults"""
         default_config = {
             "dashboard_port": 8080,
-            "minecraft_port": 25565
+            "minecraft_port": 25565,
+            "backend_hold_timeout": 180,
+            "control_socket": "gateway/control.sock"
         }
 
         config_path = "config/gateway_config.json"
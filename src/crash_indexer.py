@@ -0,0 +1,227 @@
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+
+EXCEPTION_LINE = re.compile(r"^(?:Caused by: )?(?P<type>[\w$]+(?:\.[\w$]+)+)(?::\s*(?P<message>.*))?$")
+FRAME_LINE = re.compile(
+    r"^\s+at (?:[\w.$/@-]+//)?(?P<method>[\w.$<>]+)\((?P<source>[^)]*)\)"
+    r"(?:\s*~?\[(?P<jar>[^\]]*)\])?(?:\s*\{(?P<transformers>[^}]*)\})?"
+)
+MIXIN_CONFIG = re.compile(r"pl:mixin:A(?:PP)?:(?P<config>[\w.-]+?)\.mixins\.json")
+SUSPECTED_MOD = re.compile(r"^\s+(?P<name>.+?) \((?P<modid>[\w-]+)\), Version:")
+
+# Jars that belong to the runtime rather than to a mod
+PLATFORM_JARS = re.compile(
+    r"^(server-|forge-|fmlcore-|fmlloader-|javafmllanguage-|lowcodelanguage-|mclanguage-|modlauncher-|"
+    r"eventbus-|securejarhandler-|bootstraplauncher-|mixin-|coremods-|datafixerupper-|brigadier-|authlib-|"
+    r"netty-|guava-|\?)"
+)
+SIGNATURE_FRAMES = 5
+
+
+def parse_crash_report(text):
+    """Extract description, root exception, frames and suspected mods from a crash report"""
+    lines = text.splitlines()
+    report = {"time": None, "description": None, "exception": None, "message": None,
+              "frames": [], "mods": []}
+
+    exceptions = []
+    current = None
+    for line in lines:
+        if line.startswith("Time: ") and report["time"] is None:
+            report["time"] = line[6:].strip()
+            continue
+        if line.startswith("Description: ") and report["description"] is None:
+            report["description"] = line[13:].strip()
+            continue
+        # Only the head of the report carries the primary stack trace
+        if line.startswith("A detailed walkthrough of the error"):
+            break
+
+        match = EXCEPTION_LINE.match(line.strip()) if not line.startswith("\t") else None
+        if match and (current is None or line.startswith("Caused by: ") or not current["frames"]):
+            current = {"type": match.group("type"), "message": match.group("message"), "frames": []}
+            exceptions.append(current)
+            continue
+
+        frame = FRAME_LINE.match(line)
+        if frame and current is not None:
+            current["frames"].append(_parse_frame(frame))
+
+    # The innermost cause is the most specific description of what went wrong
+    root = next((e for e in reversed(exceptions) if e["frames"]), exceptions[-1] if exceptions else None)
+    if root:
+        report["exception"] = root["type"]
+        report["message"] = root["message"]
+        report["frames"] = root["frames"]
+
+    mods = []
+    for exception in exceptions:
+        for frame in exception["frames"]:
+            for mod in frame["mods"]:
+                if mod not in mods:
+                    mods.append(mod)
+    for line in lines:
+        match = SUSPECTED_MOD.match(line)
+        if match and match.group("modid") not in mods:
+            mods.append(match.group("modid"))
+    report["mods"] = mods
+    return report
+
+
+def _parse_frame(match):
+    mods = []
+    jar = (match.group("jar") or "").split("%23")[0].split("!")[0]
+    if jar and not PLATFORM_JARS.match(jar):
+        mods.append(jar)
+    for config in MIXIN_CONFIG.finditer(match.group("transformers") or ""):
+        name = config.group("config").split(".")[0]
+        if name not in mods:
+            mods.append(name)
+    return {"method": match.group("method"), "source": match.group("source"), "mods": mods}
+
+
+def stack_signature(report):
+    """Hash the exception type and top frames with line numbers stripped"""
+    frames = report["frames"]
+    # Prefer frames attributed to a mod so the signature follows the culprit
+    mod_frames = [frame for frame in frames if frame["mods"]]
+    top = (mod_frames or frames)[:SIGNATURE_FRAMES]
+    parts = [report["exception"] or report["description"] or "unknown"]
+    parts.extend(frame["method"] for frame in top)
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class CrashIndexer:
+    """Incremental SQLite index of crash reports grouped by stack signature"""
+
+    def __init__(self, reports_dir="server/crash-reports", index_path="logs/crash_index.db"):
+        self.reports_dir = Path(reports_dir)
+        self.index_path = Path(index_path)
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    name TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime REAL,
+                    signature TEXT,
+                    time TEXT
+                );
+                CREATE TABLE IF NOT EXISTS signatures (
+                    signature TEXT PRIMARY KEY,
+                    exception TEXT,
+                    message TEXT,
+                    description TEXT,
+                    mods TEXT,
+                    frames TEXT,
+                    first_seen TEXT,
+                    last_seen TEXT,
+                    count INTEGER DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS reports_by_signature ON reports(signature);
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path, timeout=10)
+
+    def update(self):
+        """Index crash reports that are new or changed since the last run"""
+        if not self.reports_dir.exists():
+            return 0
+
+        with self.lock, self._connect() as db:
+            known = {name: (size, mtime) for name, size, mtime in db.execute("SELECT name, size, mtime FROM reports")}
+            indexed = 0
+            for path in sorted(self.reports_dir.glob("crash-*.txt")):
+                stat = path.stat()
+                if known.get(path.name) == (stat.st_size, stat.st_mtime):
+                    continue
+                try:
+                    report = parse_crash_report(path.read_text(encoding="utf-8", errors="replace"))
+                except OSError as e:
+                    self.logger.error(f"Failed to read crash report {path.name}: {e}")
+                    continue
+                self._store(db, path.name, stat, report, replacing=path.name in known)
+                indexed += 1
+
+        if indexed:
+            self.logger.info(f"Indexed {indexed} new crash report(s)")
+        return indexed
+
+    def _store(self, db, name, stat, report, replacing):
+        signature = stack_signature(report)
+        seen = report["time"] or name
+        if replacing:
+            old = db.execute("SELECT signature FROM reports WHERE name = ?", (name,)).fetchone()
+            if old:
+                db.execute("UPDATE signatures SET count = count - 1 WHERE signature = ?", old)
+
+        db.execute(
+            "INSERT OR REPLACE INTO reports (name, size, mtime, signature, time) VALUES (?, ?, ?, ?, ?)",
+            (name, stat.st_size, stat.st_mtime, signature, report["time"])
+        )
+        db.execute(
+            """INSERT INTO signatures (signature, exception, message, description, mods, frames,
+                                       first_seen, last_seen, count)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+               ON CONFLICT(signature) DO UPDATE SET
+                   count = count + 1,
+                   first_seen = MIN(first_seen, excluded.first_seen),
+                   last_seen = MAX(last_seen, excluded.last_seen)""",
+            (signature, report["exception"], report["message"], report["description"],
+             json.dumps(report["mods"]), json.dumps(report["frames"][:20]), seen, seen)
+        )
+
+    def get_signatures(self, limit=50):
+        """Get crash signatures ordered by number of occurrences"""
+        with self._connect() as db:
+            rows = db.execute(
+                """SELECT signature, exception, message, description, mods, first_seen, last_seen, count
+                   FROM signatures WHERE count > 0 ORDER BY count DESC, last_seen DESC LIMIT ?""",
+                (limit,)
+            ).fetchall()
+        return [{
+            "signature": row[0],
+            "exception": row[1],
+            "message": row[2],
+            "description": row[3],
+            "mods": json.loads(row[4]),
+            "first_seen": row[5],
+            "last_seen": row[6],
+            "count": row[7]
+        } for row in rows]
+
+    def get_signature(self, signature):
+        """Get full details and occurrences of one signature"""
+        with self._connect() as db:
+            row = db.execute(
+                """SELECT exception, message, description, mods, frames, first_seen, last_seen, count
+                   FROM signatures WHERE signature = ?""",
+                (signature,)
+            ).fetchone()
+            if not row:
+                return None
+            reports = db.execute(
+                "SELECT name, time FROM reports WHERE signature = ? ORDER BY time DESC",
+                (signature,)
+            ).fetchall()
+        return {
+            "signature": signature,
+            "exception": row[0],
+            "message": row[1],
+            "description": row[2],
+            "mods": json.loads(row[3]),
+            "frames": json.loads(row[4]),
+            "first_seen": row[5],
+            "last_seen": row[6],
+            "count": row[7],
+            "reports": [{"name": name, "time": time} for name, time in reports]
+        }
@@ -0,0 +1,191 @@
+import re
+import json
+import time
+import logging
+import threading
+import statistics
+from collections import deque
+from pathlib import Path
+
+
+PLAYERS_LINE = re.compile(r"There are (?P<online>\d+) of a max of (?P<max>\d+) players online")
+
+SETTINGS = {"view": "view-distance", "simulation": "simulation-distance"}
+
+
+class DistanceController:
+    """Adjusts view and simulation distance within bounds from rolling MSPT and player count
+
+    Distances step down when MSPT stays above mspt_high and step back up when it stays
+    below mspt_low; the band in between, the sustain count and the cooldown keep it from
+    oscillating. Changes are applied live when a command is configured for the setting
+    and are always merged into server.properties for the next start. A change that could
+    not be applied live cannot affect MSPT yet, so no further step is taken until the
+    server restarts with it.
+    """
+
+    def __init__(self, send_command, tick_monitor, properties, config, journal_path="logs/distance_adjustments.jsonl"):
+        self.send_command = send_command
+        self.tick_monitor = tick_monitor
+        self.properties = properties
+        self.config = config
+        self.journal_path = Path(journal_path)
+        self.logger = logging.getLogger(__name__)
+        self.adjustments = deque(maxlen=500)
+        self.high_streak = 0
+        self.low_streak = 0
+        self.last_change = 0.0
+        self.last_check = None
+        self.awaiting_restart = None
+        self.running = False
+        self.stopped = None
+        self.thread = None
+
+        current = properties.load()
+        self.distances = {
+            "view": int(current.get("view-distance", config["max_view"])),
+            "simulation": int(current.get("simulation-distance", config["max_simulation"]))
+        }
+        self._load_journal()
+
+    def _load_journal(self):
+        try:
+            with open(self.journal_path) as f:
+                for line in f:
+                    if line.strip():
+                        self.adjustments.append(json.loads(line))
+        except (OSError, ValueError):
+            return
+        # Resume from the distances the controller last settled on
+        for adjustment in self.adjustments:
+            self.distances[adjustment["setting"]] = adjustment["to"]
+
+    def startup_properties(self):
+        """Distances to write into server.properties before the server starts"""
+        if not self.config["enabled"]:
+            return {}
+        self.awaiting_restart = None
+        return {SETTINGS[name]: value for name, value in self.distances.items()}
+
+    def start(self):
+        if self.running or not self.config["enabled"]:
+            return
+        self.running = True
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.stopped,), daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started distance controller (view {self.distances['view']}, "
+                         f"simulation {self.distances['simulation']})")
+
+    def stop(self):
+        self.running = False
+        if self.stopped:
+            self.stopped.set()
+
+    def _run(self, stopped):
+        while not stopped.wait(self.config["interval"]):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.debug(f"Distance check failed: {e}")
+
+    def _players(self):
+        match = PLAYERS_LINE.search(self.send_command("list") or "")
+        return int(match.group("online")) if match else None
+
+    def _mspt(self, since, until=None):
+        values = [row[1] for row in self.tick_monitor.get_history("overall", "mspt", "1s", since=since)
+                  if until is None or row[0] < until]
+        if len(values) < 3:
+            return None, None
+        return statistics.mean(values), statistics.pstdev(values)
+
+    def check(self):
+        """Run one control step; returns the adjustment made, if any"""
+        now = time.time()
+        mspt, jitter = self._mspt(now - self.config["window"])
+        if mspt is None:
+            return None
+        players = self._players()
+        self.last_check = {"timestamp": now, "mspt": round(mspt, 2), "jitter": round(jitter, 2), "players": players}
+
+        if mspt >= self.config["mspt_high"]:
+            self.high_streak, self.low_streak = self.high_streak + 1, 0
+        elif mspt <= self.config["mspt_low"]:
+            self.high_streak, self.low_streak = 0, self.low_streak + 1
+        else:
+            self.high_streak = self.low_streak = 0
+
+        if self.awaiting_restart or now - self.last_change < self.config["cooldown"]:
+            return None
+
+        view, simulation = self.distances["view"], self.distances["simulation"]
+        step = self.config["step"]
+        view_ceiling = self.config["max_view"]
+        if players and self.config["players_per_step"]:
+            view_ceiling = max(self.config["min_view"], view_ceiling - players // self.config["players_per_step"] * step)
+
+        if self.high_streak >= self.config["sustain"]:
+            # Simulation distance drives entity and block ticking, so it goes first
+            if simulation > self.config["min_simulation"]:
+                return self._apply("simulation", max(self.config["min_simulation"], simulation - step), "high_mspt")
+            if view > self.config["min_view"]:
+                return self._apply("view", max(self.config["min_view"], view - step), "high_mspt")
+        elif view > view_ceiling:
+            return self._apply("view", max(view_ceiling, view - step), "players")
+        elif self.low_streak >= self.config["sustain"] and players:
+            if view < view_ceiling:
+                return self._apply("view", min(view_ceiling, view + step), "low_mspt")
+            if simulation < min(self.config["max_simulation"], view):
+                return self._apply("simulation", min(self.config["max_simulation"], view, simulation + step), "low_mspt")
+        return None
+
+    def _apply(self, setting, value, reason):
+        previous = self.distances[setting]
+        command = self.config.get(f"{setting}_command")
+        applied = "next_start"
+        if command:
+            try:
+                self.send_command(command.format(value=value))
+                applied = "live"
+            except Exception as e:
+                self.logger.warning(f"Could not apply {setting} distance live: {e}")
+        self.properties.update({SETTINGS[setting]: value})
+        if applied == "next_start":
+            self.awaiting_restart = setting
+
+        self.distances[setting] = value
+        self.last_change = time.time()
+        self.high_streak = self.low_streak = 0
+        adjustment = dict(self.last_check, setting=setting, to=value, reason=reason, applied=applied, **{"from": previous})
+        self.adjustments.append(adjustment)
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(adjustment) + "\n")
+        self.logger.info(f"{SETTINGS[setting]} {previous} -> {value} ({reason}, mspt {adjustment['mspt']}, "
+                         f"players {adjustment['players']}, {applied})")
+        return adjustment
+
+    def get_adjustments(self, limit=50):
+        """Recent adjustments with the mean and jitter of MSPT in the window that followed each"""
+        adjustments = list(self.adjustments)[-limit:]
+        result = []
+        for adjustment in adjustments:
+            after, after_jitter = self._mspt(adjustment["timestamp"], adjustment["timestamp"] + self.config["window"])
+            result.append(dict(
+                adjustment,
+                mspt_after=round(after, 2) if after is not None else None,
+                jitter_after=round(after_jitter, 2) if after_jitter is not None else None
+            ))
+        return result
+
+    def get_status(self):
+        return {
+            "enabled": self.config["enabled"],
+            "running": self.running,
+            "view_distance": self.distances["view"],
+            "simulation_distance": self.distances["simulation"],
+            "awaiting_restart": self.awaiting_restart,
+            "last_check": self.last_check,
+            "adjustments": self.get_adjustments(20)
+        }
@@ -4,28 +4,103 @@ import os
 import time
 import json
 import logging
-import requests
 import re
 from threading import Thread
 from pathlib import Path
-import shutil
+
+from resource_sampler import ResourceSampler
+from rcon_client import RconClient, RconError
+from tick_monitor import TickMonitor
+from crash_indexer import CrashIndexer
+from log_store import SegmentedLogHandler
+from artifact_cache import ArtifactCache, print_progress
+from server_bundle import ServerBundle
+from launch_manifest import LaunchManifest
+from mod_sync import ModSync
+from mod_index import ModIndex
+from startup_profiler import StartupProfiler, save_profile
+from server_properties import ServerProperties
+from distance_controller import DistanceController
+from pregen_scheduler import PregenScheduler
+from world_snapshot import WorldSnapshot
+from backup_catalog import BackupCatalog
+from backup_scheduler import BackupScheduler
+from map_renderer import MapRenderer
 
 class ForgeManager:
     def __init__(self, config_path="config/server_config.json"):
         self.config_path = config_path
         self.process = None
-        self.forge_jar = None
+        self.launch = None
         self.installer_jar = None
+        self.rcon = None
+        self.stop_requested = False
+        self.output_listeners = []
         self.load_config()
         self.setup_logging()
         self.ensure_directories()
+        self.resource_sampler = ResourceSampler(
+            interval=self.config["monitoring"]["sample_interval"],
+            children_refresh=self.config["monitoring"]["process_scan_interval"]
+        )
+        self.tick_monitor = TickMonitor(
+            self.send_rcon_command,
+            interval=self.config["monitoring"]["tps_interval"],
+            mspt_warning=self.config["monitoring"]["mspt_warning"],
+            lag_spike_ms=self.config["monitoring"]["lag_spike_ms"]
+        )
+        self.add_output_listener(self.tick_monitor.handle_console_line)
+        self.server_properties = ServerProperties("server/server.properties")
+        self.distance_controller = DistanceController(
+            self.send_rcon_command,
+            self.tick_monitor,
+            self.server_properties,
+            self.config["adaptive_distance"]
+        )
+        self.pregen = PregenScheduler(self)
+        self.world_snapshot = WorldSnapshot(self.send_rcon_command)
+        self.backups = BackupCatalog(
+            store_dir=self.config["backups"]["store_dir"],
+            retention=self.config["backups"]["retention"],
+            verify_interval=self.config["backups"]["verify_interval"]
+        )
+        self.backup_scheduler = BackupScheduler(self)
+        self.backups.throttle_factory = self.backup_scheduler.make_throttle
+        self.map_renderer = MapRenderer(
+            output_dir=self.config["map"]["output_dir"],
+            dimensions=self.config["map"]["dimensions"],
+            palette=self.config["map"]["palette"],
+            interval=self.config["map"]["interval"],
+            workers=self.config["map"]["workers"]
+        )
+        self.crash_indexer = CrashIndexer()
+        downloads = self.config["downloads"]
+        self.artifact_cache = ArtifactCache(
+            cache_dir=downloads["cache_dir"],
+            chunk_size=downloads["chunk_size"],
+            parallel_segments=downloads["parallel_segments"],
+            segment_threshold=downloads["segment_threshold"]
+        )
+        self.launch_manifest = LaunchManifest("server")
+        self.server_bundle = ServerBundle(
+            bundle_dir=self.config["bundles"]["dir"],
+            workers=self.config["bundles"]["workers"]
+        )
+        self.mod_sync = ModSync(
+            "mods",
+            "server/mods",
+            workers=self.config["mod_sync"]["workers"],
+            link=self.config["mod_sync"]["link"]
+        )
+        self.mod_sync_report = None
+        self.mod_index = ModIndex("server/mods")
     
     def setup_logging(self):
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler('logs/forge.log'),
+                SegmentedLogHandler('logs/forge.log'),
                 logging.StreamHandler()
             ]
         )
@@ -47,6 +122,102 @@ class ForgeManager:
                 "online-mode": False,
                 "enable-command-block": True,
                 "allow-flight": True
+            },
+            "monitoring": {
+                "sample_interval": 1.0,
+                "process_scan_interval": 10.0,
+                "tps_interval": 10.0,
+                "mspt_warning": 50.0,
+                "lag_spike_ms": 2000
+            },
+            "supervisor": {
+                "auto_restart": True,
+                "backoff_initial": 5,
+                "backoff_multiplier": 2,
+                "backoff_max": 300,
+                "crash_loop_window": 900,
+                "crash_loop_threshold": 5,
+                "stable_after": 600,
+                "stop_timeout": 60
+            },
+            "downloads": {
+                "cache_dir": "cache/artifacts",
+                "chunk_size": 1048576,
+                "parallel_segments": 4,
+                "segment_threshold": 33554432
+            },
+            "bundles": {
+                "enabled": True,
+                "dir": "cache/bundles",
+                "workers": 0
+            },
+            "mod_sync": {
+                "workers": 8,
+                "link": True,
+                "check_dependencies": True
+            },
+            "adaptive_distance": {
+                "enabled": False,
+                "interval": 30,
+                "window": 300,
+                "mspt_high": 45.0,
+                "mspt_low": 30.0,
+                "sustain": 2,
+                "cooldown": 180,
+                "step": 1,
+                "min_view": 4,
+                "max_view": 12,
+                "min_simulation": 4,
+                "max_simulation": 10,
+                "players_per_step": 5,
+                "view_command": "",
+                "simulation_command": ""
+            },
+            "pregeneration": {
+                "enabled": False,
+                "center": [0, 0],
+                "radius": 2000,
+                "dimensions": ["minecraft:overworld"],
+                "tile_chunks": 8,
+                "start_commands": ["execute in {dimension} run forceload add {min_x} {min_z} {max_x} {max_z}"],
+                "finish_commands": ["execute in {dimension} run forceload remove {min_x} {min_z} {max_x} {max_z}"],
+                "done_pattern": "",
+                "tile_seconds": 10,
+                "check_interval": 15,
+                "allow_with_players": False,
+                "mspt_headroom": 35.0
+            },
+            "backups": {
+                "store_dir": "backups/store",
+                "retention": {"last": 3, "hourly": 24, "daily": 7, "weekly": 4},
+                "verify_interval": 3600,
+                "schedule": {
+                    "enabled": False,
+                    "interval": 3600,
+                    "idle_window": 1800,
+                    "check_interval": 60,
+                    "bandwidth": 33554432,
+                    "mspt_backoff": 40.0,
+                    "mspt_pause": 50.0
+                }
+            },
+            "map": {
+                "enabled": False,
+                "output_dir": "cache/map",
+                "interval": 3600,
+                "dimensions": ["minecraft:overworld"],
+                "workers": 0,
+                "palette": {}
+            },
+            "dashboard": {
+                "cache_ttl": {
+                    "server_status": 5,
+                    "server_resources": 2,
+                    "server_tps": 5,
+                    "gateway_stats": 5,
+                    "world_info": 30,
+                    "players": 10
+                }
             }
         }
         
@@ -99,20 +270,11 @@ class ForgeManager:
         self.logger.info(f"Downloading Forge installer from: {installer_url}")
         
         try:
-            response = requests.get(installer_url, stream=True, timeout=60)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
-            
-            with open(self.installer_jar, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        if total_size > 0:
-                            percent = (downloaded_size / total_size) * 100
-                            print(f"Download progress: {percent:.1f}%", end='\r')
+            self.artifact_cache.fetch(
+                installer_url,
+                destination=self.installer_jar,
+                progress=print_progress()
+            )
             
             print()
             file_size = os.path.getsize(self.installer_jar)
@@ -123,76 +285,34 @@ class ForgeManager:
             self.logger.error(f"Download failed: {e}")
             return False
     
-    def find_forge_jar(self):
-        """Find the forge jar file in various possible locations"""
-        server_dir = Path("server")
-        
-        # Look for forge jar files (new format)
-        possible_patterns = [
-            "forge-*.jar",
-            "libraries/net/minecraftforge/forge/*/forge-*.jar",
-            "libraries/net/minecraftforge/forge/*/unix_args.txt"
-        ]
-        
-        for pattern in possible_patterns:
-            for file_path in server_dir.glob(pattern):
-                if "installer" not in str(file_path) and "universal" not in str(file_path):
-                    self.logger.info(f"Found potential forge file: {file_path}")
-                    # Check if it's a reasonable size (> 1MB for jar, any size for args file)
-                    if file_path.suffix == '.jar':
-                        if file_path.stat().st_size > 1000000:
-                            return str(file_path)
-                    else:
-                        return self._create_launch_script()  # Handle new forge format
-        
-        # If no jar found, check for run scripts
-        if (server_dir / "run.sh").exists() or (server_dir / "run.bat").exists():
-            self.logger.info("Found run scripts, using new forge format")
-            return self._create_launch_script()
-        
-        return None
+    def resolve_launcher(self):
+        """Get the launch manifest, resolving it from the installed tree when stale"""
+        self.launch = self.launch_manifest.get(self.config)
+        return self.launch
     
-    def _create_launch_script(self):
-        """Create a launch script for the new forge format"""
-        self.logger.info("Creating launch script for new Forge format")
-        
-        # The new forge uses a different launch mechanism
-        # We'll create a simple Python launcher
-        launch_script = """
-import subprocess
-import sys
-import os
+    def _forge_args_file(self):
+        """Path of the JVM args file the installer writes for the configured versions"""
+        full_version = f"{self.config['minecraft_version']}-{self.config['forge_version']}"
+        return Path("server/libraries/net/minecraftforge/forge") / full_version / "unix_args.txt"
 
-def main():
-    # Change to server directory
-    os.chdir("server")
-    
-    # Use the run script if it exists
-    if os.path.exists("run.sh"):
-        # Make it executable
-        os.chmod("run.sh", 0o755)
-        # Run with java directly using the args from run.sh
-        cmd = ["java", "@user_jvm_args.txt", "@libraries/net/minecraftforge/forge/1.20.1-47.2.0/unix_args.txt", "nogui"]
-    else:
-        # Fallback to direct java command
-        cmd = ["java", "-Xmx4G", "-Xms2G", "-jar", "libraries/net/minecraftforge/forge/1.20.1-47.2.0/forge-1.20.1-47.2.0.jar", "nogui"]
-    
-    try:
-        subprocess.run(cmd)
-    except KeyboardInterrupt:
-        print("Server stopped")
+    def _restore_server_bundle(self):
+        """Restore a prebuilt server tree instead of running the installer"""
+        if not self.config["bundles"]["enabled"] or self._forge_args_file().exists():
+            return False
+        mc_version = self.config["minecraft_version"]
+        forge_version = self.config["forge_version"]
+        return self.server_bundle.restore("server", mc_version, forge_version) is not None
 
-if __name__ == "__main__":
-    main()
-"""
-        
-        with open("server/launch_forge.py", "w") as f:
-            f.write(launch_script)
-        
-        return "launch_forge.py"
-    
     def install_forge_server(self):
         """Install Forge server using the installer"""
+        # An installed tree, or one restored from a bundle, needs no installer run
+        self._restore_server_bundle()
+        if self._forge_args_file().exists() and self.resolve_launcher():
+            self.logger.info(f"Forge {self.config['forge_version']} already installed")
+            return True
+
+        install_started = time.time()
+
         # Download installer if needed
         if not os.path.exists("server/forge-installer.jar"):
             if not self.download_forge_installer():
@@ -218,16 +338,22 @@ if __name__ == "__main__":
                 files = list(Path("server").iterdir())
                 self.logger.info(f"Files in server directory: {[f.name for f in files]}")
                 
-                # Look for the forge jar or launch files
-                self.forge_jar = self.find_forge_jar()
-                
-                if self.forge_jar:
-                    self.logger.info(f"Using forge launcher: {self.forge_jar}")
+                # Work out how to launch what the installer produced
+                if self.resolve_launcher():
+                    self.logger.info(f"Using forge launcher: {self.launch['launcher']}")
+                    install_seconds = time.time() - install_started
+                    self.logger.info(f"Cold start: Forge installer took {install_seconds:.1f}s")
+                    if self.config["bundles"]["enabled"]:
+                        self.server_bundle.create(
+                            "server",
+                            self.config["minecraft_version"],
+                            self.config["forge_version"],
+                            install_seconds=install_seconds
+                        )
                     return True
                 else:
                     self.logger.error("Could not find forge server files after installation")
-                    # Try to manually find and set up forge
-                    return self._manual_forge_setup()
+                    return False
             else:
                 self.logger.error(f"Installer failed: {result.stderr}")
                 return False
@@ -239,117 +365,97 @@ if __name__ == "__main__":
             self.logger.error(f"Installation error: {e}")
             return False
     
-    def _manual_forge_setup(self):
-        """Manual setup when automatic detection fails"""
-        self.logger.info("Attempting manual forge setup...")
-        
-        # Check what files we have
-        server_files = list(Path("server").iterdir())
-        self.logger.info(f"Available files: {[f.name for f in server_files]}")
-        
-        # If we have run.sh, use that
-        if (Path("server") / "run.sh").exists():
-            self.logger.info("Using run.sh for server launch")
-            self.forge_jar = "run.sh"
-            return True
-        
-        # If we have libraries directory, create a launch script
-        if (Path("server") / "libraries").exists():
-            self.logger.info("Found libraries directory, creating custom launcher")
-            self.forge_jar = self._create_custom_launcher()
-            return True
-        
-        return False
-    
-    def _create_custom_launcher(self):
-        """Create a custom launcher script"""
-        launch_content = """#!/bin/bash
-cd "$(dirname "$0")"
-java -Xmx4G -Xms2G @user_jvm_args.txt @libraries/net/minecraftforge/forge/1.20.1-47.2.0/unix_args.txt "$@"
-"""
-        
-        launch_script = Path("server") / "start_server.sh"
-        with open(launch_script, "w") as f:
-            f.write(launch_content)
-        
-        # Make executable
-        launch_script.chmod(0o755)
-        
-        return "start_server.sh"
-    
     def setup_server_properties(self):
-        """Create server.properties file"""
-        properties = self.config["server_properties"]
+        """Merge the configured properties into server.properties"""
+        properties = {"server-port": 25565}
+        properties.update(self.config["server_properties"])
+        # Distances picked by the adaptive controller win over the static config
+        properties.update(self.distance_controller.startup_properties())
         
-        with open("server/server.properties", "w") as f:
-            f.write("# Minecraft server properties\\n")
-            f.write("server-port=25565\\n")
-            for key, value in properties.items():
-                f.write(f"{key}={value}\\n")
+        changed = self.server_properties.update(properties)
+        for key, (old, new) in changed.items():
+            self.logger.info(f"server.properties: {key} {old} -> {new}")
         
         # Create eula.txt
         with open("server/eula.txt", "w") as f:
-            f.write("eula=true\\n")
+            f.write("eula=true\n")
         
         self.logger.info("Server properties configured")
     
     def copy_mods(self):
-        """Copy mods from mods/ directory to server/mods/"""
-        mods_source = Path("mods")
-        mods_dest = Path("server/mods")
-        
-        if mods_source.exists() and any(mods_source.iterdir()):
-            self.logger.info("Copying mods to server...")
-            for mod_file in mods_source.glob("*.jar"):
-                shutil.copy2(mod_file, mods_dest)
-                self.logger.info(f"Copied mod: {mod_file.name}")
+        """Sync mods from mods/ directory to server/mods/, touching only changed jars"""
+        self.mod_sync_report = self.mod_sync.sync()
+        return self.mod_sync_report
+    
+    def check_mods(self):
+        """Check server mods for missing, conflicting and client-only mods before launching"""
+        problems = self.mod_index.check(self.config["minecraft_version"], self.config["forge_version"])
+        for problem in problems:
+            log = self.logger.error if problem["severity"] == "error" else self.logger.warning
+            log(f"Mod check: {problem['file']}: {problem['message']}")
+        return problems
+    
+    def profile_startup(self, log_path="server/logs/debug.log"):
+        """Attribute the last startup's time to mods and save it under logs/startup_profiles/"""
+        if not os.path.exists(log_path):
+            return None
+        profiler = StartupProfiler(
+            packages=self.mod_index.get_packages(),
+            mod_ids=[mod["mod_id"] for mod in self.mod_index.get_mods()]
+        )
+        profile = profiler.profile(log_path)
+        if not profile:
+            return None
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(profile["started_at"]))
+        path = save_profile(profile, f"logs/startup_profiles/startup-{stamp}.json")
+        slowest = ", ".join(f"{mod_id} {entry['total']:.1f}s" for mod_id, entry in list(profile["mods"].items())[:5])
+        self.logger.info(f"Startup took {profile['total_seconds']:.1f}s; slowest mods: {slowest} ({path})")
+        return profile
     
     def start_server(self):
         """Start the Forge server"""
-        if not self.forge_jar:
-            if not self.install_forge_server():
-                return False
+        # The cached manifest is validated with a few stats instead of globbing the tree
+        launch = self.launch_manifest.load(self.config)
+        if launch:
+            self.launch = launch
+        elif not self.install_forge_server():
+            return False
         
+        self.stop_requested = False
+        self.index_crash_reports()
         self.setup_server_properties()
         self.copy_mods()
+        errors = [problem for problem in self.check_mods() if problem["severity"] == "error"]
+        if errors and self.config["mod_sync"]["check_dependencies"]:
+            self.logger.error(f"Not starting: {len(errors)} mod problems would stop Forge from loading")
+            return False
         
-        self.logger.info(f"Starting Forge server using: {self.forge_jar}")
+        self.logger.info(f"Starting Forge server ({self.launch['mode']}) using: {self.launch['launcher']}")
         
         try:
-            if self.forge_jar.endswith('.py'):
-                # Python launcher
-                self.process = subprocess.Popen(
-                    [sys.executable, self.forge_jar],
-                    cwd="server",
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
-            elif self.forge_jar.endswith('.sh'):
-                # Shell script
-                self.process = subprocess.Popen(
-                    [f"./{self.forge_jar}", "nogui"],
-                    cwd="server",
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
-            else:
-                # Direct Java (fallback)
-                self.process = subprocess.Popen(
-                    ["java", "-Xmx4G", "-Xms2G", "-jar", self.forge_jar, "nogui"],
-                    cwd="server",
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
+            self.process = subprocess.Popen(
+                self.launch["command"],
+                cwd=self.launch["cwd"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                bufsize=1
+            )
             
             # Start output monitoring
             output_thread = Thread(target=self._monitor_output, daemon=True)
             output_thread.start()
+
+            # Start resource sampling of the server process tree
+            self.resource_sampler.start(self.process.pid)
+            self.tick_monitor.start()
+            self.distance_controller.start()
+            self.pregen.start()
+            self.backups.start()
+            self.backup_scheduler.start()
+            if self.config["map"]["enabled"]:
+                self.map_renderer.start()
             
             self.logger.info("Forge server started successfully")
             return True
@@ -358,29 +464,116 @@ java -Xmx4G -Xms2G @user_jvm_args.txt @libraries/net/minecraftforge/forge/1.20.1
             self.logger.error(f"Failed to start server: {e}")
             return False
     
+    def add_output_listener(self, callback):
+        """Register a callback receiving each line of server console output"""
+        self.output_listeners.append(callback)
+
     def _monitor_output(self):
         """Monitor server output"""
         for line in iter(self.process.stdout.readline, ''):
             if line.strip():
                 print(f"[Minecraft] {line.strip()}")
+                for callback in self.output_listeners:
+                    try:
+                        callback(line.strip())
+                    except Exception as e:
+                        self.logger.error(f"Output listener failed: {e}")
+
+    def send_rcon_command(self, command):
+        """Send a command to the server over RCON and return its response"""
+        properties = self.config["server_properties"]
+        if not properties.get("enable-rcon"):
+            raise RconError("RCON is disabled in server_properties")
+
+        if self.rcon is None:
+            self.rcon = RconClient(
+                host="localhost",
+                port=int(properties.get("rcon.port", 25575)),
+                password=str(properties.get("rcon.password", ""))
+            )
+        return self.rcon.command(command)
     
-    def stop_server(self):
-        """Stop the server"""
+    def send_console_command(self, command):
+        """Write a command to the server console over stdin"""
+        if not self.process or not self.process.stdin or self.process.poll() is not None:
+            return False
+        try:
+            self.process.stdin.write(command + "\n")
+            self.process.stdin.flush()
+            return True
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to write to server console: {e}")
+            return False
+
+    def _request_graceful_stop(self):
+        """Ask the server to save and stop, over RCON if possible, else stdin"""
+        try:
+            self.send_rcon_command("save-all")
+            self.send_rcon_command("stop")
+            return True
+        except RconError as e:
+            self.logger.info(f"RCON unavailable ({e}), stopping via console")
+        return self.send_console_command("save-all") and self.send_console_command("stop")
+
+    def stop_server(self, timeout=None):
+        """Stop the server gracefully, escalating to SIGTERM and SIGKILL"""
+        self.stop_requested = True
         if self.process and self.process.poll() is None:
+            timeout = timeout or self.config["supervisor"]["stop_timeout"]
             self.logger.info("Stopping server...")
+            self.resource_sampler.stop()
+            self.tick_monitor.stop()
+            self.distance_controller.stop()
+            self.pregen.stop()
+            self.backups.stop()
+            self.backup_scheduler.stop()
+            self.map_renderer.stop()
+
+            if self._request_graceful_stop():
+                try:
+                    self.process.wait(timeout=timeout)
+                    self.logger.info("Server stopped gracefully")
+                    return
+                except subprocess.TimeoutExpired:
+                    self.logger.warning(f"Server did not stop within {timeout}s, terminating")
+
             self.process.terminate()
             try:
                 self.process.wait(timeout=30)
-            except:
+            except subprocess.TimeoutExpired:
+                self.logger.warning("Server did not terminate, killing")
                 self.process.kill()
+                self.process.wait()
     
+    def backup_world(self):
+        """Back up the world, pausing saves for a snapshot while the server runs"""
+        return self.backups.create(self.world_snapshot if self.is_running() else None)
+
+    def index_crash_reports(self):
+        """Add any new crash reports to the crash index"""
+        try:
+            return self.crash_indexer.update()
+        except Exception as e:
+            self.logger.error(f"Failed to index crash reports: {e}")
+            return 0
+
     def is_running(self):
         return self.process and self.process.poll() is None
     
     def get_server_info(self):
         return {
             "running": self.is_running(),
-            "version": self.config["minecraft_version"],
+            "minecraft_version": self.config["minecraft_version"],
             "forge_version": self.config["forge_version"],
-            "launcher": self.forge_jar
+            "mods_count": len(self.mod_index.scan()),
+            "launcher": self.launch["launcher"] if self.launch else None
         }
+
+    def get_resource_usage(self):
+        """Get the latest resource sample of the server process tree plus disk usage"""
+        usage = self.resource_sampler.get_current()
+        disk = psutil.disk_usage("server")
+        usage["disk_free_bytes"] = disk.free
+        usage["disk_total_bytes"] = disk.total
+        usage["memory_max"] = self.config["memory"]["max"]
+        return usage
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import socket
+import logging
+import threading
+import subprocess
+from collections import deque
+
+from config_loader import ConfigLoader
+
+
+# Control operations and the GatewayManager methods they call
+OPERATIONS = {
+    "create": "create_connection",
+    "approve": "approve_connection",
+    "forward": "start_port_forwarding",
+    "revoke": "revoke_connection",
+    "get": "get_connection_info",
+    "url": "get_connection_url",
+    "list": "get_all_connections",
+    "stats": "get_connection_stats",
+    "backend_state": "set_backend_state"
+}
+
+FEED_SIZE = 1000
+FEED_PING = 30
+
+
+class GatewayControlError(Exception):
+    pass
+
+
+class GatewayControlServer:
+    """Line-delimited JSON control API for a GatewayManager on a Unix socket
+
+    A request is {"op": ..., "args": [...]} and is answered with {"ok": true, "result": ...}
+    or {"ok": false, "error": ...}. {"op": "watch", "since": seq, "epoch": epoch} turns the
+    connection into a change feed of {"epoch", "seq", "event", "connection"} lines, with a
+    "ping" every FEED_PING seconds. Sequence numbers are only meaningful within one epoch
+    (one data plane process); a watcher that missed events or comes from another epoch gets
+    a "reset" and should re-list.
+    """
+
+    def __init__(self, gateway, socket_path):
+        self.gateway = gateway
+        self.socket_path = socket_path
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition()
+        self.events = deque(maxlen=FEED_SIZE)
+        self.seq = 0
+        self.epoch = uuid.uuid4().hex
+        self.listener = None
+        self.running = False
+        gateway.add_change_listener(self._record)
+
+    def _record(self, event, connection):
+        with self.changed:
+            self.seq += 1
+            self.events.append({"seq": self.seq, "event": event, "connection": dict(connection)})
+            self.changed.notify_all()
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.socket_path)
+                raise RuntimeError(f"Another gateway data plane is listening on {self.socket_path}")
+            except ConnectionRefusedError:
+                os.unlink(self.socket_path)  # left behind by a data plane that died
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.listener.listen(16)
+        self.running = True
+        self.logger.info(f"Gateway control API listening on {self.socket_path}")
+        while self.running:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(client,), daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        if self.listener:
+            self.listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _handle(self, client):
+        try:
+            with client, client.makefile("rwb") as stream:
+                for line in stream:
+                    try:
+                        request = json.loads(line)
+                        if request.get("op") == "watch":
+                            self._watch(stream, request.get("since"), request.get("epoch"))
+                            return
+                        response = {"ok": True, "result": self._dispatch(request)}
+                    except Exception as e:
+                        response = {"ok": False, "error": str(e)}
+                    stream.write(json.dumps(response, default=str).encode() + b"\n")
+                    stream.flush()
+        except OSError as e:
+            self.logger.debug(f"Control client went away: {e}")
+
+    def _dispatch(self, request):
+        method = OPERATIONS.get(request.get("op"))
+        if not method:
+            raise GatewayControlError(f"Unknown operation {request.get('op')}")
+        with self.lock:
+            return getattr(self.gateway, method)(*request.get("args", []))
+
+    def _watch(self, stream, since, epoch):
+        with self.changed:
+            stale = since is not None and epoch != self.epoch
+            since = self.seq if since is None or stale else since
+        if stale:
+            # Numbered by another data plane process, so it says nothing about what was missed
+            self._send(stream, [{"seq": since, "event": "reset", "connection": None}])
+        while self.running:
+            with self.changed:
+                self.changed.wait_for(lambda: self.seq != since, timeout=FEED_PING)
+                if self.seq == since:
+                    lines = [{"seq": since, "event": "ping", "connection": None}]
+                elif since > self.seq or self.events[0]["seq"] > since + 1:
+                    # The data plane restarted or the watcher fell too far behind
+                    lines = [{"seq": self.seq, "event": "reset", "connection": None}]
+                else:
+                    lines = [event for event in self.events if event["seq"] > since]
+            self._send(stream, lines)
+            since = lines[-1]["seq"]
+
+    def _send(self, stream, lines):
+        for line in lines:
+            stream.write(json.dumps(dict(line, epoch=self.epoch), default=str).encode() + b"\n")
+        stream.flush()
+
+
+class GatewayClient:
+    """Drop-in for GatewayManager in the dashboard process, backed by the data plane's control socket
+
+    Every call is one request on a fresh connection, so a restarted data plane is
+    picked up without reconnect logic. Change listeners are fed from a background
+    watch connection, which also re-sends the last backend state whenever it
+    reconnects so a restarted data plane learns it again.
+    """
+
+    def __init__(self, socket_path=None, timeout=5.0):
+        self.config = ConfigLoader.load_gateway_config()
+        self.socket_path = socket_path or self.config["control_socket"]
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self.change_listeners = []
+        self.backend_state = None
+        self.watcher = None
+
+    def call(self, op, *args):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.settimeout(self.timeout)
+                conn.connect(self.socket_path)
+                conn.sendall(json.dumps({"op": op, "args": args}, default=str).encode() + b"\n")
+                with conn.makefile("rb") as stream:
+                    line = stream.readline()
+        except OSError as e:
+            raise GatewayControlError(f"Gateway data plane unreachable: {e}")
+        if not line:
+            raise GatewayControlError("Gateway data plane closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise GatewayControlError(response["error"])
+        return response["result"]
+
+    def is_available(self):
+        try:
+            self.call("stats")
+            return True
+        except GatewayControlError:
+            return False
+
+    def create_connection(self, user_info=None):
+        return self.call("create", user_info)
+
+    def approve_connection(self, connection_code):
+        return self.call("approve", connection_code)
+
+    def start_port_forwarding(self, connection_code):
+        return self.call("forward", connection_code)
+
+    def revoke_connection(self, connection_code):
+        return self.call("revoke", connection_code)
+
+    def get_connection_info(self, connection_code):
+        return self.call("get", connection_code)
+
+    def get_connection_url(self, connection_code):
+        return self.call("url", connection_code)
+
+    def get_all_connections(self):
+        return self.call("list")
+
+    def get_connection_stats(self):
+        return self.call("stats")
+
+    def set_backend_state(self, state, details=None):
+        self.backend_state = (state, details)
+        self.call("backend_state", state, details)
+
+    def start_cleanup_thread(self):
+        """Expired connections are cleaned up inside the data plane"""
+
+    def add_change_listener(self, callback):
+        """Register a callback receiving (event, connection); "reset" means re-list everything"""
+        self.change_listeners.append(callback)
+        if not self.watcher:
+            self.watcher = threading.Thread(target=self._watch, daemon=True)
+            self.watcher.start()
+
+    def _watch(self):
+        since = None
+        epoch = None
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                    conn.settimeout(FEED_PING * 3)
+                    conn.connect(self.socket_path)
+                    conn.sendall(json.dumps({"op": "watch", "since": since, "epoch": epoch}).encode() + b"\n")
+                    if self.backend_state:
+                        self.call("backend_state", *self.backend_state)
+                    with conn.makefile("rb") as stream:
+                        for line in stream:
+                            event = json.loads(line)
+                            since, epoch = event["seq"], event["epoch"]
+                            if event["event"] == "ping":
+                                continue
+                            for callback in self.change_listeners:
+                                try:
+                                    callback(event["event"], event["connection"])
+                                except Exception as e:
+                                    self.logger.error(f"Change listener failed: {e}")
+            except (OSError, ValueError, GatewayControlError) as e:
+                self.logger.debug(f"Gateway change feed interrupted: {e}")
+            time.sleep(1)
+
+
+def run_data_plane():
+    """Gateway data plane process: connection bookkeeping and packet forwarding, nothing else"""
+    from gateway_manager import GatewayManager
+
+    gateway = GatewayManager()
+    server = GatewayControlServer(gateway, gateway.config["control_socket"])
+
+    def shutdown(signum, frame):
+        server.stop()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    gateway.start_cleanup_thread()
+    server.serve_forever()
+
+
+def start_data_plane(timeout=15):
+    """Run the data plane in a child process; returns its Popen once the control socket answers"""
+    client = GatewayClient()
+    if client.is_available():
+        raise RuntimeError(f"A gateway data plane is already listening on {client.socket_path}")
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__)])
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Gateway data plane exited with code {process.returncode}")
+        if client.is_available():
+            return process
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Gateway data plane did not answer on {client.socket_path} within {timeout}s")
+
+
+if __name__ == "__main__":
+    run_data_plane()
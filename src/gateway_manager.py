@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import select
 
+from log_store import SegmentedLogHandler
+
 
 class GatewayManager:
     def __init__(self, config_path="config/gateway_config.json"):
@@ -21,13 +23,18 @@ class GatewayManager:
         self.setup_logging()
         self.setup_directories()
         self.forwarding_threads = {}
+        self.backend_state = "unknown"
+        self.backend_details = {}
+        self.held_sessions = 0
+        self.held_lock = threading.Lock()
+        self.change_listeners = []
 
     def setup_logging(self):
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler('logs/gateway.log'),
+                SegmentedLogHandler('logs/gateway.log'),
                 logging.StreamHandler()
             ]
         )
@@ -52,6 +59,17 @@ class GatewayManager:
         for directory in directories:
             Path(directory).mkdir(exist_ok=True)
 
+    def add_change_listener(self, callback):
+        """Register a callback receiving (event, connection) when a connection is created, approved or revoked"""
+        self.change_listeners.append(callback)
+
+    def _notify(self, event, connection_code):
+        for callback in self.change_listeners:
+            try:
+                callback(event, self.connections[connection_code])
+            except Exception as e:
+                self.logger.error(f"Change listener failed: {e}")
+
     def generate_connection_code(self):
         """Generate a unique connection code"""
         code_length = self.config["connection_code_length"]
@@ -103,6 +121,7 @@ class GatewayManager:
 
         self.logger.info(f"Created connection {connection_code} on port {allocated_port}")
         self.save_connection_info(connection_code)
+        self._notify("created", connection_code)
 
         return connection
 
@@ -113,6 +132,7 @@ class GatewayManager:
             self.connections[connection_code]["approved_at"] = datetime.now().isoformat()
             self.logger.info(f"Approved connection {connection_code}")
             self.save_connection_info(connection_code)
+            self._notify("approved", connection_code)
             return True
         return False
 
@@ -128,6 +148,7 @@ class GatewayManager:
             connection["revoked_at"] = datetime.now().isoformat()
             self.logger.info(f"Revoked connection {connection_code}")
             self.save_connection_info(connection_code)
+            self._notify("revoked", connection_code)
             return True
         return False
 
@@ -210,24 +231,12 @@ class GatewayManager:
                     client_socket, client_addr = listener.accept()
                     self.logger.info(f"New connection from {client_addr} on port {listen_port}")
 
-                    # Connect to Minecraft server
-                    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    server_socket.connect(('localhost', target_port))
-
-                    # Start bidirectional forwarding
-                    client_thread = threading.Thread(
-                        target=self._forward_socket,
-                        args=(client_socket, server_socket, "client->server"),
+                    # Connect in a separate thread so a held session does not block accept()
+                    threading.Thread(
+                        target=self._start_session,
+                        args=(client_socket, client_addr, target_port),
                         daemon=True
-                    )
-                    server_thread = threading.Thread(
-                        target=self._forward_socket,
-                        args=(server_socket, client_socket, "server->client"),
-                        daemon=True
-                    )
-
-                    client_thread.start()
-                    server_thread.start()
+                    ).start()
 
                 except Exception as e:
                     self.logger.error(f"Error in forwarding: {e}")
@@ -236,6 +245,60 @@ class GatewayManager:
         except Exception as e:
             self.logger.error(f"Failed to start forwarder on port {listen_port}: {e}")
 
+    def set_backend_state(self, state, details=None):
+        """Record the Minecraft server state reported by the supervisor"""
+        self.backend_state = state
+        self.backend_details = details or {}
+        if state != "running":
+            self.logger.info(f"Minecraft server is {state}, new sessions will be held")
+
+    def _connect_backend(self, target_port):
+        """Connect to the Minecraft server, waiting out a restart instead of failing"""
+        deadline = time.time() + self.config["backend_hold_timeout"]
+        held = False
+        try:
+            while True:
+                try:
+                    return socket.create_connection(('localhost', target_port), timeout=5)
+                except OSError:
+                    # Only hold sessions while the supervisor says a restart is in progress
+                    if self.backend_state not in ("starting", "restarting") or time.time() >= deadline:
+                        raise
+                    if not held:
+                        held = True
+                        with self.held_lock:
+                            self.held_sessions += 1
+                    time.sleep(1)
+        finally:
+            if held:
+                with self.held_lock:
+                    self.held_sessions -= 1
+
+    def _start_session(self, client_socket, client_addr, target_port):
+        """Connect a client to the Minecraft server and forward both directions"""
+        try:
+            server_socket = self._connect_backend(target_port)
+            server_socket.settimeout(None)
+        except OSError as e:
+            self.logger.error(f"Could not reach Minecraft server for {client_addr} ({self.backend_state}): {e}")
+            client_socket.close()
+            return
+
+        # Start bidirectional forwarding
+        client_thread = threading.Thread(
+            target=self._forward_socket,
+            args=(client_socket, server_socket, "client->server"),
+            daemon=True
+        )
+        server_thread = threading.Thread(
+            target=self._forward_socket,
+            args=(server_socket, client_socket, "server->client"),
+            daemon=True
+        )
+
+        client_thread.start()
+        server_thread.start()
+
     def _forward_socket(self, source, destination, direction):
         """Forward data between two sockets"""
         try:
@@ -285,5 +348,7 @@ class GatewayManager:
             "active_connections": active_connections,
             "total_connections": total_connections,
             "available_ports": len(self.available_ports),
-            "used_ports": len(self.used_ports)
+            "used_ports": len(self.used_ports),
+            "server_state": self.backend_state,
+            "held_sessions": self.held_sessions
         }
\ No newline at end of file
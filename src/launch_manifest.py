@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import logging
+from pathlib import Path
+
+
+class LaunchManifest:
+    """Resolves how to launch the installed server once and caches it, validated by file mtimes and sizes"""
+
+    VERSION = 1
+
+    def __init__(self, server_dir="server", manifest_name=".launch_manifest.json"):
+        self.server_dir = Path(server_dir)
+        self.manifest_path = self.server_dir / manifest_name
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _inputs(config):
+        """Config values that change the launch command"""
+        return {
+            "minecraft_version": config["minecraft_version"],
+            "forge_version": config["forge_version"],
+            "memory": config["memory"],
+            "java_args": config.get("java_args", []),
+            "java": config.get("java_path", "java")
+        }
+
+    def _fingerprint(self, relative_path):
+        stat = (self.server_dir / relative_path).stat()
+        return [stat.st_mtime, stat.st_size]
+
+    def load(self, config):
+        """Get the cached manifest if it still matches the config and the files on disk"""
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("version") != self.VERSION or manifest.get("inputs") != self._inputs(config):
+            return None
+        try:
+            for relative_path, fingerprint in manifest["files"].items():
+                if self._fingerprint(relative_path) != fingerprint:
+                    return None
+        except OSError:
+            return None
+        return manifest
+
+    def resolve(self, config):
+        """Work out the launch command from the installed tree and save it"""
+        inputs = self._inputs(config)
+        full_version = f"{inputs['minecraft_version']}-{inputs['forge_version']}"
+        forge_dir = Path("libraries/net/minecraftforge/forge") / full_version
+        args_file = forge_dir / ("win_args.txt" if os.name == "nt" else "unix_args.txt")
+        jvm = [inputs["java"], f"-Xmx{inputs['memory']['max']}", f"-Xms{inputs['memory']['min']}"]
+        jvm.extend(inputs["java_args"])
+
+        files = []
+        if (self.server_dir / args_file).exists():
+            # Forge 1.17+: the installer writes the classpath and main class into an args file
+            mode = "args_file"
+            launcher = args_file.as_posix()
+            command = list(jvm)
+            if (self.server_dir / "user_jvm_args.txt").exists():
+                command.append("@user_jvm_args.txt")
+                files.append("user_jvm_args.txt")
+            command.extend([f"@{launcher}", "nogui"])
+            files.append(launcher)
+        else:
+            jars = [f"forge-{full_version}.jar", f"forge-{full_version}-universal.jar"]
+            jar = next((name for name in jars if (self.server_dir / name).exists()), None)
+            if jar:
+                # Legacy Forge ships a runnable server jar
+                mode = "jar"
+                launcher = jar
+                command = jvm + ["-jar", jar, "nogui"]
+                files.append(jar)
+            elif (self.server_dir / "run.sh").exists():
+                mode = "script"
+                launcher = "run.sh"
+                command = ["bash", "run.sh", "nogui"]
+                files.append("run.sh")
+            else:
+                return None
+
+        manifest = {
+            "version": self.VERSION,
+            "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "inputs": inputs,
+            "mode": mode,
+            "launcher": launcher,
+            "command": command,
+            "cwd": str(self.server_dir),
+            "files": {path: self._fingerprint(path) for path in files}
+        }
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.manifest_path)
+        self.logger.info(f"Resolved {mode} launcher: {launcher}")
+        return manifest
+
+    def get(self, config):
+        """Get the cached manifest, resolving it again only when it is stale"""
+        return self.load(config) or self.resolve(config)
+
+    def invalidate(self):
+        try:
+            self.manifest_path.unlink()
+        except FileNotFoundError:
+            pass
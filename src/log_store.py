@@ -0,0 +1,456 @@
+import os
+import re
+import io
+import gzip
+import json
+import time
+import bisect
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+FORGE_LINE = re.compile(
+    r"^\[(?P<time>\d{2}\w{3}\d{4} \d{2}:\d{2}:\d{2}\.\d{3})\] \[(?P<thread>[^\]]*)/(?P<level>\w+)\] "
+    r"\[(?P<logger>[^\]]*)\]: (?P<message>.*)$"
+)
+APP_LINE = re.compile(
+    r"^(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (?P<logger>\S+) - (?P<level>\w+) - (?P<message>.*)$"
+)
+LEVELS = {"TRACE": 5, "DEBUG": 10, "INFO": 20, "WARN": 30, "WARNING": 30, "ERROR": 40, "FATAL": 50, "CRITICAL": 50}
+
+# Distance between sparse index entries (uncompressed bytes) and size of gzip members in rotated segments
+INDEX_STRIDE = 256 * 1024
+MEMBER_SIZE = 1024 * 1024
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_ROTATE_INTERVAL = 24 * 3600
+DEFAULT_BACKUP_COUNT = 14
+
+DEFAULT_SOURCES = {
+    "latest": {"path": "server/logs/latest.log", "rotated": "server/logs/[0-9]*-[0-9]*-[0-9]*-*.log.gz"},
+    "debug": {"path": "server/logs/debug.log", "rotated": "server/logs/debug-*.log.gz"},
+    "app": {"path": "logs/app.log", "rotated": "logs/app.log.*.gz"},
+    "forge": {"path": "logs/forge.log", "rotated": "logs/forge.log.*.gz"},
+    "gateway": {"path": "logs/gateway.log", "rotated": "logs/gateway.log.*.gz"},
+    "gateway_server": {"path": "logs/gateway_server.log", "rotated": "logs/gateway_server.log.*.gz"},
+}
+
+_second_cache = {}
+
+
+def parse_timestamp(line):
+    """Get the epoch timestamp at the start of a log line, or None for continuation lines"""
+    if line.startswith("["):
+        stamp = line[1:23]
+        if len(stamp) != 22 or stamp[2:5].isdigit():
+            return None
+        fmt = "%d%b%Y %H:%M:%S"
+        second, millis = stamp[:18], stamp[19:22]
+    elif line[:4].isdigit():
+        stamp = line[:23]
+        if len(stamp) != 23 or stamp[4] != "-":
+            return None
+        fmt = "%Y-%m-%d %H:%M:%S"
+        second, millis = stamp[:19], stamp[20:23]
+    else:
+        return None
+
+    # strptime is slow; consecutive lines almost always share the same second
+    base = _second_cache.get(second)
+    if base is None:
+        try:
+            base = datetime.strptime(second, fmt).timestamp()
+        except ValueError:
+            return None
+        if len(_second_cache) > 4096:
+            _second_cache.clear()
+        _second_cache[second] = base
+    return base + int(millis) / 1000 if millis.isdigit() else base
+
+
+def parse_record(line):
+    """Parse a log line into a record dict, or None if it continues the previous record"""
+    match = FORGE_LINE.match(line) or APP_LINE.match(line)
+    if not match:
+        return None
+    groups = match.groupdict()
+    return {
+        "timestamp": parse_timestamp(line),
+        "time": groups["time"],
+        "thread": groups.get("thread"),
+        "level": groups["level"],
+        "logger": groups["logger"],
+        "message": groups["message"]
+    }
+
+
+def _decode(raw):
+    return raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+class SegmentedLogHandler(logging.FileHandler):
+    """File handler rotating on size or age into gzip segments with a sparse time index"""
+
+    def __init__(self, filename, max_bytes=DEFAULT_MAX_BYTES, interval=DEFAULT_ROTATE_INTERVAL,
+                 backup_count=DEFAULT_BACKUP_COUNT, index_dir="logs/index"):
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.index_dir = index_dir
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(filename, mode="a", encoding="utf-8")
+        self.opened_at = self._first_timestamp() or time.time()
+
+    def _first_timestamp(self):
+        """Age of an existing log is taken from its first record, as Linux keeps no creation time"""
+        try:
+            with open(self.baseFilename, "rb") as f:
+                return parse_timestamp(_decode(f.readline()[:32]))
+        except OSError:
+            return None
+
+    def shouldRollover(self):
+        if self.stream is None:
+            return False
+        size = self.stream.tell()
+        if size == 0:
+            return False
+        return size >= self.max_bytes or time.time() - self.opened_at >= self.interval
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover():
+                self.doRollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = f"{self.baseFilename}.{stamp}"
+        os.replace(self.baseFilename, rotated)
+        self.opened_at = time.time()
+        self.stream = self._open()
+
+        # Compression happens off the logging path
+        threading.Thread(target=self._compress, args=(rotated,), daemon=True).start()
+
+    def _compress(self, rotated):
+        try:
+            compress_segment(rotated, f"{rotated}.gz", self.index_dir)
+            os.remove(rotated)
+        except OSError:
+            return
+        segments = sorted(Path(self.baseFilename).parent.glob(f"{Path(self.baseFilename).name}.*.gz"))
+        for old in segments[:-self.backup_count] if self.backup_count else []:
+            try:
+                old.unlink()
+                index_path_for(old, self.index_dir).unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+def index_path_for(segment, index_dir="logs/index"):
+    """Location of the persisted sparse index of a segment"""
+    segment = Path(segment).resolve()
+    safe = str(segment).strip("/").replace("/", "__")
+    return Path(index_dir) / f"{safe}.json"
+
+
+def compress_segment(source, destination, index_dir="logs/index"):
+    """Gzip a log as independent ~1 MiB members split on record boundaries, indexing each member"""
+    entries = []
+    first = last = None
+    # Written under a hidden name so queries never see a half-written segment
+    tmp = Path(destination).with_name(f".{Path(destination).name}.tmp")
+    with open(source, "rb") as src, open(tmp, "wb") as dst:
+        buffer = io.BytesIO()
+        member_ts = None
+        for raw in src:
+            ts = parse_timestamp(_decode(raw[:32]))
+            # Start a new member only where a record starts so no record spans two members
+            if ts is not None and buffer.tell() >= MEMBER_SIZE:
+                entries.append([member_ts, dst.tell()])
+                dst.write(gzip.compress(buffer.getvalue(), compresslevel=6))
+                buffer = io.BytesIO()
+                member_ts = None
+            if ts is not None:
+                if member_ts is None:
+                    member_ts = ts
+                if first is None:
+                    first = ts
+                last = ts
+            buffer.write(raw)
+        if buffer.tell():
+            entries.append([member_ts, dst.tell()])
+            dst.write(gzip.compress(buffer.getvalue(), compresslevel=6))
+    os.replace(tmp, destination)
+
+    stat = os.stat(destination)
+    index = {
+        "kind": "members",
+        "size": stat.st_size,
+        "inode": stat.st_ino,
+        "first": first,
+        "last": last,
+        "next": stat.st_size,
+        "entries": [entry for entry in entries if entry[0] is not None]
+    }
+    path = index_path_for(destination, index_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(index))
+    return index
+
+
+class LogStore:
+    """Time-range and filter queries over log segments using sparse timestamp -> offset indexes"""
+
+    def __init__(self, sources=None, index_dir="logs/index"):
+        self.sources = sources or DEFAULT_SOURCES
+        self.index_dir = Path(index_dir)
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _source(self, name):
+        if name not in self.sources:
+            raise ValueError(f"Unknown log source: {name}")
+        return self.sources[name]
+
+    def segments(self, name):
+        """Get the segments of a source, oldest first, the live file last"""
+        source = self._source(name)
+        pattern = source.get("rotated")
+        rotated = list(Path(".").glob(pattern)) if pattern else []
+        if pattern and pattern.endswith(".gz"):
+            # A rotated file stays plain until SegmentedLogHandler has finished compressing it
+            rotated += [path for path in Path(".").glob(pattern[:-3])
+                        if path.suffix != ".gz" and not path.with_name(path.name + ".gz").exists()]
+
+        # Compression finishes out of order, so file times say nothing about rotation order;
+        # order by each segment's first record instead
+        ordered = []
+        for path in rotated:
+            try:
+                first = self.get_index(path)["first"]
+                ordered.append((first if first is not None else path.stat().st_mtime, path))
+            except OSError:
+                continue  # compressed and removed since the glob
+        ordered.sort()
+        live = Path(source["path"])
+        return [path for _, path in ordered] + ([live] if live.exists() else [])
+
+    # Index maintenance
+
+    def get_index(self, segment):
+        """Load, extend or build the sparse index of a segment"""
+        segment = Path(segment)
+        key = str(segment.resolve())
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is None:
+                path = index_path_for(segment, self.index_dir)
+                if path.exists():
+                    try:
+                        index = json.loads(path.read_text())
+                    except ValueError:
+                        index = None
+
+            stat = segment.stat()
+            if index is None or index["inode"] != stat.st_ino or index["size"] > stat.st_size:
+                index = self._build_index(segment, stat)
+            elif index["size"] < stat.st_size and index["kind"] == "plain":
+                self._extend_plain_index(segment, index, stat)
+            else:
+                self.indexes[key] = index
+                return index
+
+            self.indexes[key] = index
+            path = index_path_for(segment, self.index_dir)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(index))
+            return index
+
+    def _build_index(self, segment, stat):
+        if segment.suffix == ".gz":
+            return self._build_gzip_index(segment, stat)
+        index = {"kind": "plain", "size": 0, "inode": stat.st_ino, "first": None, "last": None,
+                 "next": 0, "entries": []}
+        self._extend_plain_index(segment, index, stat)
+        return index
+
+    def _extend_plain_index(self, segment, index, stat):
+        """Sample one timestamp per stride by seeking; the file body is never read in full"""
+        with open(segment, "rb") as f:
+            position = index["next"]
+            while position < stat.st_size:
+                f.seek(position)
+                if position:
+                    f.readline()
+                for _ in range(500):
+                    offset = f.tell()
+                    raw = f.readline()
+                    if not raw:
+                        break
+                    ts = parse_timestamp(_decode(raw[:32]))
+                    if ts is not None:
+                        if not index["entries"] or offset > index["entries"][-1][1]:
+                            index["entries"].append([ts, offset])
+                        if index["first"] is None:
+                            index["first"] = ts
+                        break
+                position += INDEX_STRIDE
+            index["next"] = position
+        index["size"] = stat.st_size
+        last = self._last_timestamp(segment)
+        if last is not None:
+            index["last"] = last
+
+    def _build_gzip_index(self, segment, stat):
+        """Index a single-member gzip (as Forge writes them) by uncompressed offset in one pass"""
+        index = {"kind": "uncompressed", "size": stat.st_size, "inode": stat.st_ino, "first": None,
+                 "last": None, "next": stat.st_size, "entries": []}
+        next_mark = 0
+        offset = 0
+        with gzip.open(segment, "rb") as f:
+            for raw in f:
+                ts = parse_timestamp(_decode(raw[:32]))
+                if ts is not None:
+                    if offset >= next_mark:
+                        index["entries"].append([ts, offset])
+                        next_mark = offset + INDEX_STRIDE
+                    if index["first"] is None:
+                        index["first"] = ts
+                    index["last"] = ts
+                offset += len(raw)
+        return index
+
+    def _last_timestamp(self, segment):
+        for line in reversed(self._tail_lines(segment, 50)):
+            ts = parse_timestamp(line)
+            if ts is not None:
+                return ts
+        return None
+
+    # Queries
+
+    def _open_at(self, segment, index, start):
+        """Open a segment positioned at the last indexed record before `start`"""
+        entries = index["entries"]
+        offset = 0
+        if start is not None and entries:
+            position = bisect.bisect_right([entry[0] for entry in entries], start) - 1
+            if position >= 0:
+                offset = entries[position][1]
+
+        if index["kind"] == "members":
+            raw = open(segment, "rb")
+            raw.seek(offset)
+            return gzip.GzipFile(fileobj=raw, mode="rb"), raw
+        if index["kind"] == "uncompressed":
+            f = gzip.open(segment, "rb")
+            f.seek(offset)
+            return f, None
+        f = open(segment, "rb")
+        f.seek(offset)
+        return f, None
+
+    def query(self, name, start=None, end=None, level=None, logger=None, contains=None, limit=500):
+        """Get records of a source in a time range matching the given filters"""
+        min_level = LEVELS.get(level.upper(), 0) if level else 0
+        logger = logger.lower() if logger else None
+        contains = contains.lower() if contains else None
+        results = []
+
+        for segment in self.segments(name):
+            index = self.get_index(segment)
+            if start is not None and index["last"] is not None and index["last"] < start:
+                continue
+            if end is not None and index["first"] is not None and index["first"] > end:
+                break
+
+            f, raw = self._open_at(segment, index, start)
+            try:
+                current = None
+                for line in f:
+                    record = parse_record(_decode(line))
+                    if record is None:
+                        if current is not None:
+                            current["message"] += "\n" + _decode(line)
+                        continue
+
+                    if current is not None and self._matches(current, min_level, logger, contains):
+                        results.append(current)
+                        if len(results) >= limit:
+                            return results
+                    current = None
+
+                    ts = record["timestamp"]
+                    if end is not None and ts is not None and ts > end:
+                        return results
+                    if start is not None and ts is not None and ts < start:
+                        continue
+                    current = record
+
+                if current is not None and self._matches(current, min_level, logger, contains):
+                    results.append(current)
+                    if len(results) >= limit:
+                        return results
+            finally:
+                f.close()
+                if raw:
+                    raw.close()
+        return results
+
+    @staticmethod
+    def _matches(record, min_level, logger, contains):
+        if min_level and LEVELS.get(record["level"].upper(), 0) < min_level:
+            return False
+        if logger and logger not in record["logger"].lower():
+            return False
+        if contains and contains not in record["message"].lower():
+            return False
+        return True
+
+    def _tail_lines(self, path, lines, block_size=64 * 1024):
+        """Read the last lines of a plain file by seeking backwards from the end"""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= lines:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        return [_decode(line) for line in data.splitlines()[-lines:]]
+
+    def tail(self, name, lines=100):
+        """Get the last lines of a source's live file"""
+        path = Path(self._source(name)["path"])
+        if not path.exists():
+            return []
+        return self._tail_lines(path, lines)
+
+    def get_sources(self):
+        """Get every source with its segments and their time spans"""
+        result = {}
+        for name in self.sources:
+            segments = []
+            for segment in self.segments(name):
+                index = self.get_index(segment)
+                segments.append({
+                    "name": segment.name,
+                    "size": index["size"],
+                    "first": index["first"],
+                    "last": index["last"],
+                    "compressed": index["kind"] != "plain"
+                })
+            result[name] = segments
+        return result
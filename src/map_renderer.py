@@ -0,0 +1,399 @@
+import io
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from anvil import CHUNKS_PER_REGION, RegionFile, decompress, region_coords
+from nbt import NbtError, read_paths
+from world_analyzer import WorldAnalyzer
+
+
+TILE_SIZE = 512  # one region per tile, one pixel per block
+
+# 1.18+ chunk layout; older chunks keep these under "Level" and are left blank
+CHUNK_TAGS = [("sections",), ("Heightmaps",), ("yPos",), ("Status",)]
+
+# Top-down colours of common blocks; grass, leaves and water use typical plains biome tints
+PALETTE = {
+    "grass_block": (110, 155, 65),
+    "dirt": (134, 96, 67),
+    "coarse_dirt": (119, 85, 59),
+    "podzol": (91, 63, 24),
+    "mycelium": (111, 99, 105),
+    "dirt_path": (148, 121, 65),
+    "farmland": (110, 75, 45),
+    "mud": (60, 57, 60),
+    "stone": (125, 125, 125),
+    "granite": (149, 103, 85),
+    "diorite": (188, 188, 188),
+    "andesite": (136, 136, 136),
+    "deepslate": (80, 80, 82),
+    "tuff": (108, 109, 102),
+    "calcite": (223, 224, 220),
+    "gravel": (131, 127, 126),
+    "sand": (219, 207, 163),
+    "red_sand": (190, 102, 33),
+    "sandstone": (216, 203, 155),
+    "clay": (160, 166, 179),
+    "snow": (249, 254, 254),
+    "snow_block": (249, 254, 254),
+    "powder_snow": (248, 253, 253),
+    "ice": (145, 183, 253),
+    "packed_ice": (141, 180, 250),
+    "blue_ice": (116, 167, 253),
+    "water": (56, 92, 196),
+    "lava": (207, 92, 20),
+    "bedrock": (85, 85, 85),
+    "obsidian": (20, 18, 30),
+    "netherrack": (97, 38, 38),
+    "soul_sand": (81, 62, 50),
+    "soul_soil": (75, 57, 46),
+    "basalt": (80, 81, 86),
+    "blackstone": (42, 36, 41),
+    "crimson_nylium": (130, 31, 31),
+    "warped_nylium": (43, 114, 101),
+    "glowstone": (171, 131, 84),
+    "magma_block": (142, 63, 31),
+    "end_stone": (219, 222, 158),
+    "purpur_block": (169, 125, 169),
+    "cactus": (85, 127, 43),
+    "pumpkin": (198, 118, 24),
+    "melon": (111, 145, 30),
+    "moss_block": (89, 109, 45),
+    "lily_pad": (32, 128, 48),
+    "sugar_cane": (148, 192, 101),
+    "bamboo": (93, 144, 19),
+    "kelp": (87, 130, 34),
+    "seagrass": (51, 127, 30),
+    "terracotta": (152, 94, 67),
+    "cobblestone": (127, 127, 127),
+    "mossy_cobblestone": (110, 118, 94),
+    "bricks": (150, 97, 83),
+    "glass": (175, 213, 219),
+    "torch": (255, 216, 0),
+}
+
+# Fallbacks by name fragment, checked in order, for modded and variant blocks
+PALETTE_RULES = [
+    ("leaves", (60, 120, 40)),
+    ("_log", (102, 81, 50)),
+    ("_wood", (102, 81, 50)),
+    ("planks", (162, 130, 78)),
+    ("slab", (150, 130, 100)),
+    ("stairs", (150, 130, 100)),
+    ("fence", (130, 105, 70)),
+    ("door", (130, 105, 70)),
+    ("sapling", (70, 130, 40)),
+    ("grass", (100, 150, 60)),
+    ("fern", (90, 140, 55)),
+    ("flower", (200, 160, 60)),
+    ("tulip", (200, 90, 80)),
+    ("mushroom", (150, 110, 90)),
+    ("vine", (60, 110, 35)),
+    ("coral", (200, 90, 140)),
+    ("_ore", (130, 125, 120)),
+    ("deepslate", (80, 80, 82)),
+    ("stone", (125, 125, 125)),
+    ("brick", (140, 100, 90)),
+    ("sand", (214, 200, 150)),
+    ("snow", (249, 254, 254)),
+    ("ice", (145, 183, 253)),
+    ("water", (56, 92, 196)),
+    ("lava", (207, 92, 20)),
+    ("white", (233, 236, 236)),
+    ("orange", (240, 118, 19)),
+    ("magenta", (189, 68, 179)),
+    ("light_blue", (58, 175, 217)),
+    ("yellow", (248, 197, 39)),
+    ("lime", (112, 185, 25)),
+    ("pink", (237, 141, 172)),
+    ("light_gray", (142, 142, 134)),
+    ("gray", (62, 68, 71)),
+    ("cyan", (21, 137, 145)),
+    ("purple", (121, 42, 172)),
+    ("blue", (53, 57, 157)),
+    ("brown", (114, 71, 40)),
+    ("green", (84, 109, 27)),
+    ("red", (161, 39, 34)),
+    ("black", (20, 21, 25)),
+]
+UNKNOWN_COLOR = (128, 128, 128)
+
+# Blocks whose depth to OCEAN_FLOOR darkens them
+FLUIDS = ("water", "lava")
+
+
+def block_color(name, palette):
+    """RGB of a namespaced block id: exact palette match, then name rules, then grey"""
+    short = name.split(":", 1)[-1]
+    if name in palette:
+        return palette[name]
+    if short in palette:
+        return palette[short]
+    for fragment, color in PALETTE_RULES:
+        if fragment in short:
+            return color
+    return UNKNOWN_COLOR
+
+
+def unpack_longs(longs, count):
+    """Values packed into a long array without spanning longs (1.16+ heightmaps and block states)"""
+    words = np.asarray(longs, dtype=np.int64).view(np.uint64)
+    per_long = -(-count // len(words))
+    bits = 64 // per_long
+    shifts = np.arange(per_long, dtype=np.uint64) * np.uint64(bits)
+    values = (words[:, None] >> shifts) & np.uint64((1 << bits) - 1)
+    return values.reshape(-1)[:count].astype(np.int32)
+
+
+def render_chunk(data, palette, colors):
+    """(16x16 RGBA, 16x16 top block heights) of an uncompressed chunk, or None if it is not fully generated
+
+    Only the section holding each column's top block is unpacked. colors caches
+    block id -> RGB across the chunks of a region.
+    """
+    tags = read_paths(data, CHUNK_TAGS)
+    if tags.get(("Status",), "").replace("minecraft:", "") != "full":
+        return None
+    heightmaps = tags.get(("Heightmaps",), {})
+    surface = heightmaps.get("MOTION_BLOCKING") or heightmaps.get("WORLD_SURFACE")
+    sections = {section["Y"]: section for section in tags.get(("sections",), []) if "block_states" in section}
+    if not surface or not sections:
+        return None
+
+    min_y = tags.get(("yPos",), min(sections)) * 16
+    heights = unpack_longs(surface, 256)
+    top = min_y + heights - 1
+    rgba = np.zeros((256, 4), dtype=np.uint8)
+    fluid = np.zeros(256, dtype=bool)
+    columns = np.arange(256)
+
+    for section_y in np.unique(top[heights > 0] >> 4):
+        section = sections.get(int(section_y))
+        if section is None:
+            continue
+        states = section["block_states"]
+        names = [state.get("Name", "minecraft:air") for state in states["palette"]]
+        for name in names:
+            if name not in colors:
+                colors[name] = block_color(name, palette)
+        lookup = np.array([colors[name] for name in names], dtype=np.uint8)
+        wanted = (heights > 0) & (top >> 4 == section_y)
+        local = (top[wanted] & 15) * 256 + columns[wanted]
+        indices = unpack_longs(states["data"], 4096)[local] if "data" in states else np.zeros(len(local), int)
+        indices = np.minimum(indices, len(names) - 1)
+        rgba[wanted, :3] = lookup[indices]
+        rgba[wanted, 3] = 255
+        fluid[wanted] = np.isin(indices, [i for i, name in enumerate(names) if name.endswith(FLUIDS)])
+
+    floor = heightmaps.get("OCEAN_FLOOR")
+    if floor and fluid.any():
+        depth = np.where(fluid, heights - unpack_longs(floor, 256), 0)
+        shade = np.clip(1.0 - depth * 0.04, 0.45, 1.0)[:, None]
+        rgba[:, :3] = (rgba[:, :3] * shade).astype(np.uint8)
+    return rgba.reshape(16, 16, 4), top.reshape(16, 16).astype(np.int16)
+
+
+def shade(rgba, heights):
+    """Hill shading: brighten slopes facing north, darken those facing away"""
+    north = np.vstack([heights[:1], heights[:-1]])
+    factor = 1.0 + np.clip(heights.astype(np.int32) - north, -4, 4) * 0.06
+    shaded = rgba.copy()
+    shaded[..., :3] = np.clip(rgba[..., :3] * factor[..., None], 0, 255).astype(np.uint8)
+    return shaded
+
+
+def encode_png(rgba):
+    """8-bit RGBA PNG bytes of an HxWx4 array"""
+    height, width = rgba.shape[:2]
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # filter byte 0 per row
+    rows[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6))
+            + chunk(b"IEND", b""))
+
+
+def _write_atomic(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def render_region(path, tile_dir, palette):
+    """Update one region's tile, re-rendering only chunks whose header timestamp changed
+
+    Unshaded pixels, heights and the timestamps they were rendered from are kept in
+    r.X.Z.npz next to the tile. A chunk that cannot be read (e.g. mid-save) keeps
+    its old pixels and is retried on the next run.
+    """
+    path, tile_dir = Path(path), Path(tile_dir)
+    region_x, region_z = region_coords(path)
+    state_path = tile_dir / f"r.{region_x}.{region_z}.npz"
+    tile_path = tile_dir / f"r.{region_x}.{region_z}.png"
+    result = {"x": region_x, "z": region_z, "rendered": 0, "errors": 0}
+
+    try:
+        with np.load(state_path) as state:
+            rendered_at, rgba, heights = state["timestamps"], state["rgba"], state["heights"]
+    except (OSError, ValueError, KeyError):
+        rendered_at = np.zeros(CHUNKS_PER_REGION, dtype=np.uint32)
+        rgba = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+        heights = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.int16)
+
+    with RegionFile(path) as region:
+        timestamps = np.array(region.timestamps, dtype=np.uint32)
+        changed = np.flatnonzero(timestamps != rendered_at)
+        if not len(changed) and tile_path.exists():
+            result["version"] = hashlib.sha1(tile_path.read_bytes()).hexdigest()[:16]
+            return result
+
+        colors = {}
+        for index in changed:
+            x, z = (index % 32) * 16, (index // 32) * 16
+            stored = region.read_stored(index)
+            if stored is None and timestamps[index]:
+                result["errors"] += 1
+                timestamps[index] = rendered_at[index]
+                continue
+            try:
+                chunk = render_chunk(decompress(stored), palette, colors) if stored is not None else None
+            except (NbtError, ValueError, KeyError, OSError, zlib.error):
+                result["errors"] += 1
+                timestamps[index] = rendered_at[index]
+                continue
+            if chunk:
+                rgba[z:z + 16, x:x + 16], heights[z:z + 16, x:x + 16] = chunk
+                result["rendered"] += 1
+            else:
+                # Deleted (e.g. trimmed) or not generated far enough to have terrain
+                rgba[z:z + 16, x:x + 16] = 0
+                heights[z:z + 16, x:x + 16] = 0
+
+    png = encode_png(shade(rgba, heights))
+    _write_atomic(tile_path, png)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, timestamps=timestamps, rgba=rgba, heights=heights)
+    _write_atomic(state_path, buffer.getvalue())
+    result["version"] = hashlib.sha1(png).hexdigest()[:16]
+    return result
+
+
+def dimension_slug(dimension):
+    """URL and directory name of a dimension id (minecraft:the_nether -> minecraft_the_nether)"""
+    return dimension.replace(":", "_").replace("/", "_")
+
+
+class MapRenderer:
+    """Top-down PNG tiles of a world, one per region file, re-rendered incrementally every `interval` seconds
+
+    index.json lists the tiles of each dimension with a content version so the
+    dashboard can serve them with long-lived cache headers under versioned URLs.
+    """
+
+    def __init__(self, world_dir="server/world", output_dir="cache/map", dimensions=None, palette=None,
+                 interval=3600, workers=None):
+        self.world_dir = Path(world_dir)
+        self.output_dir = Path(output_dir)
+        self.dimensions = dimensions or ["minecraft:overworld"]
+        self.palette = {**PALETTE, **(palette or {})}
+        self.interval = interval
+        self.workers = workers or os.cpu_count() or 2
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.index = self._load_index()
+        self.running = False
+        self.thread = None
+
+    def _load_index(self):
+        try:
+            return json.loads((self.output_dir / "index.json").read_text())
+        except (OSError, ValueError):
+            return {"updated": None, "seconds": None, "dimensions": {}}
+
+    def render(self, dimensions=None):
+        """Bring every tile of the given dimensions up to date; returns the new index"""
+        with self.lock:
+            started = time.time()
+            regions = WorldAnalyzer(self.world_dir).region_files()
+            index = {"updated": None, "seconds": None, "dimensions": dict(self.index["dimensions"])}
+            rendered = errors = 0
+
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for dimension in dimensions or self.dimensions:
+                    slug = dimension_slug(dimension)
+                    tile_dir = self.output_dir / slug
+                    tile_dir.mkdir(parents=True, exist_ok=True)
+                    paths = [str(path) for path in regions.get(dimension, [])]
+                    results = list(pool.map(render_region, paths, [str(tile_dir)] * len(paths),
+                                            [self.palette] * len(paths)))
+
+                    # Regions deleted from the world (e.g. pruned) lose their tiles
+                    current = {f"r.{result['x']}.{result['z']}" for result in results}
+                    for stale in tile_dir.glob("r.*.*.*"):
+                        if stale.name.rsplit(".", 1)[0] not in current:
+                            stale.unlink()
+
+                    index["dimensions"][dimension] = {
+                        "slug": slug,
+                        "tile_size": TILE_SIZE,
+                        "tiles": [{"x": r["x"], "z": r["z"], "version": r["version"]} for r in results]
+                    }
+                    rendered += sum(result["rendered"] for result in results)
+                    errors += sum(result["errors"] for result in results)
+
+            index["updated"] = time.time()
+            index["seconds"] = round(index["updated"] - started, 2)
+            _write_atomic(self.output_dir / "index.json", json.dumps(index).encode())
+            self.index = index
+            self.logger.info(f"Rendered {rendered} changed chunks in {index['seconds']}s"
+                             + (f" ({errors} unreadable, will retry)" if errors else ""))
+            return index
+
+    def get_index(self):
+        return self.index
+
+    def get_tile(self, slug, x, z):
+        """(path, version) of a rendered tile, or None"""
+        for summary in self.index["dimensions"].values():
+            if summary["slug"] != slug:
+                continue
+            for tile in summary["tiles"]:
+                if tile["x"] == x and tile["z"] == z:
+                    return self.output_dir / slug / f"r.{x}.{z}.png", tile["version"]
+        return None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started map renderer (every {self.interval}s)")
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            try:
+                self.render()
+            except Exception as e:
+                self.logger.error(f"Map render failed: {e}")
+            slept = 0
+            while self.running and slept < self.interval:
+                time.sleep(1)
+                slept += 1
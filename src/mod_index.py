@@ -0,0 +1,317 @@
+import io
+import os
+import re
+import json
+import logging
+import tomllib
+import zipfile
+from pathlib import Path
+
+
+MODS_TOML = "META-INF/mods.toml"
+MANIFEST = "META-INF/MANIFEST.MF"
+JARJAR_METADATA = "META-INF/jarjar/metadata.json"
+
+# Maven qualifier order; a missing qualifier ranks as a release
+QUALIFIERS = {"alpha": 0, "a": 0, "beta": 1, "b": 1, "milestone": 2, "m": 2, "rc": 3, "cr": 3,
+              "snapshot": 4, "": 5, "ga": 5, "final": 5, "release": 5, "sp": 6}
+
+
+def version_key(version):
+    """Comparable key for a Maven-style version string"""
+    items = []
+    for token in re.findall(r"\d+|[A-Za-z]+", str(version)):
+        if token.isdigit():
+            items.append((2, int(token), ""))
+        else:
+            rank = QUALIFIERS.get(token.lower())
+            items.append((1, rank, "") if rank is not None else (1, 7, token.lower()))
+    while items and items[-1] in ((2, 0, ""), (1, 5, "")):
+        items.pop()
+    return items
+
+
+def compare_versions(a, b):
+    """-1, 0 or 1 as version a is older, equal or newer than b"""
+    ka, kb = version_key(a), version_key(b)
+    release = (1, 5, "")
+    for x, y in zip(ka + [release] * (len(kb) - len(ka)), kb + [release] * (len(ka) - len(kb))):
+        if x != y:
+            return -1 if x < y else 1
+    return 0
+
+
+class VersionRange:
+    """Maven version range as used by mods.toml, e.g. "[47,)", "[1.20,1.21)" or "*" """
+
+    def __init__(self, spec):
+        self.spec = (spec or "").strip()
+        self.restrictions = []
+        for opening, body, closing in re.findall(r"([\[(])([^\])]*)([\])])", self.spec):
+            bounds = [bound.strip() or None for bound in body.split(",")]
+            if len(bounds) == 1:
+                # "[1.2]" pins an exact version
+                bounds = bounds * 2
+            self.restrictions.append((bounds[0], opening == "[", bounds[1], closing == "]"))
+
+    def contains(self, version):
+        # A bare version or "*" is only a recommendation and accepts anything
+        if not self.restrictions:
+            return True
+        for lower, inclusive_lower, upper, inclusive_upper in self.restrictions:
+            if lower is not None:
+                cmp = compare_versions(version, lower)
+                if cmp < 0 or (cmp == 0 and not inclusive_lower):
+                    continue
+            if upper is not None:
+                cmp = compare_versions(version, upper)
+                if cmp > 0 or (cmp == 0 and not inclusive_upper):
+                    continue
+            return True
+        return False
+
+    def __str__(self):
+        return self.spec or "*"
+
+
+def read_jar_metadata(path):
+    """Read the mod entries of a jar and of the jars it bundles through JarJar
+
+    Only the central directory, mods.toml and the JarJar listing are touched, plus
+    the mods.toml of each bundled jar. A version that cannot be determined is None.
+    """
+    with zipfile.ZipFile(path) as jar:
+        bundled = _read_bundled(jar)
+        try:
+            data = tomllib.loads(jar.read(MODS_TOML).decode("utf-8"))
+        except KeyError:
+            return {"mods": [], "library": True, "bundled": bundled}
+        mods = _read_mods(jar, data)
+        packages = _package_roots(jar)
+
+    return {
+        "mods": mods,
+        "bundled": bundled,
+        "packages": packages,
+        "loader": data.get("modLoader"),
+        "loader_version": data.get("loaderVersion", "")
+    }
+
+
+def _read_mods(jar, data, jar_version=None):
+    manifest = None
+    mods = []
+    for entry in data.get("mods", []):
+        version = str(entry.get("version", ""))
+        if "${file.jarVersion}" in version:
+            if manifest is None:
+                manifest = _read_manifest(jar)
+            jar_version = manifest.get("Implementation-Version", jar_version)
+            version = version.replace("${file.jarVersion}", jar_version) if jar_version else None
+        mod_id = entry.get("modId")
+        dependencies = []
+        for dependency in data.get("dependencies", {}).get(mod_id, []):
+            kind = dependency.get("type", "required" if dependency.get("mandatory", False) else "optional")
+            dependencies.append({
+                "mod_id": dependency.get("modId"),
+                "type": str(kind).lower(),
+                "version_range": dependency.get("versionRange", ""),
+                "side": str(dependency.get("side", "BOTH")).upper()
+            })
+        mods.append({
+            "mod_id": mod_id,
+            "version": version,
+            "display_name": entry.get("displayName", mod_id),
+            "client_only": _is_client_only(data, entry, dependencies),
+            "dependencies": dependencies
+        })
+    return mods
+
+
+def _read_bundled(jar, depth=0):
+    """Mods in the jars listed by META-INF/jarjar/metadata.json, which Forge loads as if installed"""
+    try:
+        listing = json.loads(jar.read(JARJAR_METADATA))
+    except (KeyError, ValueError):
+        return []
+    bundled = []
+    for item in listing.get("jars", []):
+        path = item.get("path")
+        try:
+            with zipfile.ZipFile(io.BytesIO(jar.read(path))) as nested:
+                try:
+                    data = tomllib.loads(nested.read(MODS_TOML).decode("utf-8"))
+                except KeyError:
+                    data = {}
+                mods = _read_mods(nested, data, (item.get("version") or {}).get("artifactVersion"))
+                inner = _read_bundled(nested, depth + 1) if depth < 2 else []
+        except (KeyError, ValueError, zipfile.BadZipFile, tomllib.TOMLDecodeError) as e:
+            logging.getLogger(__name__).debug(f"Skipping bundled jar {path}: {e}")
+            continue
+        bundled.extend({"mod_id": mod["mod_id"], "version": mod["version"], "jar": path} for mod in mods)
+        bundled.extend(inner)
+    return bundled
+
+
+def _read_manifest(jar):
+    try:
+        text = jar.read(MANIFEST).decode("utf-8", "replace")
+    except KeyError:
+        return {}
+    return dict(line.split(": ", 1) for line in text.splitlines() if ": " in line)
+
+
+def _package_roots(jar, limit=8):
+    """Most populated three-level packages of the jar's classes, taken from the central directory"""
+    counts = {}
+    for name in jar.namelist():
+        parts = name.split("/")
+        if name.endswith(".class") and len(parts) > 1 and parts[0] != "META-INF":
+            root = ".".join(parts[:min(3, len(parts) - 1)])
+            counts[root] = counts.get(root, 0) + 1
+    return sorted(counts, key=counts.get, reverse=True)[:limit]
+
+
+def _is_client_only(data, entry, dependencies):
+    if data.get("clientSideOnly") or entry.get("clientSideOnly"):
+        return True
+    if entry.get("displayTest") == "IGNORE_ALL_VERSION":
+        return True
+    # Mods that only depend on the game on the client never run on a dedicated server
+    platform = [d for d in dependencies if d["mod_id"] in ("minecraft", "forge")]
+    return bool(platform) and all(d["side"] == "CLIENT" for d in platform)
+
+
+class ModIndex:
+    """Metadata of the jars in a mods directory, cached by size and mtime"""
+
+    VERSION = 3
+
+    def __init__(self, mods_dir="mods", cache_path=None):
+        self.mods_dir = Path(mods_dir)
+        self.cache_path = Path(cache_path) if cache_path else self.mods_dir / ".mod_index.json"
+        self.logger = logging.getLogger(__name__)
+        self.entries = None
+
+    def _load_cache(self):
+        try:
+            cache = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return cache.get("jars", {}) if cache.get("version") == self.VERSION else {}
+
+    def _save_cache(self, jars):
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": self.VERSION, "jars": jars}, indent=2))
+        os.replace(tmp, self.cache_path)
+
+    def scan(self):
+        """Get {file name: metadata} for every jar, reopening only jars that changed"""
+        if not self.mods_dir.exists():
+            self.entries = {}
+            return self.entries
+
+        cached = self._load_cache()
+        entries = {}
+        opened = 0
+        for path in sorted(self.mods_dir.glob("*.jar")):
+            stat = path.stat()
+            fingerprint = [stat.st_size, stat.st_mtime_ns]
+            entry = cached.get(path.name)
+            if entry is None or entry.get("fingerprint") != fingerprint:
+                opened += 1
+                try:
+                    entry = read_jar_metadata(path)
+                except (zipfile.BadZipFile, tomllib.TOMLDecodeError, UnicodeDecodeError, OSError) as e:
+                    entry = {"mods": [], "error": str(e)}
+                entry["fingerprint"] = fingerprint
+            entries[path.name] = entry
+
+        if opened or set(entries) != set(cached):
+            self._save_cache(entries)
+        if opened:
+            self.logger.info(f"Indexed {len(entries)} jars ({opened} read, {len(entries) - opened} cached)")
+        self.entries = entries
+        return entries
+
+    def get_mods(self):
+        """Flat list of mods with the jar they come from"""
+        entries = self.entries if self.entries is not None else self.scan()
+        return [dict(mod, file=name) for name, entry in entries.items() for mod in entry["mods"]]
+
+    def get_packages(self):
+        """Map class package roots to the mod id of the jar that ships them"""
+        entries = self.entries if self.entries is not None else self.scan()
+        packages = {}
+        for entry in entries.values():
+            if entry["mods"]:
+                for package in entry.get("packages", []):
+                    packages.setdefault(package, entry["mods"][0]["mod_id"])
+        return packages
+
+    def check(self, minecraft_version, forge_version, side="SERVER"):
+        """Find problems that would stop Forge from loading the pack on the given side"""
+        entries = self.scan()
+        problems = []
+
+        def problem(severity, kind, file, message, **details):
+            problems.append(dict(severity=severity, type=kind, file=file, message=message, **details))
+
+        provided = {
+            "minecraft": {"version": minecraft_version, "file": None},
+            "forge": {"version": forge_version, "file": None}
+        }
+        for name, entry in entries.items():
+            if entry.get("error"):
+                problem("error", "unreadable", name, f"Could not read mods.toml: {entry['error']}")
+            for mod in entry["mods"]:
+                existing = provided.get(mod["mod_id"])
+                if existing is not None:
+                    problem("error", "duplicate", name,
+                            f"{mod['mod_id']} is also provided by {existing['file'] or 'the platform'}",
+                            mod_id=mod["mod_id"])
+                    continue
+                provided[mod["mod_id"]] = {"version": mod["version"], "file": name}
+
+        # A JarJar copy is only used when no installed jar provides the mod; among
+        # several bundled copies Forge picks the newest
+        bundled = {}
+        for name, entry in entries.items():
+            for mod in entry.get("bundled", []):
+                current = bundled.get(mod["mod_id"])
+                if current is None or (mod["version"] is not None and (
+                        current["version"] is None or compare_versions(mod["version"], current["version"]) > 0)):
+                    bundled[mod["mod_id"]] = {"version": mod["version"], "file": f"{name}!/{mod['jar']}"}
+        for mod_id, target in bundled.items():
+            provided.setdefault(mod_id, target)
+
+        for name, entry in entries.items():
+            loader_range = VersionRange(entry.get("loader_version"))
+            if entry.get("loader") == "javafml" and not loader_range.contains(forge_version.split(".")[0]):
+                problem("error", "loader", name, f"Needs Forge loader {loader_range}, have {forge_version}")
+
+            for mod in entry["mods"]:
+                if mod["client_only"] and side == "SERVER":
+                    problem("warning", "client_only", name, f"{mod['mod_id']} is a client-only mod",
+                            mod_id=mod["mod_id"])
+                for dependency in mod["dependencies"]:
+                    if dependency["side"] not in ("BOTH", side):
+                        continue
+                    target = provided.get(dependency["mod_id"])
+                    version_range = VersionRange(dependency["version_range"])
+                    details = {"mod_id": mod["mod_id"], "requires": dependency["mod_id"], "range": str(version_range)}
+
+                    if dependency["type"] == "incompatible":
+                        if target is not None:
+                            problem("error", "incompatible", name,
+                                    f"{mod['mod_id']} is incompatible with {dependency['mod_id']}", **details)
+                    elif target is None:
+                        # Only a warning: Forge may still find it somewhere this index does not look
+                        if dependency["type"] == "required":
+                            problem("warning", "missing", name,
+                                    f"{mod['mod_id']} requires {dependency['mod_id']} {version_range}", **details)
+                    elif target["version"] is not None and not version_range.contains(target["version"]):
+                        problem("error", "version", name,
+                                f"{mod['mod_id']} requires {dependency['mod_id']} {version_range}, "
+                                f"found {target['version']}", found=target["version"], **details)
+        return problems
@@ -1,15 +1,24 @@
-import requests
 import json
+import time
 import logging
 from pathlib import Path
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+from artifact_cache import ArtifactCache
+from mod_registry import create_registry, ModRegistryError
+from mod_index import ModIndex
+
+
+# Which file each configured mod was last installed as, so an upgraded mod's old jar can be removed
+INSTALLED_STATE = Path("mods") / ".installed.json"
 
 class ModManager:
     def __init__(self, config_path="config/mods_config.json"):
         self.config_path = config_path
         self.setup_logging()
         self.load_config()
+        self.mod_index = ModIndex("mods")
 
     def setup_logging(self):
         logging.basicConfig(
@@ -24,6 +33,12 @@ class ModManager:
             "minecraft_version": "1.20.1",
             "forge_version": "47.2.0",
             "auto_download": False,
+            "download_workers": 8,
+            "cache_dir": "cache/artifacts",
+            "registry": {
+                "type": "curseforge",
+                "api_key": ""
+            },
             "mods": {}
         }
 
@@ -39,24 +54,85 @@ class ModManager:
 
         self.config = default_config
 
-    def download_all_mods(self):
-        """Download all configured mods"""
+    def download_all_mods(self, registry=None):
+        """Resolve and download all configured mods concurrently through the artifact cache"""
         if not self.config["auto_download"]:
             self.logger.info("Auto-download is disabled")
             return True
 
-        self.logger.info("Downloading configured mods...")
+        mods = {name: mod for name, mod in self.config.get("mods", {}).items() if mod.get("enabled", False)}
+        if not mods:
+            self.logger.info("No mods enabled")
+            return True
+
+        self.logger.info(f"Resolving {len(mods)} mods...")
+        started = time.time()
+        try:
+            registry = registry or create_registry(self.config["registry"])
+            resolved = registry.resolve_all(mods, self.config["minecraft_version"])
+        except ModRegistryError as e:
+            self.logger.error(f"Could not resolve mods: {e}")
+            return False
 
         Path("mods").mkdir(exist_ok=True)
+        cache = ArtifactCache(cache_dir=self.config["cache_dir"])
+
+        # Mods sharing one file (e.g. a library pinned twice) are fetched once
+        unique = {}
+        for name, mod_file in resolved.items():
+            unique.setdefault(mod_file["sha1"] or mod_file["url"], (name, mod_file))
+
+        try:
+            with open(INSTALLED_STATE) as f:
+                installed = json.load(f)
+        except (OSError, ValueError):
+            installed = {}
+
+        def fetch(name, mod_file):
+            cache.fetch(
+                mod_file["url"],
+                destination=Path("mods") / mod_file["file_name"],
+                sha1=mod_file["sha1"],
+                use_sidecar=False
+            )
+            self.logger.info(f"Downloaded mod: {name} ({mod_file['file_name']})")
 
-        success_count = 0
-        for mod_name, mod_config in self.config.get("mods", {}).items():
-            if mod_config.get("enabled", False):
-                self.logger.info(f"Would download mod: {mod_name}")
-                success_count += 1
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.config["download_workers"]) as pool:
+            futures = {pool.submit(fetch, name, mod_file): name for name, mod_file in unique.values()}
+            for future, name in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"Failed to download {name}: {e}")
+                    failed.add(name)
+
+        self.logger.info(
+            f"Downloaded {len(unique) - len(failed)}/{len(unique)} mod files in {time.time() - started:.1f}s"
+        )
+        self._remove_superseded(installed, resolved, unique, failed)
+        return not failed
 
-        self.logger.info(f"Downloaded {success_count}/{len(self.config.get('mods', {}))} mods")
-        return success_count > 0
+    def _remove_superseded(self, installed, resolved, unique, failed):
+        """Delete jars a mod was previously installed as once its new file is in place"""
+        failed_files = {key for key, (name, _) in unique.items() if name in failed}
+        current = {mod_file["file_name"] for mod_file in resolved.values()}
+        for name, mod_file in resolved.items():
+            if (mod_file["sha1"] or mod_file["url"]) in failed_files:
+                continue
+            previous = installed.get(name)
+            if previous and previous not in current:
+                try:
+                    (Path("mods") / previous).unlink()
+                    self.logger.info(f"Removed superseded {previous} ({name} is now {mod_file['file_name']})")
+                except FileNotFoundError:
+                    pass
+            installed[name] = mod_file["file_name"]
+
+        temp_path = INSTALLED_STATE.with_name(INSTALLED_STATE.name + ".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(installed, f, indent=2)
+        os.replace(temp_path, INSTALLED_STATE)
 
     def get_installed_mods(self):
         """Get list of installed mods"""
@@ -65,3 +141,12 @@ class ModManager:
             return []
 
         return [mod.name for mod in mods_dir.glob("*.jar")]
+
+    def get_mod_metadata(self):
+        """Get mod ids, versions and dependencies of the installed jars"""
+        self.mod_index.scan()
+        return self.mod_index.get_mods()
+
+    def check_mods(self):
+        """Find missing, conflicting and client-only mods"""
+        return self.mod_index.check(self.config["minecraft_version"], self.config["forge_version"])
@@ -0,0 +1,154 @@
+import abc
+import logging
+from urllib.parse import urljoin
+
+import requests
+
+
+class ModRegistryError(Exception):
+    pass
+
+
+class ModRegistry(abc.ABC):
+    """Resolves configured mods to downloadable files
+
+    resolve_all takes {name: mod_config} and returns {name: file}, where file has
+    project_id, file_id, file_name, url, sha1 and size. Registries resolve the
+    whole pack in as few round-trips as they can.
+    """
+
+    def __init__(self, session=None, timeout=30):
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+
+    @abc.abstractmethod
+    def resolve_all(self, mods, minecraft_version):
+        pass
+
+
+class CurseForgeRegistry(ModRegistry):
+    """CurseForge API: two batched requests for the whole pack"""
+
+    FORGE_LOADER = 1
+    RELEASE = 1
+    SHA1 = 1
+
+    def __init__(self, api_key, base_url="https://api.curseforge.com", **kwargs):
+        super().__init__(**kwargs)
+        if not api_key:
+            raise ModRegistryError("CurseForge registry needs an api_key")
+        self.base_url = base_url.rstrip("/")
+        self.session.headers.update({"x-api-key": api_key, "Accept": "application/json"})
+
+    def _post(self, path, payload):
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()["data"]
+        except (requests.RequestException, ValueError, KeyError) as e:
+            raise ModRegistryError(f"CurseForge request {path} failed: {e}")
+
+    def _latest_file_ids(self, project_ids, minecraft_version):
+        latest = {}
+        for mod in self._post("/v1/mods", {"modIds": sorted(project_ids)}):
+            candidates = [
+                index for index in mod.get("latestFilesIndexes", [])
+                if index.get("gameVersion") == minecraft_version and index.get("modLoader") == self.FORGE_LOADER
+            ]
+            releases = [index for index in candidates if index.get("releaseType") == self.RELEASE]
+            if releases or candidates:
+                latest[mod["id"]] = max(releases or candidates, key=lambda index: index["fileId"])["fileId"]
+        return latest
+
+    def resolve_all(self, mods, minecraft_version):
+        wanted = {name: (int(mod["project_id"]), mod.get("file_id", "latest")) for name, mod in mods.items()}
+
+        floating = {project_id for project_id, file_id in wanted.values() if file_id == "latest"}
+        latest = self._latest_file_ids(floating, minecraft_version) if floating else {}
+
+        file_ids = {}
+        for name, (project_id, file_id) in wanted.items():
+            if file_id == "latest":
+                if project_id not in latest:
+                    raise ModRegistryError(f"No Forge {minecraft_version} file for {name} ({project_id})")
+                file_id = latest[project_id]
+            file_ids[name] = int(file_id)
+
+        files = {entry["id"]: entry for entry in self._post("/v1/mods/files", {"fileIds": sorted(set(file_ids.values()))})}
+
+        resolved = {}
+        for name, file_id in file_ids.items():
+            entry = files.get(file_id)
+            if entry is None:
+                raise ModRegistryError(f"File {file_id} of {name} not found")
+            if not entry.get("downloadUrl"):
+                raise ModRegistryError(f"{name} ({entry.get('fileName')}) does not allow third-party downloads")
+            sha1 = next((h["value"] for h in entry.get("hashes", []) if h.get("algo") == self.SHA1), None)
+            resolved[name] = {
+                "project_id": entry.get("modId", wanted[name][0]),
+                "file_id": file_id,
+                "file_name": entry["fileName"],
+                "url": entry["downloadUrl"],
+                "sha1": sha1,
+                "size": entry.get("fileLength")
+            }
+        return resolved
+
+
+class LocalRegistry(ModRegistry):
+    """Registry served from a static index.json, e.g. a fixture directory behind python -m http.server
+
+    index.json maps project ids to their files:
+    {"238222": [{"file_id": 1, "file_name": "jei.jar", "url": "files/jei.jar",
+                 "sha1": "...", "game_versions": ["1.20.1"]}]}
+    Relative urls are resolved against the index location.
+    """
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/") + "/"
+
+    def resolve_all(self, mods, minecraft_version):
+        try:
+            response = self.session.get(urljoin(self.base_url, "index.json"), timeout=self.timeout)
+            response.raise_for_status()
+            index = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise ModRegistryError(f"Could not load local registry index: {e}")
+
+        resolved = {}
+        for name, mod in mods.items():
+            project_id = str(mod["project_id"])
+            files = [f for f in index.get(project_id, []) if minecraft_version in f.get("game_versions", [minecraft_version])]
+            file_id = mod.get("file_id", "latest")
+            if file_id == "latest":
+                entry = max(files, key=lambda f: f["file_id"], default=None)
+            else:
+                entry = next((f for f in files if str(f["file_id"]) == str(file_id)), None)
+            if entry is None:
+                raise ModRegistryError(f"No {minecraft_version} file {file_id} for {name} ({project_id})")
+            resolved[name] = {
+                "project_id": mod["project_id"],
+                "file_id": entry["file_id"],
+                "file_name": entry["file_name"],
+                "url": urljoin(self.base_url, entry["url"]),
+                "sha1": entry.get("sha1"),
+                "size": entry.get("size")
+            }
+        return resolved
+
+
+REGISTRIES = {
+    "curseforge": CurseForgeRegistry,
+    "local": LocalRegistry
+}
+
+
+def create_registry(config, session=None):
+    """Build the registry described by the "registry" section of mods_config.json"""
+    options = dict(config)
+    kind = options.pop("type", "curseforge")
+    if kind not in REGISTRIES:
+        raise ModRegistryError(f"Unknown mod registry: {kind}")
+    return REGISTRIES[kind](session=session, **options)
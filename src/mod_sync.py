@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl request for cloning a file's extents (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+
+class ModSync:
+    """Incrementally mirrors mod jars into the server, tracked by a size/mtime/hash manifest"""
+
+    VERSION = 1
+
+    def __init__(self, source="mods", destination="server/mods", manifest_path="server/.mod_sync.json",
+                 workers=8, link=True):
+        self.source = Path(source)
+        self.destination = Path(destination)
+        self.manifest_path = Path(manifest_path)
+        self.workers = workers or min(8, (os.cpu_count() or 2) * 2)
+        self.link = link
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+
+    def _load_manifest(self):
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return manifest.get("files", {}) if manifest.get("version") == self.VERSION else {}
+
+    def _save_manifest(self, files):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": self.VERSION, "files": files}, indent=2))
+        os.replace(tmp, self.manifest_path)
+
+    @staticmethod
+    def hash_file(path, chunk_size=1024 * 1024):
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+
+    @staticmethod
+    def _stat(path):
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _place(self, source, target):
+        """Put source at target via hardlink, reflink or copy; returns the method used"""
+        tmp = target.with_name(f".{target.name}.tmp")
+        if tmp.exists():
+            tmp.unlink()
+
+        if self.link:
+            try:
+                os.link(source, tmp)
+                os.replace(tmp, target)
+                return "linked"
+            except OSError:
+                pass
+
+            if fcntl is not None:
+                try:
+                    with open(source, "rb") as src, open(tmp, "wb") as dst:
+                        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                    shutil.copystat(source, tmp)
+                    os.replace(tmp, target)
+                    return "reflinked"
+                except OSError:
+                    if tmp.exists():
+                        tmp.unlink()
+
+        shutil.copy2(source, tmp)
+        os.replace(tmp, target)
+        return "copied"
+
+    def _sync_file(self, source, entry):
+        """Bring one jar up to date; returns (action, new manifest entry)"""
+        target = self.destination / source.name
+        stat = self._stat(source)
+        target_stat = self._stat(target) if target.exists() else None
+
+        if entry and entry.get("target") == target_stat:
+            if entry.get("source") == stat:
+                return "unchanged", entry
+            # Touched but possibly identical, e.g. re-extracted from the same pack
+            digest = self.hash_file(source)
+            if digest == entry.get("sha1"):
+                return "unchanged", dict(entry, source=stat)
+        else:
+            digest = self.hash_file(source)
+
+        action = self._place(source, target)
+        return action, {"source": stat, "target": self._stat(target), "sha1": digest}
+
+    def sync(self):
+        """Mirror source jars into destination and delete the ones it placed that are gone; returns a report
+
+        Jars in destination that the previous sync did not place (added by hand or by
+        other tooling) are left alone and only reported as unmanaged.
+        """
+        started = time.time()
+        self.destination.mkdir(parents=True, exist_ok=True)
+        previous = self._load_manifest()
+        sources = sorted(self.source.glob("*.jar")) if self.source.exists() else []
+
+        report = {"unchanged": 0, "linked": 0, "reflinked": 0, "copied": 0, "removed": 0, "unmanaged": [],
+                  "bytes_written": 0, "bytes_avoided": 0}
+        files = {}
+
+        def work(path):
+            action, entry = self._sync_file(path, previous.get(path.name))
+            size = entry["source"][0]
+            with self.lock:
+                files[path.name] = entry
+                report[action] += 1
+                if action == "copied":
+                    report["bytes_written"] += size
+                else:
+                    report["bytes_avoided"] += size
+            if action != "unchanged":
+                self.logger.info(f"Synced mod ({action}): {path.name}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(work, path) for path in sources]:
+                future.result()
+
+        wanted = {path.name for path in sources}
+        for orphan in sorted(self.destination.glob("*.jar")):
+            if orphan.name in wanted:
+                continue
+            if orphan.name not in previous:
+                report["unmanaged"].append(orphan.name)
+                continue
+            orphan.unlink()
+            report["removed"] += 1
+            self.logger.info(f"Removed stale mod: {orphan.name}")
+        if report["unmanaged"]:
+            self.logger.info(f"Leaving {len(report['unmanaged'])} jars not placed by mod sync: "
+                             f"{', '.join(report['unmanaged'])}")
+
+        self._save_manifest(files)
+        report["mods"] = len(files)
+        report["seconds"] = round(time.time() - started, 3)
+        self.logger.info(
+            f"Mod sync: {report['mods']} mods, {report['copied']} copied, "
+            f"{report['linked'] + report['reflinked']} linked, {report['unchanged']} unchanged, "
+            f"{report['removed']} removed, {report['bytes_avoided'] / 1024 / 1024:.1f} MB of copying avoided "
+            f"in {report['seconds']}s"
+        )
+        return report
@@ -0,0 +1,159 @@
+import os
+import copy
+import json
+import hashlib
+import logging
+import zipfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact_cache import ArtifactCache
+
+
+class ModpackPublisher:
+    """Client copy of the server's mods: a hashed manifest, per-jar files and a prebuilt pack archive"""
+
+    def __init__(self, mod_index, cache_dir="cache/modpack", workers=4):
+        self.mod_index = mod_index
+        self.mods_dir = mod_index.mods_dir
+        self.cache_dir = Path(cache_dir)
+        self.hashes_path = self.cache_dir / "hashes.json"
+        self.workers = workers
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.hashes = None
+        self.manifest = None
+        self.manifest_key = None
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _load_hashes(self):
+        try:
+            return json.loads(self.hashes_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _fingerprints(self):
+        """{jar name: [size, mtime_ns]} of the mods directory"""
+        fingerprints = {}
+        for path in sorted(self.mods_dir.glob("*.jar")) if self.mods_dir.exists() else []:
+            stat = path.stat()
+            fingerprints[path.name] = [stat.st_size, stat.st_mtime_ns]
+        return fingerprints
+
+    def _file_hashes(self, fingerprints):
+        """sha1/sha256 of each jar, recomputed only for jars whose size or mtime changed"""
+        if self.hashes is None:
+            self.hashes = self._load_hashes()
+
+        stale = []
+        for path in (self.mods_dir / name for name in fingerprints):
+            cached = self.hashes.get(path.name)
+            if not cached or cached["fingerprint"] != fingerprints[path.name]:
+                stale.append(path)
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for path, digests in zip(stale, pool.map(ArtifactCache.hash_file, stale)):
+                    self.hashes[path.name] = dict(digests, fingerprint=fingerprints[path.name])
+        if stale or set(self.hashes) != set(fingerprints):
+            self.hashes = {name: self.hashes[name] for name in fingerprints}
+            tmp = self.hashes_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.hashes, indent=2))
+            os.replace(tmp, self.hashes_path)
+        return self.hashes
+
+    def get_manifest(self):
+        """Describe the current pack; version changes whenever any jar does
+
+        Rebuilt only when a jar's name, size or mtime changes. Callers get their own copy.
+        """
+        with self.lock:
+            fingerprints = self._fingerprints()
+            if fingerprints != self.manifest_key:
+                self.manifest = self._build_manifest(fingerprints)
+                self.manifest_key = fingerprints
+            return copy.deepcopy(self.manifest)
+
+    def _build_manifest(self, fingerprints):
+        hashes = self._file_hashes(fingerprints)
+        entries = self.mod_index.scan()
+
+        files = []
+        for name in fingerprints:
+            digests = hashes[name]
+            mods = entries.get(name, {}).get("mods", [])
+            files.append({
+                "name": name,
+                "size": digests["fingerprint"][0],
+                "sha1": digests["sha1"],
+                "sha256": digests["sha256"],
+                "mod_ids": [mod["mod_id"] for mod in mods]
+            })
+
+        version = hashlib.sha1("\n".join(f"{f['name']}:{f['sha1']}" for f in files).encode("utf-8")).hexdigest()[:16]
+        return {"version": version, "files": files}
+
+    def get_file(self, name):
+        """Manifest entry and path of one jar, or None for anything not in the pack"""
+        for entry in self.get_manifest()["files"]:
+            if entry["name"] == name:
+                return entry, self.mods_dir / name
+        return None
+
+    def pack_path(self, version):
+        return self.cache_dir / f"modpack-{version}.zip"
+
+    def build_pack(self, manifest=None, attempts=3):
+        """Get the pack archive for the current version, building it once per version
+
+        The archive is written without holding the lock, so manifest and file requests
+        are not held up behind a build; it is swapped in under the lock once complete.
+        Jars are hashed as they are copied, and an archive whose jars no longer match
+        the manifest (a sync replaced one mid-build) is discarded and rebuilt.
+        """
+        manifest = manifest or self.get_manifest()
+        for attempt in range(attempts):
+            target = self.pack_path(manifest["version"])
+            if target.exists():
+                return target, manifest
+
+            tmp = target.with_name(f"{target.name}.{threading.get_ident()}.tmp")
+            changed = self._write_pack(tmp, manifest)
+            if changed is None:
+                break
+            tmp.unlink()
+            self.logger.warning(f"{changed} changed while building modpack {manifest['version']}, rebuilding")
+            manifest = self.get_manifest()
+        else:
+            raise RuntimeError(f"Mods kept changing while building the modpack ({attempts} attempts)")
+
+        with self.lock:
+            os.replace(tmp, target)
+            for old in self.cache_dir.glob("modpack-*.zip"):
+                if old != target:
+                    old.unlink()
+        self.logger.info(f"Built modpack {manifest['version']} ({len(manifest['files'])} mods)")
+        return target, manifest
+
+    def _write_pack(self, path, manifest, chunk_size=1024 * 1024):
+        """Write the archive; returns the name of the first jar whose bytes do not match the manifest, else None"""
+        with zipfile.ZipFile(path, "w") as pack:
+            for entry in manifest["files"]:
+                source = self.mods_dir / entry["name"]
+                sha1 = hashlib.sha1()
+                try:
+                    with open(source, "rb") as f:
+                        info = zipfile.ZipInfo.from_file(source, f"mods/{entry['name']}")
+                        # Jars are already deflated; storing them keeps the build cheap and byte ranges stable
+                        info.compress_type = zipfile.ZIP_STORED
+                        with pack.open(info, "w") as out:
+                            for chunk in iter(lambda: f.read(chunk_size), b""):
+                                sha1.update(chunk)
+                                out.write(chunk)
+                except FileNotFoundError:
+                    return entry["name"]
+                if sha1.hexdigest() != entry["sha1"]:
+                    return entry["name"]
+            pack.writestr("modpack.json", json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        return None
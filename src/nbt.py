@@ -0,0 +1,247 @@
+import io
+import gzip
+import zlib
+import struct
+
+
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+SCALARS = {
+    TAG_BYTE: struct.Struct(">b"),
+    TAG_SHORT: struct.Struct(">h"),
+    TAG_INT: struct.Struct(">i"),
+    TAG_LONG: struct.Struct(">q"),
+    TAG_FLOAT: struct.Struct(">f"),
+    TAG_DOUBLE: struct.Struct(">d"),
+}
+ARRAY_ITEM_SIZE = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_LONG_ARRAY: 8}
+
+USHORT = struct.Struct(">H")
+INT = struct.Struct(">i")
+
+
+class NbtError(Exception):
+    pass
+
+
+def _read_name(data, offset):
+    length = USHORT.unpack_from(data, offset)[0]
+    start = offset + 2
+    return bytes(data[start:start + length]).decode("utf-8", "replace"), start + length
+
+
+def _skip(data, offset, tag):
+    """Offset just past a payload of the given type, without decoding it"""
+    if tag in SCALARS:
+        return offset + SCALARS[tag].size
+    if tag in ARRAY_ITEM_SIZE:
+        return offset + 4 + INT.unpack_from(data, offset)[0] * ARRAY_ITEM_SIZE[tag]
+    if tag == TAG_STRING:
+        return offset + 2 + USHORT.unpack_from(data, offset)[0]
+    if tag == TAG_LIST:
+        item, count = data[offset], INT.unpack_from(data, offset + 1)[0]
+        offset += 5
+        if item in SCALARS:
+            return offset + count * SCALARS[item].size
+        for _ in range(count):
+            offset = _skip(data, offset, item)
+        return offset
+    if tag == TAG_COMPOUND:
+        while True:
+            child = data[offset]
+            offset += 1
+            if child == TAG_END:
+                return offset
+            offset = _skip(data, offset + 2 + USHORT.unpack_from(data, offset)[0], child)
+    raise NbtError(f"Unknown tag type {tag}")
+
+
+def _read(data, offset, tag):
+    """(value, offset after it) for a payload of the given type"""
+    if tag in SCALARS:
+        return SCALARS[tag].unpack_from(data, offset)[0], offset + SCALARS[tag].size
+    if tag == TAG_STRING:
+        return _read_name(data, offset)
+    if tag in ARRAY_ITEM_SIZE:
+        count = INT.unpack_from(data, offset)[0]
+        size = ARRAY_ITEM_SIZE[tag]
+        fmt = {1: "b", 4: "i", 8: "q"}[size]
+        return list(struct.unpack_from(f">{count}{fmt}", data, offset + 4)), offset + 4 + count * size
+    if tag == TAG_LIST:
+        item, count = data[offset], INT.unpack_from(data, offset + 1)[0]
+        offset += 5
+        values = []
+        for _ in range(count):
+            value, offset = _read(data, offset, item)
+            values.append(value)
+        return values, offset
+    if tag == TAG_COMPOUND:
+        values = {}
+        while True:
+            child = data[offset]
+            if child == TAG_END:
+                return values, offset + 1
+            name, offset = _read_name(data, offset + 1)
+            values[name], offset = _read(data, offset, child)
+    raise NbtError(f"Unknown tag type {tag}")
+
+
+def read_root(data):
+    """Decode a whole uncompressed NBT document into Python values"""
+    try:
+        if data[0] != TAG_COMPOUND:
+            raise NbtError("NBT root is not a compound")
+        _, offset = _read_name(data, 1)
+        return _read(data, offset, TAG_COMPOUND)[0]
+    except (IndexError, struct.error) as e:
+        raise NbtError(f"Truncated NBT: {e}")
+
+
+def read_paths(data, paths):
+    """Values at the given tag paths of an uncompressed NBT document, skipping everything else
+
+    Paths are tuples of compound keys, e.g. ("Level", "InhabitedTime"); only those
+    tags are decoded and the walk stops as soon as all of them have been found.
+    Missing paths are absent from the result.
+    """
+    wanted = {tuple(path) for path in paths}
+    prefixes = {path[:depth] for path in wanted for depth in range(1, len(path))}
+    found = {}
+
+    def walk(offset, parent):
+        while len(found) < len(wanted):
+            tag = data[offset]
+            if tag == TAG_END:
+                return offset + 1
+            name, offset = _read_name(data, offset + 1)
+            path = parent + (name,)
+            if path in wanted:
+                found[path], offset = _read(data, offset, tag)
+            elif tag == TAG_COMPOUND and path in prefixes:
+                offset = walk(offset, path)
+            else:
+                offset = _skip(data, offset, tag)
+        return offset
+
+    try:
+        if data[0] != TAG_COMPOUND:
+            raise NbtError("NBT root is not a compound")
+        walk(_read_name(data, 1)[1], ())
+    except (IndexError, struct.error) as e:
+        raise NbtError(f"Truncated NBT: {e}")
+    return found
+
+
+class _StreamReader:
+    """Exact reads from a binary stream, optionally copying what passes into a sink"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size, sink=None):
+        data = self.stream.read(size)
+        if len(data) != size:
+            raise NbtError("Truncated NBT")
+        if sink is not None:
+            sink += data
+        return data
+
+    def skip(self, size, sink=None):
+        while size > 0:
+            data = self.read(min(size, 65536), sink)
+            size -= len(data)
+
+
+def _stream_skip(reader, tag, sink=None):
+    """Consume one payload from the stream; with a sink its raw bytes are kept for decoding"""
+    if tag in SCALARS:
+        reader.skip(SCALARS[tag].size, sink)
+    elif tag in ARRAY_ITEM_SIZE:
+        reader.skip(INT.unpack(reader.read(4, sink))[0] * ARRAY_ITEM_SIZE[tag], sink)
+    elif tag == TAG_STRING:
+        reader.skip(USHORT.unpack(reader.read(2, sink))[0], sink)
+    elif tag == TAG_LIST:
+        head = reader.read(5, sink)
+        item, count = head[0], INT.unpack_from(head, 1)[0]
+        if item in SCALARS:
+            reader.skip(count * SCALARS[item].size, sink)
+        else:
+            for _ in range(count):
+                _stream_skip(reader, item, sink)
+    elif tag == TAG_COMPOUND:
+        while True:
+            child = reader.read(1, sink)[0]
+            if child == TAG_END:
+                return
+            reader.skip(USHORT.unpack(reader.read(2, sink))[0], sink)
+            _stream_skip(reader, child, sink)
+    else:
+        raise NbtError(f"Unknown tag type {tag}")
+
+
+def read_stream_paths(stream, paths):
+    """read_paths for a stream: decodes only the wanted tags and stops reading once all are found
+
+    Skipped payloads are read through without being decoded, so a small tag near the
+    start of a large gzip file costs only the bytes before it.
+    """
+    reader = _StreamReader(stream)
+    wanted = {tuple(path) for path in paths}
+    prefixes = {path[:depth] for path in wanted for depth in range(1, len(path))}
+    found = {}
+
+    def name():
+        return reader.read(USHORT.unpack(reader.read(2))[0]).decode("utf-8", "replace")
+
+    def walk(parent):
+        while len(found) < len(wanted):
+            tag = reader.read(1)[0]
+            if tag == TAG_END:
+                return
+            path = parent + (name(),)
+            if path in wanted:
+                payload = bytearray()
+                _stream_skip(reader, tag, payload)
+                found[path] = _read(payload, 0, tag)[0]
+            elif tag == TAG_COMPOUND and path in prefixes:
+                walk(path)
+            else:
+                _stream_skip(reader, tag)
+
+    if reader.read(1)[0] != TAG_COMPOUND:
+        raise NbtError("NBT root is not a compound")
+    name()
+    walk(())
+    return found
+
+
+def open_nbt(path):
+    """Binary stream of an NBT file, decompressing gzip (level.dat, playerdata) or zlib transparently"""
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, "rb")
+    if magic[:1] == b"\x78":
+        with open(path, "rb") as f:
+            return io.BytesIO(zlib.decompress(f.read()))
+    return open(path, "rb")
+
+
+def read_file(path, paths=None):
+    """Selected paths of an NBT file, or the whole document when paths is None"""
+    with open_nbt(path) as stream:
+        if paths is None:
+            return read_root(stream.read())
+        return read_stream_paths(stream, paths)
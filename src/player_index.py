@@ -0,0 +1,199 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+
+from nbt import NbtError, read_file
+
+
+LEVEL_PATHS = {
+    "name": ("Data", "LevelName"),
+    "version": ("Data", "Version", "Name"),
+    "data_version": ("Data", "DataVersion"),
+    "seed": ("Data", "WorldGenSettings", "seed"),
+    "legacy_seed": ("Data", "RandomSeed"),
+    "game_time": ("Data", "Time"),
+    "day_time": ("Data", "DayTime"),
+    "spawn_x": ("Data", "SpawnX"),
+    "spawn_y": ("Data", "SpawnY"),
+    "spawn_z": ("Data", "SpawnZ"),
+    "game_type": ("Data", "GameType"),
+    "difficulty": ("Data", "Difficulty"),
+    "hardcore": ("Data", "hardcore"),
+    "raining": ("Data", "raining"),
+    "thundering": ("Data", "thundering"),
+    "last_played": ("Data", "LastPlayed")
+}
+
+PLAYER_PATHS = {
+    "pos": ("Pos",),
+    "dimension": ("Dimension",),
+    "health": ("Health",),
+    "food_level": ("foodLevel",),
+    "xp_level": ("XpLevel",),
+    "game_type": ("playerGameType",),
+    "spawn_x": ("SpawnX",),
+    "spawn_y": ("SpawnY",),
+    "spawn_z": ("SpawnZ",),
+    "inventory": ("Inventory",),
+    "ender_items": ("EnderItems",),
+    "data_version": ("DataVersion",)
+}
+
+GAME_TYPES = {0: "survival", 1: "creative", 2: "adventure", 3: "spectator"}
+
+
+def _items(items):
+    """Slot, id and count of each item, for both pre- and post-1.20.5 item formats"""
+    return [{
+        "slot": item.get("Slot"),
+        "id": item.get("id"),
+        "count": item.get("Count", item.get("count", 1))
+    } for item in items or []]
+
+
+class PlayerIndex:
+    """Index of level.dat and playerdata/*.dat, re-read only when a file's size or mtime changes
+
+    Only the tags listed in LEVEL_PATHS and PLAYER_PATHS are decoded, straight from
+    the gzip stream, so the dashboard can show players and world details without
+    RCON or a running server.
+    """
+
+    VERSION = 1
+
+    def __init__(self, world_dir="server/world", cache_path="cache/player_index.json",
+                 usercache_path="server/usercache.json"):
+        self.world_dir = Path(world_dir)
+        self.cache_path = Path(cache_path)
+        self.usercache_path = Path(usercache_path)
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.cache = self._load_cache()
+        self.names = {}
+        self.names_fingerprint = None
+
+    def _load_cache(self):
+        try:
+            cache = json.loads(self.cache_path.read_text())
+            if cache.get("version") == self.VERSION:
+                return cache
+        except (OSError, ValueError):
+            pass
+        return {"version": self.VERSION, "level": None, "players": {}}
+
+    def _save_cache(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.cache))
+        os.replace(tmp, self.cache_path)
+
+    @staticmethod
+    def _fingerprint(path):
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _read(self, path, paths):
+        values = read_file(path, paths.values())
+        return {key: values.get(tag_path) for key, tag_path in paths.items()}
+
+    def _player_names(self):
+        """uuid -> name from the server's usercache.json"""
+        try:
+            fingerprint = self._fingerprint(self.usercache_path)
+        except OSError:
+            return {}
+        if fingerprint != self.names_fingerprint:
+            try:
+                entries = json.loads(self.usercache_path.read_text())
+                self.names = {entry["uuid"]: entry["name"] for entry in entries}
+            except (OSError, ValueError, KeyError):
+                self.names = {}
+            self.names_fingerprint = fingerprint
+        return self.names
+
+    def refresh(self):
+        """Re-read level.dat and the player files that changed; returns how many files were read"""
+        with self.lock:
+            read = 0
+            level_path = self.world_dir / "level.dat"
+            level = self.cache["level"]
+            if level_path.exists():
+                fingerprint = self._fingerprint(level_path)
+                if not level or level["fingerprint"] != fingerprint:
+                    try:
+                        self.cache["level"] = {"fingerprint": fingerprint, **self._read(level_path, LEVEL_PATHS)}
+                        read += 1
+                    except (NbtError, OSError, EOFError) as e:
+                        self.logger.warning(f"Could not read {level_path}: {e}")
+
+            players = {}
+            player_dir = self.world_dir / "playerdata"
+            for path in sorted(player_dir.glob("*.dat")) if player_dir.is_dir() else []:
+                uuid = path.stem
+                fingerprint = self._fingerprint(path)
+                cached = self.cache["players"].get(uuid)
+                if cached and cached["fingerprint"] == fingerprint:
+                    players[uuid] = cached
+                    continue
+                try:
+                    players[uuid] = {"fingerprint": fingerprint, **self._read(path, PLAYER_PATHS)}
+                    read += 1
+                except (NbtError, OSError, EOFError) as e:
+                    # Usually a file caught mid-save; the next refresh retries it
+                    self.logger.debug(f"Could not read {path}: {e}")
+                    if cached:
+                        players[uuid] = cached
+
+            if read or players.keys() != self.cache["players"].keys():
+                self.cache["players"] = players
+                self._save_cache()
+                self.logger.info(f"Indexed {read} changed world files ({len(players)} players)")
+            return read
+
+    def get_world_info(self):
+        self.refresh()
+        level = self.cache["level"]
+        if not level:
+            return None
+        info = {key: value for key, value in level.items() if key not in ("fingerprint", "legacy_seed")}
+        info["seed"] = level["seed"] if level["seed"] is not None else level["legacy_seed"]
+        info["game_type"] = GAME_TYPES.get(level["game_type"], level["game_type"])
+        info["day"] = level["day_time"] // 24000 if level["day_time"] is not None else None
+        return info
+
+    def _summary(self, uuid, entry, names):
+        pos = entry["pos"] or [None, None, None]
+        return {
+            "uuid": uuid,
+            "name": names.get(uuid),
+            "x": pos[0], "y": pos[1], "z": pos[2],
+            "dimension": entry["dimension"],
+            "health": entry["health"],
+            "food_level": entry["food_level"],
+            "xp_level": entry["xp_level"],
+            "game_type": GAME_TYPES.get(entry["game_type"], entry["game_type"]),
+            "inventory_items": len(entry["inventory"] or []),
+            "last_saved": entry["fingerprint"][1] / 1e9
+        }
+
+    def get_players(self):
+        """Summary of every player that has joined, most recently saved first"""
+        self.refresh()
+        names = self._player_names()
+        players = [self._summary(uuid, entry, names) for uuid, entry in self.cache["players"].items()]
+        return sorted(players, key=lambda player: player["last_saved"], reverse=True)
+
+    def get_player(self, key):
+        """Full details of a player by uuid or name, including inventory and ender chest"""
+        self.refresh()
+        names = self._player_names()
+        for uuid, entry in self.cache["players"].items():
+            if key in (uuid, names.get(uuid)):
+                player = self._summary(uuid, entry, names)
+                player["spawn"] = [entry["spawn_x"], entry["spawn_y"], entry["spawn_z"]]
+                player["inventory"] = _items(entry["inventory"])
+                player["ender_items"] = _items(entry["ender_items"])
+                return player
+        return None
@@ -0,0 +1,208 @@
+import os
+import re
+import json
+import math
+import time
+import logging
+import threading
+from pathlib import Path
+
+from distance_controller import PLAYERS_LINE
+
+
+JOIN_LINE = re.compile(r"\w+ joined the game")
+
+
+def plan_tiles(center_x, center_z, radius, tile_chunks):
+    """Square tiles of tile_chunks x tile_chunks chunks covering the radius, nearest to the center first"""
+    size = tile_chunks * 16
+    span = math.ceil(radius / size)
+    tiles = []
+    for tx in range(-span, span):
+        for tz in range(-span, span):
+            min_x, min_z = center_x + tx * size, center_z + tz * size
+            tiles.append({
+                "min_x": min_x, "min_z": min_z,
+                "max_x": min_x + size - 1, "max_z": min_z + size - 1,
+                "x": min_x + size // 2, "z": min_z + size // 2,
+                "radius": size // 2
+            })
+    tiles.sort(key=lambda t: (max(abs(t["x"] - center_x), abs(t["z"] - center_z)),
+                              math.atan2(t["z"] - center_z, t["x"] - center_x)))
+    return tiles
+
+
+class PregenScheduler:
+    """Pregenerates the configured area over RCON while the server is idle, resuming across restarts
+
+    Each tile runs start_commands, waits until done_pattern appears on the console
+    (or tile_seconds pass), then runs finish_commands. Commands are templates with
+    {dimension}, {x}, {z}, {radius}, {min_x}, {min_z}, {max_x} and {max_z}; the
+    defaults use vanilla forceload, and a pregen mod like Chunky can be driven with
+    e.g. ["chunky world {dimension}", "chunky shape square", "chunky center {x} {z}",
+    "chunky radius {radius}", "chunky start"] and done_pattern "Task finished for".
+    """
+
+    def __init__(self, forge_manager, state_path="logs/pregen_state.json"):
+        self.forge_manager = forge_manager
+        self.config = forge_manager.config["pregeneration"]
+        self.state_path = Path(state_path)
+        self.logger = logging.getLogger(__name__)
+        self.tiles = plan_tiles(self.config["center"][0], self.config["center"][1],
+                                self.config["radius"], self.config["tile_chunks"])
+        self.plan_id = f"{self.config['center'][0]},{self.config['center'][1]}:{self.config['radius']}:{self.config['tile_chunks']}"
+        self.state = self._load_state()
+        self.status = "idle"
+        self.reason = None
+        self.paused = False
+        self.interrupted = threading.Event()
+        self.tile_done = threading.Event()
+        self.done_pattern = re.compile(self.config["done_pattern"]) if self.config.get("done_pattern") else None
+        self.running = False
+        self.stopped = None
+        self.thread = None
+        forge_manager.add_output_listener(self.handle_console_line)
+
+    def _load_state(self):
+        try:
+            state = json.loads(self.state_path.read_text())
+            if state.get("plan") == self.plan_id:
+                return state
+        except (OSError, ValueError):
+            pass
+        return {"plan": self.plan_id, "next_tile": {}, "active_seconds": 0.0, "tiles_done": 0}
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp, self.state_path)
+
+    def handle_console_line(self, line):
+        if JOIN_LINE.search(line) and not self.config["allow_with_players"]:
+            self.interrupted.set()
+        if self.done_pattern and self.done_pattern.search(line):
+            self.tile_done.set()
+
+    def start(self):
+        if self.running or not self.config["enabled"]:
+            return
+        self.running = True
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.stopped,), daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started pregeneration scheduler ({self._remaining_tiles()} tiles left)")
+
+    def stop(self):
+        self.running = False
+        if self.stopped:
+            self.stopped.set()
+        self.interrupted.set()
+
+    def pause(self):
+        self.paused = True
+        self.interrupted.set()
+
+    def resume(self):
+        self.paused = False
+
+    def reset(self):
+        self.state = {"plan": self.plan_id, "next_tile": {}, "active_seconds": 0.0, "tiles_done": 0}
+        self._save_state()
+
+    def _next_work(self):
+        for dimension in self.config["dimensions"]:
+            index = self.state["next_tile"].get(dimension, 0)
+            if index < len(self.tiles):
+                return dimension, index
+        return None
+
+    def _remaining_tiles(self):
+        return sum(len(self.tiles) - self.state["next_tile"].get(d, 0) for d in self.config["dimensions"])
+
+    def _blocked(self):
+        """Why pregeneration cannot run right now, or None"""
+        if self.paused:
+            return "paused"
+        if not self.forge_manager.is_running():
+            return "server_stopped"
+        match = PLAYERS_LINE.search(self.forge_manager.send_rcon_command("list") or "")
+        if match is None:
+            return "no_player_count"
+        players = int(match.group("online"))
+        if players == 0:
+            return None
+        if not self.config["allow_with_players"]:
+            return "players_online"
+        mspt = self.forge_manager.tick_monitor.get_mspt()
+        if mspt is None or mspt >= self.config["mspt_headroom"]:
+            return "no_mspt_headroom"
+        return None
+
+    def _run(self, stopped):
+        while not stopped.is_set():
+            work = self._next_work()
+            if work is None:
+                self.status, self.reason = "complete", None
+                stopped.wait(self.config["check_interval"])
+                continue
+            try:
+                blocked = self._blocked()
+            except Exception as e:
+                blocked = f"rcon_unavailable: {e}"
+            if blocked:
+                if self.status == "running":
+                    self.logger.info(f"Pausing pregeneration: {blocked}")
+                self.status, self.reason = "paused", blocked
+                stopped.wait(self.config["check_interval"])
+                continue
+
+            if self.status != "running":
+                self.logger.info(f"Pregenerating {work[0]} from tile {work[1]}/{len(self.tiles)}")
+            self.status, self.reason = "running", None
+            try:
+                self._run_tile(*work)
+            except Exception as e:
+                self.logger.warning(f"Pregeneration tile failed: {e}")
+                stopped.wait(self.config["check_interval"])
+
+    def _run_tile(self, dimension, index):
+        tile = dict(self.tiles[index], dimension=dimension)
+        self.interrupted.clear()
+        self.tile_done.clear()
+        started = time.time()
+
+        for command in self.config["start_commands"]:
+            self.forge_manager.send_rcon_command(command.format(**tile))
+        deadline = started + self.config["tile_seconds"]
+        while time.time() < deadline and not self.interrupted.is_set():
+            if self.tile_done.wait(min(0.5, max(0.0, deadline - time.time()))):
+                break
+        for command in self.config["finish_commands"]:
+            self.forge_manager.send_rcon_command(command.format(**tile))
+
+        if self.interrupted.is_set() and not self.tile_done.is_set():
+            # Players joined mid-tile; the tile is redone next time
+            return
+        self.state["next_tile"][dimension] = index + 1
+        self.state["tiles_done"] += 1
+        self.state["active_seconds"] += time.time() - started
+        self._save_state()
+
+    def get_status(self):
+        total = len(self.tiles) * len(self.config["dimensions"])
+        remaining = self._remaining_tiles()
+        done = self.state["tiles_done"]
+        per_tile = self.state["active_seconds"] / done if done else None
+        return {
+            "enabled": self.config["enabled"],
+            "status": self.status if self.config["enabled"] else "disabled",
+            "reason": self.reason,
+            "tiles_total": total,
+            "tiles_remaining": remaining,
+            "percent": round((total - remaining) / total * 100, 2) if total else 100.0,
+            "dimensions": {d: {"done": self.state["next_tile"].get(d, 0), "total": len(self.tiles)}
+                           for d in self.config["dimensions"]},
+            "seconds_per_tile": round(per_tile, 2) if per_tile else None,
+            "eta_seconds": round(per_tile * remaining) if per_tile else None
+        }
@@ -0,0 +1,101 @@
+import socket
+import struct
+import threading
+import logging
+
+
+class RconError(Exception):
+    pass
+
+
+class RconClient:
+    """Minimal Source RCON client as spoken by the Minecraft server"""
+
+    SERVERDATA_RESPONSE_VALUE = 0
+    SERVERDATA_EXECCOMMAND = 2
+    SERVERDATA_AUTH_RESPONSE = 2
+    SERVERDATA_AUTH = 3
+
+    def __init__(self, host="localhost", port=25575, password="", timeout=5.0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.sock = None
+        self.request_id = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def connect(self):
+        """Open the connection and authenticate"""
+        self.close()
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        auth_id = self._send(self.SERVERDATA_AUTH, self.password)
+        # Some servers send an empty value packet ahead of the auth response
+        while True:
+            response_id, packet_type, _ = self._read_packet()
+            if packet_type == self.SERVERDATA_AUTH_RESPONSE:
+                break
+        if response_id != auth_id:
+            self.close()
+            raise RconError("RCON authentication failed")
+
+    def close(self):
+        """Close the connection"""
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def command(self, command):
+        """Run a command and return its full (possibly multi-packet) response"""
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if self.sock is None:
+                        self.connect()
+                    return self._command(command)
+                except (OSError, RconError) as e:
+                    self.close()
+                    if attempt:
+                        raise RconError(f"RCON command failed: {e}")
+                    self.logger.debug(f"RCON connection lost, reconnecting: {e}")
+
+    def _command(self, command):
+        command_id = self._send(self.SERVERDATA_EXECCOMMAND, command)
+        # Responses over 4 KiB are split across packets; the server answers this
+        # follow-up packet only after the whole command response has been sent
+        marker_id = self._send(self.SERVERDATA_RESPONSE_VALUE, "")
+
+        parts = []
+        while True:
+            response_id, _, body = self._read_packet()
+            if response_id == marker_id:
+                break
+            if response_id == command_id:
+                parts.append(body)
+        return "".join(parts)
+
+    def _send(self, packet_type, body):
+        self.request_id = (self.request_id + 1) & 0x7FFFFFFF
+        payload = struct.pack("<ii", self.request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+        self.sock.sendall(struct.pack("<i", len(payload)) + payload)
+        return self.request_id
+
+    def _read_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise RconError("Connection closed by server")
+            data += chunk
+        return data
+
+    def _read_packet(self):
+        (length,) = struct.unpack("<i", self._read_exact(4))
+        payload = self._read_exact(length)
+        response_id, packet_type = struct.unpack("<ii", payload[:8])
+        body = payload[8:-2].decode("utf-8", errors="replace")
+        return response_id, packet_type, body
@@ -0,0 +1,157 @@
+import threading
+import time
+import logging
+import psutil
+
+from timeseries import TimeSeriesStore
+
+
+class ResourceSampler:
+    """Background sampler for the resource usage of the Forge process tree"""
+
+    METRICS = ["cpu_percent", "rss_bytes", "threads", "open_fds", "io_read_rate", "io_write_rate"]
+
+    def __init__(self, interval=1.0, children_refresh=10.0, store=None):
+        self.interval = interval
+        self.children_refresh = children_refresh
+        self.store = store or TimeSeriesStore()
+        self.logger = logging.getLogger(__name__)
+        self.root = None
+        self.processes = {}
+        self.previous = {}
+        self.last_children_scan = 0
+        self.started_at = None
+        self.running = False
+        self.thread = None
+        self.sampler_cpu_percent = 0.0
+
+    def start(self, pid):
+        """Start sampling the process tree rooted at pid"""
+        self.stop()
+        try:
+            self.root = psutil.Process(pid)
+        except psutil.Error as e:
+            self.logger.error(f"Cannot sample process {pid}: {e}")
+            return False
+
+        self.processes = {pid: self.root}
+        self.previous = {}
+        self.last_children_scan = 0
+        self.started_at = time.time()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started resource sampler for pid {pid} every {self.interval}s")
+        return True
+
+    def stop(self):
+        """Stop the sampler thread"""
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=self.interval * 2)
+        self.thread = None
+
+    def _run(self):
+        own_cpu = time.thread_time()
+        own_wall = time.monotonic()
+        next_tick = time.monotonic()
+
+        while self.running:
+            try:
+                self.sample()
+            except psutil.NoSuchProcess:
+                # Only the root process propagates this (zombies included)
+                self.logger.info("Sampled process exited, stopping sampler")
+                self.running = False
+                break
+            except Exception as e:
+                self.logger.debug(f"Resource sample failed: {e}")
+
+            # Track the sampler's own overhead so it can be verified to stay well under 1%;
+            # thread time, because the dashboard and schedulers share this process
+            cpu = time.thread_time()
+            wall = time.monotonic()
+            if wall - own_wall >= 60:
+                self.sampler_cpu_percent = (cpu - own_cpu) / (wall - own_wall) * 100
+                own_cpu, own_wall = cpu, wall
+
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            time.sleep(delay)
+
+    def _refresh_children(self, now):
+        """Rescan the process tree; walking /proc is the expensive part so it is done sparingly"""
+        if now - self.last_children_scan < self.children_refresh:
+            return
+        self.last_children_scan = now
+        tree = {self.root.pid: self.root}
+        for child in self.root.children(recursive=True):
+            # Keep existing Process objects so their cached state survives
+            tree[child.pid] = self.processes.get(child.pid, child)
+        self.processes = tree
+        self.previous = {pid: prev for pid, prev in self.previous.items() if pid in tree}
+
+    def sample(self):
+        """Take a single sample of the whole process tree"""
+        now = time.time()
+        self._refresh_children(now)
+
+        cpu_percent = 0.0
+        rss = threads = fds = 0
+        read_rate = write_rate = 0.0
+
+        for pid, process in list(self.processes.items()):
+            try:
+                with process.oneshot():
+                    cpu_times = process.cpu_times()
+                    cpu = cpu_times.user + cpu_times.system
+                    rss += process.memory_info().rss
+                    threads += process.num_threads()
+                    fds += process.num_fds()
+                    try:
+                        io = process.io_counters()
+                        read_bytes, write_bytes = io.read_bytes, io.write_bytes
+                    except (psutil.AccessDenied, AttributeError):
+                        read_bytes = write_bytes = 0
+            except psutil.NoSuchProcess:
+                if pid == self.root.pid:
+                    raise
+                self.processes.pop(pid, None)
+                self.previous.pop(pid, None)
+                continue
+
+            prev = self.previous.get(pid)
+            if prev:
+                elapsed = now - prev[0]
+                if elapsed > 0:
+                    cpu_percent += (cpu - prev[1]) / elapsed * 100
+                    read_rate += max(read_bytes - prev[2], 0) / elapsed
+                    write_rate += max(write_bytes - prev[3], 0) / elapsed
+            self.previous[pid] = (now, cpu, read_bytes, write_bytes)
+
+        self.store.record("cpu_percent", cpu_percent, now)
+        self.store.record("rss_bytes", rss, now)
+        self.store.record("threads", threads, now)
+        self.store.record("open_fds", fds, now)
+        self.store.record("io_read_rate", read_rate, now)
+        self.store.record("io_write_rate", write_rate, now)
+
+    def is_running(self):
+        return self.running and self.thread is not None and self.thread.is_alive()
+
+    def get_current(self):
+        """Get the latest value of every metric"""
+        current = {metric: self.store.latest(metric) for metric in self.METRICS}
+        current["uptime"] = time.time() - self.started_at if self.started_at and self.is_running() else 0
+        current["process_count"] = len(self.processes) if self.is_running() else 0
+        current["sampler_cpu_percent"] = round(self.sampler_cpu_percent, 3)
+        return current
+
+    def get_series(self, metric, resolution="1s", since=None, points=None):
+        """Get a downsampled series for charts"""
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        return self.store.query(metric, resolution, since, points)
@@ -0,0 +1,91 @@
+import time
+import hashlib
+import threading
+
+
+PRUNE_INTERVAL = 60
+
+
+class ResponseCache:
+    """Short-TTL cache of rendered responses, recomputed by one caller at a time per key
+
+    compute() returns (body bytes, status). While an entry is fresh every caller gets
+    it; when it expires the first caller recomputes and the others wait for that
+    result instead of recomputing too. The ETag is a hash of the body and
+    Last-Modified only moves when the body actually changes, so clients polling an
+    unchanged value keep getting 304s across recomputes. Entries that have expired and
+    whose lock no caller holds or waits on are dropped, with their locks, every
+    PRUNE_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.key_locks = {}
+        self.lock_users = {}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "waits": 0}
+        self.last_prune = time.monotonic()
+
+    def _fresh(self, key):
+        entry = self.entries.get(key)
+        return entry if entry and entry["expires"] > time.monotonic() else None
+
+    def _prune(self):
+        now = time.monotonic()
+        if now - self.last_prune < PRUNE_INTERVAL:
+            return
+        self.last_prune = now
+        for key in list(self.key_locks):
+            entry = self.entries.get(key)
+            # A caller that got the lock but has not acquired it yet still counts, so
+            # the next caller cannot end up with a second lock for the same key
+            if (entry is None or entry["expires"] <= now) and not self.lock_users.get(key):
+                self.entries.pop(key, None)
+                del self.key_locks[key]
+
+    def get(self, key, ttl, compute):
+        with self.lock:
+            entry = self._fresh(key)
+            if entry:
+                self.stats["hits"] += 1
+                return entry
+            self._prune()
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+            self.lock_users[key] = self.lock_users.get(key, 0) + 1
+
+        try:
+            return self._compute(key, key_lock, ttl, compute)
+        finally:
+            with self.lock:
+                self.lock_users[key] -= 1
+                if not self.lock_users[key]:
+                    del self.lock_users[key]
+
+    def _compute(self, key, key_lock, ttl, compute):
+        with key_lock:
+            with self.lock:
+                entry = self._fresh(key)
+                if entry:
+                    # Computed by another caller while we waited
+                    self.stats["waits"] += 1
+                    return entry
+                self.stats["misses"] += 1
+                previous = self.entries.get(key)
+
+            body, status = compute()
+            etag = hashlib.sha1(body).hexdigest()[:16]
+            unchanged = previous and previous["etag"] == etag
+            entry = {
+                "body": body,
+                "status": status,
+                "etag": etag,
+                "last_modified": previous["last_modified"] if unchanged else time.time(),
+                "expires": time.monotonic() + ttl
+            }
+            with self.lock:
+                self.entries[key] = entry
+            return entry
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries))
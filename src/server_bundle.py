@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import zlib
+import zipfile
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Parts of an installed server tree produced by the Forge installer
+BUNDLE_PATHS = ["libraries", "run.sh", "run.bat", "user_jvm_args.txt"]
+
+# Already-compressed members are stored as-is to keep bundling and restoring cheap
+STORED_SUFFIXES = {".jar", ".zip", ".gz", ".xz", ".cache"}
+
+
+class ServerBundle:
+    """Versioned archives of an installed Forge server tree, restored with parallel extraction"""
+
+    def __init__(self, bundle_dir="cache/bundles", workers=None):
+        self.bundle_dir = Path(bundle_dir)
+        self.workers = workers or min(8, (os.cpu_count() or 2) * 2)
+        self.logger = logging.getLogger(__name__)
+        self.bundle_dir.mkdir(parents=True, exist_ok=True)
+
+    def bundle_path(self, minecraft_version, forge_version):
+        return self.bundle_dir / f"forge-server-{minecraft_version}-{forge_version}.zip"
+
+    def metadata_path(self, minecraft_version, forge_version):
+        return self.bundle_path(minecraft_version, forge_version).with_suffix(".json")
+
+    def exists(self, minecraft_version, forge_version):
+        return self.bundle_path(minecraft_version, forge_version).exists()
+
+    def load_metadata(self, minecraft_version, forge_version):
+        try:
+            return json.loads(self.metadata_path(minecraft_version, forge_version).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_metadata(self, minecraft_version, forge_version, metadata):
+        path = self.metadata_path(minecraft_version, forge_version)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(metadata, indent=2))
+        os.replace(tmp, path)
+
+    def create(self, server_dir, minecraft_version, forge_version, install_seconds=None):
+        """Snapshot the installer output of server_dir into a bundle"""
+        server_dir = Path(server_dir)
+        files = []
+        for name in BUNDLE_PATHS:
+            path = server_dir / name
+            if path.is_dir():
+                files.extend(p for p in sorted(path.rglob("*")) if p.is_file())
+            elif path.is_file():
+                files.append(path)
+        if not files:
+            self.logger.warning(f"Nothing to bundle in {server_dir}")
+            return None
+
+        started = time.time()
+        target = self.bundle_path(minecraft_version, forge_version)
+        tmp = target.with_suffix(".zip.tmp")
+        total = 0
+        with zipfile.ZipFile(tmp, "w") as bundle:
+            for path in files:
+                compression = zipfile.ZIP_STORED if path.suffix in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                bundle.write(path, path.relative_to(server_dir).as_posix(), compress_type=compression)
+                total += path.stat().st_size
+        os.replace(tmp, target)
+
+        metadata = self.load_metadata(minecraft_version, forge_version)
+        metadata.update({
+            "minecraft_version": minecraft_version,
+            "forge_version": forge_version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "files": len(files),
+            "bytes": total,
+            "archive_bytes": target.stat().st_size,
+            "bundle_seconds": round(time.time() - started, 2)
+        })
+        if install_seconds is not None:
+            metadata["install_seconds"] = round(install_seconds, 2)
+        self._save_metadata(minecraft_version, forge_version, metadata)
+        self.logger.info(f"Bundled {len(files)} files ({total} bytes) into {target.name}")
+        return target
+
+    def restore(self, server_dir, minecraft_version, forge_version):
+        """Extract a bundle into server_dir in parallel; returns the elapsed seconds or None
+
+        A truncated or corrupt bundle is deleted along with whatever was extracted from
+        it, and None is returned so the caller runs the installer instead.
+        """
+        source = self.bundle_path(minecraft_version, forge_version)
+        if not source.exists():
+            return None
+
+        started = time.time()
+        server_dir = Path(server_dir)
+        members = []
+        try:
+            with zipfile.ZipFile(source) as bundle:
+                members = [info for info in bundle.infolist() if not info.is_dir()]
+            self._extract(source, server_dir, members)
+        except (zipfile.BadZipFile, OSError, EOFError, zlib.error) as e:
+            self.logger.warning(f"Discarding unusable bundle {source.name}: {e}")
+            for info in members:
+                (server_dir / info.filename).unlink(missing_ok=True)
+            source.unlink(missing_ok=True)
+            return None
+
+        elapsed = time.time() - started
+        metadata = self.load_metadata(minecraft_version, forge_version)
+        metadata.setdefault("restores", []).append({
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": round(elapsed, 2),
+            "workers": self.workers
+        })
+        metadata["restores"] = metadata["restores"][-20:]
+        self._save_metadata(minecraft_version, forge_version, metadata)
+
+        install_seconds = metadata.get("install_seconds")
+        comparison = f" (installer took {install_seconds}s)" if install_seconds else ""
+        self.logger.info(f"Cold start: restored {len(members)} files from {source.name} in {elapsed:.1f}s{comparison}")
+        return elapsed
+
+    def _extract(self, source, server_dir, members):
+        # Balance members across workers by size, largest first
+        batches = [[] for _ in range(self.workers)]
+        loads = [0] * self.workers
+        for info in sorted(members, key=lambda info: info.file_size, reverse=True):
+            slot = loads.index(min(loads))
+            batches[slot].append(info.filename)
+            loads[slot] += info.file_size
+
+        for directory in {str(Path(info.filename).parent) for info in members}:
+            (server_dir / directory).mkdir(parents=True, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(self._extract_batch, source, server_dir, batch) for batch in batches if batch]:
+                future.result()
+
+    @staticmethod
+    def _extract_batch(source, server_dir, names):
+        # Each worker uses its own handle; decompression and CRC checks release the GIL
+        with zipfile.ZipFile(source) as bundle:
+            for name in names:
+                info = bundle.getinfo(name)
+                target = server_dir / name
+                with bundle.open(info) as src, open(target, "wb") as dst:
+                    while True:
+                        chunk = src.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                mode = (info.external_attr >> 16) & 0o777
+                if mode:
+                    os.chmod(target, mode)
@@ -0,0 +1,110 @@
+import os
+import re
+from pathlib import Path
+
+
+CONTROL_ESCAPES = {"\t": "t", "\n": "n", "\r": "r", "\f": "f"}
+UNICODE_ESCAPE = re.compile(r"[0-9a-fA-F]{4}")
+
+
+def format_value(value):
+    """A property value as text, the way it reads back after loading"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def escape_value(text):
+    """Escape a value the way java.util.Properties.store() writes it"""
+    escaped = []
+    for i, char in enumerate(text):
+        if char in CONTROL_ESCAPES:
+            escaped.append("\\" + CONTROL_ESCAPES[char])
+        elif char in "\\=:#!" or (char == " " and i == 0):
+            escaped.append("\\" + char)
+        elif " " <= char <= "~":
+            escaped.append(char)
+        else:
+            units = char.encode("utf-16-be")
+            escaped.extend(f"\\u{int.from_bytes(units[n:n + 2], 'big'):04X}" for n in range(0, len(units), 2))
+    return "".join(escaped)
+
+
+def unescape_value(text):
+    """Undo java.util.Properties escaping: \\t, \\n, \\r, \\f, \\uXXXX and \\x for any other x"""
+    chars = []
+    i = 0
+    while i < len(text):
+        if text[i] != "\\" or i + 1 == len(text):
+            chars.append(text[i])
+            i += 1
+        elif text[i + 1] == "u" and UNICODE_ESCAPE.fullmatch(text[i + 2:i + 6]):
+            chars.append(chr(int(text[i + 2:i + 6], 16)))
+            i += 6
+        else:
+            chars.append({"t": "\t", "n": "\n", "r": "\r", "f": "\f"}.get(text[i + 1], text[i + 1]))
+            i += 2
+    # Characters outside the BMP are written as a pair of \\u escapes
+    return "".join(chars).encode("utf-16-le", "surrogatepass").decode("utf-16-le")
+
+
+class ServerProperties:
+    """Reads and merges server.properties in place, keeping comments, order and unknown keys"""
+
+    def __init__(self, path="server/server.properties"):
+        self.path = Path(path)
+
+    def _lines(self):
+        try:
+            return self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _key(line):
+        stripped = line.strip()
+        if not stripped or stripped[0] in "#!":
+            return None
+        for i, char in enumerate(stripped):
+            if char in "=:" and (i == 0 or stripped[i - 1] != "\\"):
+                return stripped[:i].strip()
+        return stripped
+
+    def load(self):
+        """Get all properties as a dict of unescaped string values"""
+        properties = {}
+        for line in self._lines():
+            key = self._key(line)
+            if key is not None:
+                value = line.strip()[len(key):].lstrip()
+                properties[key] = unescape_value(value[1:].lstrip() if value[:1] in ("=", ":") else value)
+        return properties
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def update(self, changes):
+        """Merge changes into the file; returns {key: (old, new)} for values that changed"""
+        lines = self._lines()
+        current = self.load()
+        pending = {key: format_value(value) for key, value in changes.items()}
+        changed = {key: (current.get(key), value) for key, value in pending.items() if current.get(key) != value}
+        if not changed and lines:
+            return {}
+
+        merged = []
+        for line in lines:
+            key = self._key(line)
+            if key in pending:
+                merged.append(f"{key}={escape_value(pending.pop(key))}")
+            else:
+                merged.append(line)
+        if not lines:
+            merged.append("# Minecraft server properties")
+        merged.extend(f"{key}={escape_value(value)}" for key, value in pending.items())
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text("\n".join(merged) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+        return changed
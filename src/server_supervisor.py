@@ -0,0 +1,191 @@
+import re
+import time
+import threading
+import logging
+from collections import deque
+
+
+DONE_LINE = re.compile(r"Done \((?P<seconds>[\d.,]+)s\)! For help")
+
+
+class ServerSupervisor:
+    """Restarts the Forge server after crashes with exponential backoff and crash-loop detection"""
+
+    def __init__(self, forge_manager):
+        self.forge_manager = forge_manager
+        self.config = forge_manager.config["supervisor"]
+        self.logger = logging.getLogger(__name__)
+        self.state = "stopped"
+        self.state_listeners = []
+        self.crashes = deque(maxlen=50)
+        self.restart_durations = deque(maxlen=50)
+        self.consecutive_crashes = 0
+        self.started_at = None
+        self.ready_at = None
+        self.crashed_at = None
+        self.next_restart_at = None
+        self.loop_reset_at = 0
+        self.running = False
+        self.thread = None
+        self.lock = threading.RLock()
+        forge_manager.add_output_listener(self._handle_console_line)
+
+    def add_state_listener(self, callback):
+        """Register a callback receiving (state, details) on every state change"""
+        self.state_listeners.append(callback)
+
+    def _set_state(self, state, **details):
+        if state == self.state and not details:
+            return
+        self.state = state
+        self.logger.info(f"Server state: {state} {details if details else ''}")
+        for callback in self.state_listeners:
+            try:
+                callback(state, details)
+            except Exception as e:
+                self.logger.error(f"State listener failed: {e}")
+
+    def start(self):
+        """Start the server and begin supervising it"""
+        with self.lock:
+            if not self._start_server():
+                return False
+            self._watch()
+            return True
+
+    def _watch(self):
+        """Make sure the supervision loop runs; called with self.lock held"""
+        self.running = True
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop supervising and shut the server down gracefully"""
+        with self.lock:
+            self.running = False
+            self.next_restart_at = None
+            self.forge_manager.stop_server()
+            self._set_state("stopped")
+
+    def restart(self):
+        """Gracefully restart the server on request"""
+        with self.lock:
+            self._set_state("restarting", reason="requested")
+            self.forge_manager.stop_server()
+            # A manual restart also clears a detected crash loop
+            self.consecutive_crashes = 0
+            self.loop_reset_at = time.time()
+            self.next_restart_at = None
+            self.crashed_at = time.time()
+            if not self._start_server():
+                return False
+            # After stop() nothing is watching the server any more
+            self._watch()
+            return True
+
+    def _start_server(self):
+        self._set_state("starting")
+        self.started_at = time.time()
+        self.ready_at = None
+        if not self.forge_manager.start_server():
+            return False
+        return True
+
+    def _handle_console_line(self, line):
+        match = DONE_LINE.search(line)
+        if not match:
+            return
+        self.ready_at = time.time()
+        details = {"startup_seconds": float(match.group("seconds").replace(",", "."))}
+        if self.crashed_at is not None:
+            downtime = self.ready_at - self.crashed_at
+            self.restart_durations.append(downtime)
+            details["downtime_seconds"] = round(downtime, 1)
+            self.crashed_at = None
+        self._set_state("running", **details)
+        threading.Thread(target=self.forge_manager.profile_startup, daemon=True).start()
+
+    def _run(self):
+        while self.running:
+            time.sleep(1)
+            with self.lock:
+                if not self.running:
+                    break
+                self._check()
+
+    def _check(self):
+        now = time.time()
+
+        if self.forge_manager.is_running():
+            # A run that stayed up long enough clears the backoff
+            if (self.consecutive_crashes and self.ready_at
+                    and now - self.ready_at >= self.config["stable_after"]):
+                self.logger.info("Server stable again, resetting crash backoff")
+                self.consecutive_crashes = 0
+            return
+
+        if self.state in ("crash_loop", "crashed", "stopped"):
+            return
+        if self.forge_manager.stop_requested:
+            # Stopped on purpose without going through stop(); still tell the listeners
+            self.next_restart_at = None
+            self._set_state("stopped")
+            return
+
+        if self.next_restart_at is None:
+            self._record_crash(now)
+            if self.state == "crash_loop" or not self.config["auto_restart"]:
+                return
+
+        if now >= self.next_restart_at:
+            self.next_restart_at = None
+            self.logger.info(f"Restarting server (attempt {self.consecutive_crashes})")
+            if not self._start_server():
+                # A failed launch counts as another crash on the next check
+                self.forge_manager.process = None
+
+    def _record_crash(self, now):
+        exit_code = self.forge_manager.process.poll() if self.forge_manager.process else None
+        uptime = now - self.started_at if self.started_at else 0
+        self.crashes.append({"timestamp": now, "exit_code": exit_code, "uptime_seconds": round(uptime, 1)})
+        self.consecutive_crashes += 1
+        if self.crashed_at is None:
+            self.crashed_at = now
+        self.logger.warning(f"Forge server stopped unexpectedly (exit code {exit_code}, up {uptime:.0f}s)")
+        self.forge_manager.index_crash_reports()
+
+        window_start = max(now - self.config["crash_loop_window"], self.loop_reset_at)
+        recent = sum(1 for crash in self.crashes if crash["timestamp"] >= window_start)
+        if recent >= self.config["crash_loop_threshold"]:
+            self.logger.error(
+                f"Crash loop detected: {recent} crashes in {self.config['crash_loop_window']}s, "
+                f"not restarting until requested"
+            )
+            self._set_state("crash_loop", crashes=recent, exit_code=exit_code)
+            return
+
+        delay = min(
+            self.config["backoff_initial"] * self.config["backoff_multiplier"] ** (self.consecutive_crashes - 1),
+            self.config["backoff_max"]
+        )
+        self.next_restart_at = now + delay
+        if self.config["auto_restart"]:
+            self._set_state("restarting", exit_code=exit_code, restart_in=round(delay, 1))
+        else:
+            self._set_state("crashed", exit_code=exit_code)
+
+    def get_stats(self):
+        """Get supervisor state and restart metrics"""
+        durations = list(self.restart_durations)
+        return {
+            "state": self.state,
+            "consecutive_crashes": self.consecutive_crashes,
+            "total_crashes": len(self.crashes),
+            "recent_crashes": list(self.crashes)[-10:],
+            "restarts": len(durations),
+            "last_restart_seconds": round(durations[-1], 1) if durations else None,
+            "mean_restart_seconds": round(sum(durations) / len(durations), 1) if durations else None,
+            "max_restart_seconds": round(max(durations), 1) if durations else None,
+            "next_restart_in": round(max(self.next_restart_at - time.time(), 0), 1) if self.next_restart_at else None
+        }
@@ -0,0 +1,232 @@
+import re
+import json
+import time
+from pathlib import Path
+
+from log_store import FORGE_LINE, parse_timestamp
+
+
+# Markers switching the loading phase, checked in order on every line
+PHASES = [
+    ("construct", re.compile(r"Using \d+ threads for parallel mod-loading")),
+    ("registry", re.compile(r"RegisterEvent|NewRegistryEvent|Applying holder lookups")),
+    ("config", re.compile(r"Loading configs type COMMON")),
+    ("common_setup", re.compile(r"FMLCommonSetupEvent|COMMON_SETUP")),
+    ("sided_setup", re.compile(r"FMLDedicatedServerSetupEvent|SIDED_SETUP")),
+    ("imc", re.compile(r"InterModEnqueueEvent|InterModProcessEvent|ENQUEUE_IMC")),
+    ("resources", re.compile(r"Generating PackInfo named|Reloading ResourceManager")),
+    ("world", re.compile(r"Starting minecraft server version|Preparing level")),
+]
+DONE = re.compile(r"Done \((?P<seconds>[\d.,]+)s\)!")
+
+# Lines naming the mod a thread has just finished working on
+MOD_END = [
+    re.compile(r"Attempting to inject @EventBusSubscriber classes into the eventbus for (?P<mod>[\w-]+)"),
+    re.compile(r"Completed Automatic event subscribers for (?P<mod>[\w-]+)"),
+]
+# Lines naming the mod a thread is working on
+MOD_CONTEXT = [
+    re.compile(r"Injecting Automatic event subscribers for (?P<mod>[\w-]+)"),
+    re.compile(r"Config file \S+ for (?P<mod>[\w-]+) tracking"),
+    re.compile(r"Loading config file type \w+ at .+ for (?P<mod>[\w-]+)"),
+    re.compile(r"(?:Firing|Fired) event for modid (?P<mod>[\w-]+)"),
+    re.compile(r"config for type \w+ on mod (?P<mod>[\w-]+)"),
+    re.compile(r"^\[(?P<mod>[\w-]+)\] "),
+]
+CONTAINER = re.compile(r"Creating FMLModContainer instance for (?P<cls>[\w.$]+)")
+
+# Loaders and libraries logging on behalf of whichever mod is loading
+FRAMEWORK_LOGGERS = ("net.minecraftforge.fml", "cpw.mods", "io.netty", "oshi", "org.", "com.mojang", "com.google")
+PLATFORM_LOGGERS = {"net.minecraftforge": "forge", "net.minecraft": "minecraft"}
+
+UNATTRIBUTED = "(unattributed)"
+
+
+class StartupProfiler:
+    """Attributes server startup time to mods and loading phases from Forge's debug.log
+
+    Every thread's time between two of its log lines goes to the mod that thread is
+    working on, as named by Forge's own loading messages or by the mod's logger. Work
+    on mod-loading worker threads overlaps, so per-mod figures are thread-seconds.
+    """
+
+    def __init__(self, packages=None, mod_ids=None):
+        # packages: {"com.example.mod": "examplemod"} from ModIndex.get_packages
+        self.packages = sorted((packages or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.mod_ids = {mod_id.lower(): mod_id for mod_id in (mod_ids or [])}
+
+    def _mod_for_logger(self, logger):
+        name = logger.split("/", 1)[0]
+        if name.lower() in self.mod_ids:
+            return self.mod_ids[name.lower()]
+        for package, mod_id in self.packages:
+            if name == package or name.startswith(package + "."):
+                return mod_id
+        if name.startswith(FRAMEWORK_LOGGERS):
+            return None
+        for prefix, mod_id in PLATFORM_LOGGERS.items():
+            if name.startswith(prefix):
+                return mod_id
+        return None
+
+    def _mod_for_class(self, cls):
+        for package, mod_id in self.packages:
+            if cls.startswith(package + "."):
+                return mod_id
+        return None
+
+    def profile(self, log_path="server/logs/debug.log"):
+        """Stream a debug log and build the startup profile"""
+        mods = {}
+        phases = {}
+        threads = {}
+        state = {"phase": "launch", "phase_started": None}
+        started = finished = last = None
+        reported = None
+
+        def charge(mod_id, seconds):
+            if seconds <= 0:
+                return
+            entry = mods.setdefault(mod_id or UNATTRIBUTED, {"total": 0.0, "phases": {}})
+            entry["total"] += seconds
+            entry["phases"][state["phase"]] = entry["phases"].get(state["phase"], 0.0) + seconds
+
+        def flush_threads():
+            for thread in threads.values():
+                charge(thread["mod"], thread["pending"])
+            threads.clear()
+
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = FORGE_LINE.match(line.rstrip("\n"))
+                if not match:
+                    continue
+                timestamp = parse_timestamp(line)
+                if timestamp is None:
+                    continue
+                message = match.group("message")
+                if started is None:
+                    started = state["phase_started"] = timestamp
+                last = timestamp
+
+                done = DONE.search(message)
+                if done:
+                    finished = timestamp
+                    reported = float(done.group("seconds").replace(",", "."))
+                    break
+
+                for name, marker in PHASES:
+                    if name != state["phase"] and marker.search(message):
+                        flush_threads()
+                        phases[state["phase"]] = phases.get(state["phase"], 0.0) + timestamp - state["phase_started"]
+                        state["phase"], state["phase_started"] = name, timestamp
+                        break
+
+                thread = threads.setdefault(match.group("thread"), {"mod": None, "pending": 0.0, "last": timestamp})
+                elapsed = timestamp - thread["last"]
+                thread["last"] = timestamp
+
+                ended = next((m.group("mod") for m in (p.search(message) for p in MOD_END) if m), None)
+                if ended:
+                    # The work since the thread's last mod boundary was this mod's
+                    charge(ended, thread["pending"] + elapsed)
+                    thread["mod"], thread["pending"] = None, 0.0
+                    continue
+
+                named = next((m.group("mod") for m in (p.search(message) for p in MOD_CONTEXT) if m), None)
+                container = CONTAINER.search(message)
+                if not named and container:
+                    named = self._mod_for_class(container.group("cls"))
+                if not named:
+                    named = self._mod_for_logger(match.group("logger"))
+
+                if thread["mod"] is None and named:
+                    charge(named, thread["pending"] + elapsed)
+                    thread["pending"] = 0.0
+                elif thread["mod"] is None:
+                    thread["pending"] += elapsed
+                else:
+                    charge(thread["mod"], elapsed)
+                if named:
+                    thread["mod"] = named
+
+        if started is None:
+            return None
+        end = finished if finished is not None else last
+        flush_threads()
+        phases[state["phase"]] = phases.get(state["phase"], 0.0) + end - state["phase_started"]
+
+        ranked = sorted(mods.items(), key=lambda item: item[1]["total"], reverse=True)
+        return {
+            "version": 1,
+            "log": str(log_path),
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "started_at": started,
+            "completed": finished is not None,
+            "total_seconds": round(end - started, 3),
+            "reported_seconds": reported,
+            "phases": {name: round(seconds, 3) for name, seconds in phases.items()},
+            "mods": {
+                mod_id: {
+                    "total": round(entry["total"], 3),
+                    "phases": {name: round(seconds, 3) for name, seconds in entry["phases"].items()}
+                }
+                for mod_id, entry in ranked
+            }
+        }
+
+
+def save_profile(profile, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(profile, indent=2))
+    return path
+
+
+def load_profile(path):
+    return json.loads(Path(path).read_text())
+
+
+def format_report(profile, top=25):
+    """Ranked text report of a startup profile"""
+    status = "" if profile["completed"] else " (server did not finish starting)"
+    lines = [f"Startup: {profile['total_seconds']:.1f}s{status}", "", "Phases:"]
+    for name, seconds in profile["phases"].items():
+        lines.append(f"  {name:<14} {seconds:8.2f}s")
+    lines += ["", f"Top {top} mods (thread-seconds):"]
+    for rank, (mod_id, entry) in enumerate(list(profile["mods"].items())[:top], 1):
+        heaviest = max(entry["phases"].items(), key=lambda item: item[1])[0] if entry["phases"] else "-"
+        lines.append(f"  {rank:>3}. {mod_id:<32} {entry['total']:8.2f}s  (mostly {heaviest})")
+    return "\n".join(lines)
+
+
+def compare_profiles(old, new):
+    """Per-mod and per-phase differences between two profiles, largest change first"""
+    def diff(a, b):
+        rows = []
+        for key in sorted(set(a) | set(b)):
+            before, after = a.get(key, 0.0), b.get(key, 0.0)
+            rows.append({"name": key, "old": before, "new": after, "delta": round(after - before, 3)})
+        return sorted(rows, key=lambda row: abs(row["delta"]), reverse=True)
+
+    return {
+        "total_delta": round(new["total_seconds"] - old["total_seconds"], 3),
+        "phases": diff(old["phases"], new["phases"]),
+        "mods": diff({k: v["total"] for k, v in old["mods"].items()}, {k: v["total"] for k, v in new["mods"].items()}),
+        "added": sorted(set(new["mods"]) - set(old["mods"])),
+        "removed": sorted(set(old["mods"]) - set(new["mods"]))
+    }
+
+
+def format_comparison(comparison, top=15):
+    lines = [f"Startup changed by {comparison['total_delta']:+.1f}s", "", "Phases:"]
+    for row in comparison["phases"]:
+        lines.append(f"  {row['name']:<14} {row['old']:8.2f}s -> {row['new']:8.2f}s ({row['delta']:+.2f}s)")
+    lines += ["", "Mods:"]
+    for row in comparison["mods"][:top]:
+        lines.append(f"  {row['name']:<32} {row['old']:8.2f}s -> {row['new']:8.2f}s ({row['delta']:+.2f}s)")
+    if comparison["added"]:
+        lines.append(f"\nAdded: {', '.join(comparison['added'])}")
+    if comparison["removed"]:
+        lines.append(f"Removed: {', '.join(comparison['removed'])}")
+    return "\n".join(lines)
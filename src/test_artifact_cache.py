@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+import os
+import sys
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.artifact_cache import ArtifactCache
+
+PAYLOAD = os.urandom(300 * 1024)
+
+
+class ArtifactServer:
+    """Local stand-in for an artifact host serving PAYLOAD at /artifact.jar"""
+
+    def __init__(self, ranges=True, payload=PAYLOAD, head_etag=None):
+        self.ranges = ranges
+        self.payload = payload
+        self.head_etag = head_etag
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def _respond(self, send_body):
+                server.requests.append((self.command, self.headers.get("Range"), self.headers.get("If-Range")))
+                if self.path != "/artifact.jar":
+                    self.send_error(404)
+                    return
+                payload = server.payload
+                body, status = payload, 200
+                requested = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                if server.ranges and requested and if_range in (None, server.etag):
+                    first, last = requested[len("bytes="):].split("-")
+                    last = int(last) if last else len(payload) - 1
+                    body, status = payload[int(first):last + 1], 206
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", server.head_etag if self.command == "HEAD" and server.head_etag
+                                 else server.etag)
+                if server.ranges:
+                    self.send_header("Accept-Ranges", "bytes")
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {first}-{last}/{len(payload)}")
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/artifact.jar"
+
+    @property
+    def etag(self):
+        return f'"{hashlib.sha1(self.payload).hexdigest()}"'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def gets(self):
+        return [header for command, header, _ in self.requests if command == "GET"]
+
+    def if_ranges(self):
+        return [if_range for command, _, if_range in self.requests if command == "GET"]
+
+
+def leave_partial(cache, server, data, etag):
+    """What an interrupted download of data, served under etag, leaves behind"""
+    part = cache.partial_dir / hashlib.sha1(server.url.encode("utf-8")).hexdigest()
+    part.write_bytes(data)
+    part.with_name(f"{part.name}.validator").write_text(etag)
+
+
+def make_cache(tmp_path):
+    return ArtifactCache(cache_dir=tmp_path / "cache", chunk_size=16 * 1024, parallel_segments=4,
+                         segment_threshold=100 * 1024, session=requests.Session())
+
+
+def test_segmented_download(tmp_path):
+    with ArtifactServer(ranges=True) as server:
+        cache = make_cache(tmp_path)
+        path = cache.fetch(server.url, destination=tmp_path / "mods" / "artifact.jar",
+                           sha256=hashlib.sha256(PAYLOAD).hexdigest(), use_sidecar=False)
+
+    assert path.read_bytes() == PAYLOAD
+    assert (tmp_path / "mods" / "artifact.jar").read_bytes() == PAYLOAD
+    assert len(server.gets()) == 4 and all(header for header in server.gets())
+    assert not list(cache.partial_dir.iterdir())
+
+
+def test_resume_with_matching_validator(tmp_path):
+    with ArtifactServer(ranges=True) as server:
+        cache = make_cache(tmp_path)
+        cache.segment_threshold = len(PAYLOAD) + 1
+        leave_partial(cache, server, PAYLOAD[:1000], server.etag)
+        path = cache.fetch(server.url, use_sidecar=False)
+
+    assert path.read_bytes() == PAYLOAD
+    assert server.gets() == ["bytes=1000-"] and server.if_ranges() == [server.etag]
+    assert not list(cache.partial_dir.iterdir())
+
+
+def test_resume_without_range_support(tmp_path):
+    with ArtifactServer(ranges=False) as server:
+        cache = make_cache(tmp_path)
+        # The server answers the resume attempt with the whole file
+        leave_partial(cache, server, PAYLOAD[:11], server.etag)
+        path = cache.fetch(server.url, sha1=hashlib.sha1(PAYLOAD).hexdigest(), use_sidecar=False)
+
+    assert path.read_bytes() == PAYLOAD
+    assert server.gets() == ["bytes=11-"]
+
+
+def test_changed_artifact_is_not_spliced(tmp_path):
+    updated = os.urandom(len(PAYLOAD))
+    with ArtifactServer(ranges=True, payload=updated) as server:
+        cache = make_cache(tmp_path)
+        cache.segment_threshold = len(PAYLOAD) + 1
+        leave_partial(cache, server, PAYLOAD[:1000], '"previous-version"')
+        # No checksum given, so only the validator can tell the versions apart
+        path = cache.fetch(server.url, use_sidecar=False)
+
+    assert path.read_bytes() == updated
+    assert server.gets() == [None]
+
+
+def test_artifact_changed_after_probe_is_restarted(tmp_path):
+    updated = os.urandom(len(PAYLOAD))
+    old_etag = f'"{hashlib.sha1(PAYLOAD).hexdigest()}"'
+    # The probe still sees the old version; If-Range has to catch the change
+    with ArtifactServer(ranges=True, payload=updated, head_etag=old_etag) as server:
+        cache = make_cache(tmp_path)
+        cache.segment_threshold = len(PAYLOAD) + 1
+        leave_partial(cache, server, PAYLOAD[:1000], old_etag)
+        path = cache.fetch(server.url, use_sidecar=False)
+
+    assert path.read_bytes() == updated
+    assert server.gets() == ["bytes=1000-"] and server.if_ranges() == [old_etag]
+
+
+def test_concurrent_fetches_share_one_download(tmp_path):
+    with ArtifactServer(ranges=False) as server:
+        cache = make_cache(tmp_path)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.fetch(server.url, use_sidecar=False)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(results) == 4 and all(path.read_bytes() == PAYLOAD for path in results)
+    assert len(server.gets()) == 1
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
-import requests
 import os
+import sys
 from pathlib import Path
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.artifact_cache import ArtifactCache, print_progress
+
 def test_download():
     print("Testing Forge download...")
     
@@ -12,25 +16,12 @@ def test_download():
     print(f"Downloading from: {url}")
     
     try:
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-        
         # Create server directory
         Path("server").mkdir(exist_ok=True)
         
-        # Download file
+        # Download file (served from the artifact cache when already fetched)
         file_path = "server/forge-installer.jar"
-        total_size = int(response.headers.get('content-length', 0))
-        
-        with open(file_path, 'wb') as f:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"Progress: {percent:.1f}%", end='\r')
+        ArtifactCache().fetch(url, destination=file_path, progress=print_progress("Progress"))
         
         print(f"\nDownload complete! File size: {os.path.getsize(file_path)} bytes")
         
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import hashlib
+import threading
+import functools
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# mod_manager imports its siblings directly, like main.py and the scripts do
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mod_manager import ModManager
+from mod_registry import ModRegistry
+
+JEI_1 = b"jei build 1" * 1000
+JEI_2 = b"jei build 2" * 1000
+
+
+class FixtureServer:
+    """Local stand-in for a mod registry: serves a directory holding index.json and jars"""
+
+    def __init__(self, directory):
+        class Handler(SimpleHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(directory)))
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def publish(fixture_dir, files):
+    """Write jars and an index.json listing them as project 238222"""
+    (fixture_dir / "files").mkdir(parents=True, exist_ok=True)
+    index = []
+    for file_id, (file_name, data, sha1) in enumerate(files, start=1):
+        (fixture_dir / "files" / file_name).write_bytes(data)
+        index.append({"file_id": file_id, "file_name": file_name, "url": f"files/{file_name}",
+                      "sha1": sha1 or hashlib.sha1(data).hexdigest(), "size": len(data),
+                      "game_versions": ["1.20.1"]})
+    (fixture_dir / "index.json").write_text(json.dumps({"238222": index}))
+
+
+def make_manager(tmp_path, base_url):
+    config_path = tmp_path / "mods_config.json"
+    config_path.write_text(json.dumps({
+        "auto_download": True,
+        "download_workers": 4,
+        "cache_dir": str(tmp_path / "cache"),
+        "registry": {"type": "local", "base_url": base_url},
+        "mods": {"jei": {"enabled": True, "project_id": 238222, "file_id": "latest"}}
+    }))
+    return ModManager(str(config_path))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # ModManager installs into ./mods
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_registry_is_abstract():
+    with pytest.raises(TypeError):
+        ModRegistry()
+
+
+def test_latest_upgrade_replaces_superseded_jar(workdir):
+    fixture = workdir / "fixture"
+    publish(fixture, [("jei-1.jar", JEI_1, None)])
+    with FixtureServer(fixture) as server:
+        manager = make_manager(workdir, server.url)
+        assert manager.download_all_mods()
+        assert (workdir / "mods" / "jei-1.jar").read_bytes() == JEI_1
+
+        publish(fixture, [("jei-1.jar", JEI_1, None), ("jei-2.jar", JEI_2, None)])
+        assert manager.download_all_mods()
+
+    assert (workdir / "mods" / "jei-2.jar").read_bytes() == JEI_2
+    assert not (workdir / "mods" / "jei-1.jar").exists()
+    assert json.loads((workdir / "mods" / ".installed.json").read_text()) == {"jei": "jei-2.jar"}
+
+
+def test_sha1_mismatch_keeps_installed_jar(workdir):
+    fixture = workdir / "fixture"
+    publish(fixture, [("jei-1.jar", JEI_1, None)])
+    with FixtureServer(fixture) as server:
+        manager = make_manager(workdir, server.url)
+        assert manager.download_all_mods()
+
+        publish(fixture, [("jei-1.jar", JEI_1, None), ("jei-2.jar", JEI_2, "0" * 40)])
+        assert not manager.download_all_mods()
+
+    assert not (workdir / "mods" / "jei-2.jar").exists()
+    assert (workdir / "mods" / "jei-1.jar").read_bytes() == JEI_1
@@ -0,0 +1,147 @@
+import re
+import time
+import threading
+import logging
+from collections import deque
+
+from timeseries import TimeSeriesStore
+
+
+TPS_LINE = re.compile(
+    r"(?:Dim\s+(?P<dimension>[\w.:/-]+)(?:\s*\([^)]*\))?|(?P<overall>Overall))\s*:\s*"
+    r"Mean tick time:\s*(?P<mspt>[\d.,]+)\s*ms\.?\s*Mean TPS:\s*(?P<tps>[\d.,]+)"
+)
+LAG_LINE = re.compile(r"Can't keep up!.*?Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind")
+
+
+def parse_forge_tps(output):
+    """Parse `forge tps` output into {dimension: {"mspt": ..., "tps": ...}}"""
+    result = {}
+    for match in TPS_LINE.finditer(output or ""):
+        dimension = "overall" if match.group("overall") else match.group("dimension")
+        result[dimension] = {
+            "mspt": float(match.group("mspt").replace(",", ".")),
+            "tps": float(match.group("tps").replace(",", "."))
+        }
+    return result
+
+
+class TickMonitor:
+    """Collects per-dimension tick times over RCON and detects lag spikes from the console"""
+
+    def __init__(self, send_command, interval=10.0, mspt_warning=50.0, lag_spike_ms=2000, store=None):
+        self.send_command = send_command
+        self.interval = interval
+        self.mspt_warning = mspt_warning
+        self.lag_spike_ms = lag_spike_ms
+        self.store = store or TimeSeriesStore()
+        self.logger = logging.getLogger(__name__)
+        self.latest = {}
+        self.last_poll = None
+        self.lag_events = deque(maxlen=200)
+        self.alert_listeners = []
+        self.overloaded = False
+        self.running = False
+        self.stopped = None
+        self.thread = None
+
+    def add_alert_listener(self, callback):
+        """Register a callback receiving alert dicts"""
+        self.alert_listeners.append(callback)
+
+    def _emit_alert(self, alert):
+        self.logger.warning(f"Tick alert: {alert}")
+        for callback in self.alert_listeners:
+            try:
+                callback(alert)
+            except Exception as e:
+                self.logger.error(f"Tick alert listener failed: {e}")
+
+    def start(self):
+        """Start periodic polling"""
+        if self.running:
+            return
+        self.running = True
+        # A fresh event per run, so a thread from before a quick stop/start still sees its own stop
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.stopped,), daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started tick monitor (every {self.interval}s)")
+
+    def stop(self):
+        """Stop periodic polling"""
+        self.running = False
+        if self.stopped:
+            self.stopped.set()
+
+    def _run(self, stopped):
+        while not stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                # RCON is unavailable while the server is still loading
+                self.logger.debug(f"TPS poll failed: {e}")
+            stopped.wait(self.interval)
+
+    def poll(self):
+        """Query `forge tps` once and record the result"""
+        output = self.send_command("forge tps")
+        dimensions = parse_forge_tps(output)
+        if not dimensions:
+            return None
+
+        now = time.time()
+        for dimension, values in dimensions.items():
+            self.store.record(f"mspt:{dimension}", values["mspt"], now)
+            self.store.record(f"tps:{dimension}", values["tps"], now)
+        self.latest = dimensions
+        self.last_poll = now
+
+        overall = dimensions.get("overall") or max(dimensions.values(), key=lambda v: v["mspt"])
+        overloaded = overall["mspt"] >= self.mspt_warning
+        if overloaded != self.overloaded:
+            self.overloaded = overloaded
+            self._emit_alert({
+                "type": "high_mspt" if overloaded else "mspt_recovered",
+                "mspt": overall["mspt"],
+                "tps": overall["tps"],
+                "threshold": self.mspt_warning,
+                "timestamp": now
+            })
+        return dimensions
+
+    def handle_console_line(self, line):
+        """Console output listener detecting "Can't keep up!" warnings"""
+        match = LAG_LINE.search(line)
+        if not match:
+            return
+
+        event = {
+            "type": "lag_spike",
+            "behind_ms": int(match.group("ms")),
+            "ticks_behind": int(match.group("ticks")),
+            "timestamp": time.time()
+        }
+        self.lag_events.append(event)
+        self.store.record("lag_ms", event["behind_ms"], event["timestamp"])
+        if event["behind_ms"] >= self.lag_spike_ms:
+            self._emit_alert(event)
+
+    def get_mspt(self, dimension="overall"):
+        """Get the latest mean tick time, or None if unknown"""
+        return self.store.latest(f"mspt:{dimension}")
+
+    def get_status(self):
+        """Get the latest per-dimension tick statistics"""
+        return {
+            "dimensions": self.latest,
+            "last_poll": self.last_poll,
+            "overloaded": self.overloaded,
+            "recent_lag_spikes": list(self.lag_events)[-10:]
+        }
+
+    def get_history(self, dimension="overall", metric="mspt", resolution="1s", since=None, points=None):
+        """Get a time series of mspt or tps for a dimension"""
+        if metric not in ("mspt", "tps"):
+            raise ValueError(f"Unknown metric: {metric}")
+        return self.store.query(f"{metric}:{dimension}", resolution, since, points)
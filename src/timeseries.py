@@ -0,0 +1,156 @@
+import array
+import threading
+import time
+
+
+# Rollup resolutions: name -> (bucket width in seconds, number of buckets kept)
+DEFAULT_RESOLUTIONS = {
+    "1s": (1, 3600),
+    "1m": (60, 1440),
+    "1h": (3600, 720),
+}
+
+
+class RingBuffer:
+    """Fixed-size ring buffer of (timestamp, mean, peak) samples backed by typed arrays"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array.array('d', bytes(8 * capacity))
+        self.values = array.array('d', bytes(8 * capacity))
+        self.peaks = array.array('d', bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+
+    def append(self, timestamp, value, peak=None):
+        """Append a sample, overwriting the oldest one when full"""
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = value
+        self.peaks[self.head] = value if peak is None else peak
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self):
+        """Get the most recent sample or None"""
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return self.timestamps[i], self.values[i], self.peaks[i]
+
+    def items(self, since=None):
+        """Get samples ordered oldest to newest"""
+        start = (self.head - self.count) % self.capacity
+        result = []
+        for n in range(self.count):
+            i = (start + n) % self.capacity
+            if since is not None and self.timestamps[i] < since:
+                continue
+            result.append((self.timestamps[i], self.values[i], self.peaks[i]))
+        return result
+
+    def __len__(self):
+        return self.count
+
+
+class TimeSeries:
+    """A single metric rolled up into several fixed-resolution ring buffers"""
+
+    def __init__(self, resolutions=None):
+        self.resolutions = resolutions or DEFAULT_RESOLUTIONS
+        self.buffers = {name: RingBuffer(size) for name, (_, size) in self.resolutions.items()}
+        # Open bucket per resolution: [bucket_start, sum, count, peak]
+        self.pending = {name: None for name in self.resolutions}
+
+    def add(self, timestamp, value):
+        """Add a raw sample to every resolution"""
+        for name, (width, _) in self.resolutions.items():
+            bucket = timestamp - (timestamp % width)
+            pending = self.pending[name]
+            if pending is not None and pending[0] != bucket:
+                self.buffers[name].append(pending[0], pending[1] / pending[2], pending[3])
+                pending = None
+            if pending is None:
+                self.pending[name] = [bucket, value, 1, value]
+            else:
+                pending[1] += value
+                pending[2] += 1
+                if value > pending[3]:
+                    pending[3] = value
+
+    def latest(self):
+        """Get the most recent raw value or None"""
+        finest = min(self.resolutions, key=lambda name: self.resolutions[name][0])
+        pending = self.pending[finest]
+        if pending is not None:
+            return pending[1] / pending[2]
+        sample = self.buffers[finest].latest()
+        return sample[1] if sample else None
+
+    def series(self, resolution="1s", since=None, points=None):
+        """Get [timestamp, mean, peak] rows, optionally downsampled to at most `points` rows"""
+        if resolution not in self.buffers:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        rows = self.buffers[resolution].items(since)
+        pending = self.pending[resolution]
+        if pending is not None and (since is None or pending[0] >= since):
+            rows.append((pending[0], pending[1] / pending[2], pending[3]))
+
+        if points and len(rows) > points:
+            rows = downsample(rows, points)
+        return [[ts, round(value, 3), round(peak, 3)] for ts, value, peak in rows]
+
+
+def downsample(rows, points):
+    """Average consecutive rows into `points` buckets, keeping the peak of each bucket"""
+    step = len(rows) / points
+    result = []
+    for n in range(points):
+        chunk = rows[int(n * step):int((n + 1) * step)]
+        if not chunk:
+            continue
+        result.append((
+            chunk[0][0],
+            sum(row[1] for row in chunk) / len(chunk),
+            max(row[2] for row in chunk)
+        ))
+    return result
+
+
+class TimeSeriesStore:
+    """Thread-safe collection of named time series"""
+
+    def __init__(self, resolutions=None):
+        self.resolutions = resolutions or DEFAULT_RESOLUTIONS
+        self.series_map = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, value, timestamp=None):
+        """Record a value for a metric"""
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            series = self.series_map.get(name)
+            if series is None:
+                series = self.series_map[name] = TimeSeries(self.resolutions)
+            series.add(timestamp, float(value))
+
+    def latest(self, name):
+        """Get the latest value of a metric or None"""
+        with self.lock:
+            series = self.series_map.get(name)
+            return series.latest() if series else None
+
+    def query(self, name, resolution="1s", since=None, points=None):
+        """Get a (possibly downsampled) series for a metric"""
+        with self.lock:
+            series = self.series_map.get(name)
+            if series is None:
+                return []
+            return series.series(resolution, since, points)
+
+    def metrics(self):
+        """Get the names of all recorded metrics"""
+        with self.lock:
+            return sorted(self.series_map)
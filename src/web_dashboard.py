@@ -1,16 +1,33 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory, send_file
 from flask_socketio import SocketIO, emit
 import json
 import secrets
 from datetime import datetime
 import logging
 import os
+import time
+import functools
+import threading
+
+from rcon_client import RconError
+from gateway_control import GatewayControlError
+from log_store import LogStore
+from modpack import ModpackPublisher
+from player_index import PlayerIndex
+from response_cache import ResponseCache
 
 
 class WebDashboard:
-    def __init__(self, gateway_manager, forge_manager):
+    def __init__(self, gateway_manager, forge_manager, supervisor=None):
         self.gateway = gateway_manager
         self.forge_manager = forge_manager
+        self.supervisor = supervisor
+        self.log_store = LogStore()
+        self.modpack = ModpackPublisher(forge_manager.mod_index)
+        self.player_index = PlayerIndex()
+        self.response_cache = ResponseCache()
+        self.cache_ttl = forge_manager.config["dashboard"]["cache_ttl"]
+        self.backup_job = None
         self.app = Flask(__name__)
         self.app.secret_key = secrets.token_hex(32)
         self.socketio = SocketIO(self.app, cors_allowed_origins="*")
@@ -18,13 +35,50 @@ class WebDashboard:
         self.setup_routes()
         self.setup_socket_handlers()
         self.setup_logging()
+        self.forge_manager.tick_monitor.add_alert_listener(self.emit_tick_alert)
+        self.gateway.add_change_listener(self.emit_connection_change)
+        if self.supervisor:
+            self.supervisor.add_state_listener(self.emit_server_state)
 
     def setup_logging(self):
         logging.basicConfig(level=logging.INFO)
 
+    def _cached(self, view=None, query=()):
+        """Serve a read-only JSON view from the response cache for its endpoint's TTL, with conditional GETs
+
+        Entries are keyed by endpoint and URL values; a view that reads query args names
+        them in query, and any other args are ignored so they cannot multiply the entries.
+        """
+        if view is None:
+            return functools.partial(self._cached, query=query)
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            ttl = self.cache_ttl.get(request.endpoint, 0)
+            if not ttl:
+                return view(*args, **kwargs)
+
+            def compute():
+                response = self.app.make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code
+
+            key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(request.args.get(name) for name in query))
+            entry = self.response_cache.get(key, ttl, compute)
+            response = self.app.response_class(entry["body"], status=entry["status"], mimetype="application/json")
+            response.set_etag(entry["etag"])
+            response.last_modified = entry["last_modified"]
+            response.cache_control.max_age = max(0, int(entry["expires"] - time.monotonic()))
+            return response.make_conditional(request)
+
+        return wrapper
+
     def setup_routes(self):
         """Setup Flask routes"""
 
+        @self.app.errorhandler(GatewayControlError)
+        def gateway_unavailable(error):
+            return jsonify({"success": False, "error": str(error)}), 503
+
         @self.app.route('/')
         def index():
             return render_template('index.html')
@@ -98,6 +152,7 @@ class WebDashboard:
             return jsonify({"connections": connections})
 
         @self.app.route('/api/server/status')
+        @self._cached
         def server_status():
             server_info = self.forge_manager.get_server_info()
             return jsonify({
@@ -109,7 +164,245 @@ class WebDashboard:
                 "mods_count": server_info["mods_count"]
             })
 
+        @self.app.route('/api/server/resources')
+        @self._cached
+        def server_resources():
+            return jsonify(self.forge_manager.get_resource_usage())
+
+        @self.app.route('/api/server/resources/<metric>')
+        def server_resource_series(metric):
+            resolution = request.args.get('resolution', '1s')
+            points = request.args.get('points', 120, type=int)
+            since = request.args.get('since', type=float)
+            try:
+                series = self.forge_manager.resource_sampler.get_series(metric, resolution, since, points)
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            return jsonify({
+                "success": True,
+                "metric": metric,
+                "resolution": resolution,
+                "series": series
+            })
+
+        @self.app.route('/api/server/restart', methods=['POST'])
+        def restart_server():
+            if not self.supervisor:
+                return jsonify({"success": False, "error": "Server is not supervised by this process"})
+            threading.Thread(target=self.supervisor.restart, daemon=True).start()
+            return jsonify({"success": True})
+
+        @self.app.route('/api/server/stop', methods=['POST'])
+        def stop_server():
+            if not self.forge_manager.is_running():
+                return jsonify({"success": False, "error": "Server not running"})
+            # Through the supervisor so its state, and the gateway's view of it, becomes "stopped"
+            stop = self.supervisor.stop if self.supervisor else self.forge_manager.stop_server
+            threading.Thread(target=stop, daemon=True).start()
+            return jsonify({"success": True})
+
+        @self.app.route('/api/server/supervisor')
+        def supervisor_stats():
+            if not self.supervisor:
+                return jsonify({"success": False, "error": "Server is not supervised by this process"})
+            return jsonify({"success": True, **self.supervisor.get_stats()})
+
+        @self.app.route('/api/server/tps')
+        @self._cached
+        def server_tps():
+            return jsonify(self.forge_manager.tick_monitor.get_status())
+
+        @self.app.route('/api/server/tps/<path:dimension>')
+        def server_tps_history(dimension):
+            metric = request.args.get('metric', 'mspt')
+            resolution = request.args.get('resolution', '1m')
+            points = request.args.get('points', 120, type=int)
+            since = request.args.get('since', type=float)
+            try:
+                series = self.forge_manager.tick_monitor.get_history(dimension, metric, resolution, since, points)
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            return jsonify({
+                "success": True,
+                "dimension": dimension,
+                "metric": metric,
+                "resolution": resolution,
+                "series": series
+            })
+
+        @self.app.route('/api/server/distance')
+        def server_distance():
+            return jsonify(self.forge_manager.distance_controller.get_status())
+
+        @self.app.route('/api/server/pregen')
+        def pregen_status():
+            return jsonify(self.forge_manager.pregen.get_status())
+
+        @self.app.route('/api/server/pregen/<action>', methods=['POST'])
+        def pregen_action(action):
+            actions = {"pause": self.forge_manager.pregen.pause, "resume": self.forge_manager.pregen.resume,
+                       "reset": self.forge_manager.pregen.reset}
+            if action not in actions:
+                return jsonify({"success": False, "error": f"Unknown action: {action}"}), 404
+            actions[action]()
+            return jsonify({"success": True, "status": self.forge_manager.pregen.get_status()})
+
+        @self.app.route('/api/crashes')
+        def crash_signatures():
+            limit = request.args.get('limit', 50, type=int)
+            return jsonify({"signatures": self.forge_manager.crash_indexer.get_signatures(limit)})
+
+        @self.app.route('/api/crashes/<signature>')
+        def crash_signature(signature):
+            details = self.forge_manager.crash_indexer.get_signature(signature)
+            if not details:
+                return jsonify({"error": "Signature not found"}), 404
+            return jsonify(details)
+
+        @self.app.route('/api/logs')
+        def log_sources():
+            return jsonify({"sources": self.log_store.get_sources()})
+
+        @self.app.route('/api/logs/<source>')
+        def query_logs(source):
+            try:
+                records = self.log_store.query(
+                    source,
+                    start=request.args.get('start', type=float),
+                    end=request.args.get('end', type=float),
+                    level=request.args.get('level'),
+                    logger=request.args.get('logger'),
+                    contains=request.args.get('q'),
+                    limit=min(request.args.get('limit', 500, type=int), 5000)
+                )
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 404
+            return jsonify({"success": True, "records": records})
+
+        @self.app.route('/api/logs/<source>/tail')
+        def tail_logs(source):
+            lines = min(request.args.get('lines', 100, type=int), 5000)
+            try:
+                return jsonify({"success": True, "lines": self.log_store.tail(source, lines)})
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 404
+
+        @self.app.route('/api/modpack')
+        def modpack_manifest():
+            manifest = self.modpack.get_manifest()
+            manifest["minecraft_version"] = self.forge_manager.config["minecraft_version"]
+            manifest["forge_version"] = self.forge_manager.config["forge_version"]
+            for entry in manifest["files"]:
+                entry["url"] = url_for('modpack_file', name=entry["name"])
+            manifest["pack_url"] = url_for('modpack_download')
+            response = jsonify(manifest)
+            response.set_etag(manifest["version"])
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+
+        @self.app.route('/api/modpack/files/<name>')
+        def modpack_file(name):
+            found = self.modpack.get_file(name)
+            if not found:
+                return jsonify({"error": "Mod not found"}), 404
+            entry, path = found
+            # Streamed from disk with Range/If-None-Match handling; jars are immutable per sha1
+            return send_file(path.resolve(), mimetype="application/java-archive", as_attachment=True,
+                             download_name=name, etag=entry["sha1"], conditional=True, max_age=0)
+
+        @self.app.route('/api/modpack/download')
+        def modpack_download():
+            path, manifest = self.modpack.build_pack()
+            return send_file(path.resolve(), mimetype="application/zip", as_attachment=True,
+                             download_name=f"modpack-{manifest['version']}.zip", etag=manifest["version"],
+                             conditional=True, max_age=0)
+
+        @self.app.route('/api/world')
+        @self._cached
+        def world_info():
+            info = self.player_index.get_world_info()
+            if not info:
+                return jsonify({"success": False, "error": "World not found"}), 404
+            return jsonify({"success": True, "world": info})
+
+        @self.app.route('/api/players')
+        @self._cached
+        def players():
+            return jsonify({"success": True, "players": self.player_index.get_players()})
+
+        @self.app.route('/api/players/<key>')
+        def player(key):
+            details = self.player_index.get_player(key)
+            if not details:
+                return jsonify({"success": False, "error": "Player not found"}), 404
+            return jsonify({"success": True, "player": details})
+
+        @self.app.route('/api/map')
+        def map_index():
+            index = self.forge_manager.map_renderer.get_index()
+            dimensions = {}
+            for dimension, summary in index["dimensions"].items():
+                tiles = [dict(tile, url=url_for('map_tile', slug=summary["slug"], x=tile["x"], z=tile["z"],
+                                                v=tile["version"])) for tile in summary["tiles"]]
+                dimensions[dimension] = dict(summary, tiles=tiles)
+            return jsonify({"success": True, "updated": index["updated"], "dimensions": dimensions})
+
+        @self.app.route('/api/map/<slug>/<int(signed=True):x>/<int(signed=True):z>.png')
+        def map_tile(slug, x, z):
+            found = self.forge_manager.map_renderer.get_tile(slug, x, z)
+            if not found or not found[0].exists():
+                return jsonify({"error": "Tile not found"}), 404
+            path, version = found
+            # Versioned URLs never change content, so browsers may keep them for a year
+            current = request.args.get('v') == version
+            response = send_file(path.resolve(), mimetype="image/png", etag=version, conditional=True,
+                                 max_age=31536000 if current else 0)
+            if current:
+                response.cache_control.immutable = True
+            return response
+
+        @self.app.route('/api/map/render', methods=['POST'])
+        def render_map():
+            threading.Thread(target=self.forge_manager.map_renderer.render, daemon=True).start()
+            return jsonify({"success": True, "message": "Map render started"})
+
+        @self.app.route('/api/backup/list')
+        def list_backups():
+            return jsonify({
+                "success": True,
+                "backups": self.forge_manager.backups.list_backups(),
+                "busy": self._backup_busy(),
+                "restore": self.forge_manager.backups.restore_status
+            })
+
+        @self.app.route('/api/backup/schedule')
+        def backup_schedule():
+            return jsonify(self.forge_manager.backup_scheduler.get_status())
+
+        @self.app.route('/api/backup/create', methods=['POST'])
+        def create_backup():
+            return self._start_backup_job(self.forge_manager.backup_world)
+
+        @self.app.route('/api/backup/cleanup', methods=['POST'])
+        def cleanup_backups():
+            if self._backup_busy():
+                return jsonify({"success": False, "error": "A backup job is already running"}), 409
+            return jsonify({"success": True, **self.forge_manager.backups.apply_retention()})
+
+        @self.app.route('/api/backup/<name>/verify', methods=['POST'])
+        def verify_backup(name):
+            if name not in self.forge_manager.backups.records:
+                return jsonify({"success": False, "error": "Backup not found"}), 404
+            return self._start_backup_job(self.forge_manager.backups.verify, name)
+
+        @self.app.route('/api/backup/<name>/restore', methods=['POST'])
+        def restore_backup(name):
+            if name not in self.forge_manager.backups.records:
+                return jsonify({"success": False, "error": "Backup not found"}), 404
+            return self._start_backup_job(self._restore_backup, name)
+
         @self.app.route('/api/gateway/stats')
+        @self._cached
         def gateway_stats():
             stats = self.gateway.get_connection_stats()
             return jsonify(stats)
@@ -123,12 +416,54 @@ class WebDashboard:
             command = data.get("command", "")
 
             if command:
-                # This would use RCON or other method to send commands
-                result = self.forge_manager.send_rcon_command(command)
+                try:
+                    result = self.forge_manager.send_rcon_command(command)
+                except RconError as e:
+                    return jsonify({"success": False, "error": str(e)})
                 return jsonify({"success": True, "result": result})
 
             return jsonify({"success": False, "error": "No command provided"})
 
+    def _backup_busy(self):
+        return self.backup_job is not None and self.backup_job.is_alive()
+
+    def _start_backup_job(self, target, *args):
+        """Run a backup, verification or restore in the background, one at a time"""
+        if self._backup_busy():
+            return jsonify({"success": False, "error": "A backup job is already running"}), 409
+
+        def run():
+            try:
+                target(*args)
+            except Exception as e:
+                logging.error(f"Backup job failed: {e}")
+
+        self.backup_job = threading.Thread(target=run, daemon=True)
+        self.backup_job.start()
+        return jsonify({"success": True, "started": True})
+
+    def _restore_backup(self, name):
+        # The world is rebuilt while the server keeps running; it is down only for the swap
+        was_running = self.forge_manager.is_running()
+
+        def stop():
+            if not was_running:
+                return
+            if self.supervisor:
+                self.supervisor.stop()
+            else:
+                self.forge_manager.stop_server()
+
+        def start():
+            if not was_running:
+                return
+            if self.supervisor:
+                self.supervisor.start()
+            else:
+                self.forge_manager.start_server()
+
+        self.forge_manager.backups.restore(name, before_swap=stop, after_swap=start)
+
     def setup_socket_handlers(self):
         """Setup Socket.IO event handlers"""
 
@@ -139,9 +474,11 @@ class WebDashboard:
             emit('connections_update', {
                 'connections': self.gateway.get_all_connections()
             })
-            emit('server_status', {
-                'status': 'running' if self.forge_manager.is_running() else 'stopped'
-            })
+            if self.supervisor:
+                status = self.supervisor.state
+            else:
+                status = 'running' if self.forge_manager.is_running() else 'stopped'
+            emit('server_status', {'status': status})
 
         @self.socketio.on('disconnect')
         def handle_disconnect():
@@ -163,6 +500,18 @@ class WebDashboard:
                     'connection_url': connection_url
                 }, broadcast=True)
 
+    def emit_server_state(self, state, details):
+        """Broadcast supervisor state changes (restarts, crash loops) to all dashboard clients"""
+        self.socketio.emit('server_status', {'status': state, **details})
+
+    def emit_connection_change(self, event, connection):
+        """Push gateway connection changes (including those from other dashboards) to all clients"""
+        self.socketio.emit('connections_update', {'connections': self.gateway.get_all_connections()})
+
+    def emit_tick_alert(self, alert):
+        """Broadcast a tick health alert to all dashboard clients"""
+        self.socketio.emit('tick_alert', alert)
+
     def run(self, host='0.0.0.0', port=8081, debug=False):
         """Run the web dashboard"""
         self.gateway.start_cleanup_thread()
@@ -0,0 +1,186 @@
+import os
+import time
+import logging
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from anvil import SECTOR, RegionFile, chunk_coords, decompress, region_coords, write_region
+from nbt import NbtError, read_paths
+
+
+# 1.18+ chunks keep these at the root, older ones under "Level"
+CHUNK_TAGS = [("InhabitedTime",), ("Status",), ("Level", "InhabitedTime"), ("Level", "Status")]
+
+VANILLA_DIMENSIONS = {"": "minecraft:overworld", "DIM-1": "minecraft:the_nether", "DIM1": "minecraft:the_end"}
+
+# Chunk data lives in region/; entities/ and poi/ hold the same chunks' mobs and points of interest
+CHUNK_FOLDERS = ("region", "entities", "poi")
+
+TICKS_PER_SECOND = 20
+
+
+def dimension_of(world_dir, region_dir):
+    """Dimension id of a region folder (server/world/DIM-1/region -> minecraft:the_nether)"""
+    relative = region_dir.parent.relative_to(world_dir)
+    parts = relative.parts
+    if len(parts) == 3 and parts[0] == "dimensions":
+        return f"{parts[1]}:{parts[2]}"
+    return VANILLA_DIMENSIONS.get(relative.as_posix() if parts else "", relative.as_posix())
+
+
+def world_in_use(world_dir):
+    """True while a server holds the world's session.lock"""
+    lock_path = Path(world_dir) / "session.lock"
+    if fcntl is None or not lock_path.exists():
+        return False
+    with open(lock_path, "a") as f:
+        try:
+            fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.lockf(f, fcntl.LOCK_UN)
+    return False
+
+
+def analyze_region(path, threshold=None):
+    """Sizes, statuses and low-inhabited chunks of one region file
+
+    Sizes come from the header alone; each chunk is decompressed once and only
+    InhabitedTime and Status are decoded from it.
+    """
+    path = Path(path)
+    result = {
+        "path": str(path),
+        "file_bytes": path.stat().st_size,
+        "chunks": 0,
+        "chunk_bytes": 0,
+        "statuses": Counter(),
+        "low_chunks": [],
+        "low_bytes": 0,
+        "inhabited_ticks": 0,
+        "errors": 0
+    }
+    with RegionFile(path) as region:
+        for index, _, _, sectors in region.chunks():
+            result["chunks"] += 1
+            result["chunk_bytes"] += sectors * SECTOR
+            stored = region.read_stored(index)
+            if stored is None:
+                result["errors"] += 1
+                continue
+            try:
+                tags = read_paths(decompress(stored), CHUNK_TAGS)
+            except (NbtError, ValueError, OSError):
+                result["errors"] += 1
+                continue
+            inhabited = tags.get(("InhabitedTime",), tags.get(("Level", "InhabitedTime"), 0))
+            status = tags.get(("Status",), tags.get(("Level", "Status"), "unknown"))
+            result["statuses"][status.replace("minecraft:", "")] += 1
+            result["inhabited_ticks"] += inhabited
+            if threshold is not None and inhabited < threshold:
+                result["low_chunks"].append(index)
+                result["low_bytes"] += sectors * SECTOR
+    return result
+
+
+def prune_region(path, indices):
+    """Rewrite a region file without the given chunk slots; returns bytes freed"""
+    path = Path(path)
+    if not path.exists():
+        return 0
+    before = path.stat().st_size
+    drop = set(indices)
+    with RegionFile(path) as region:
+        kept = []
+        for index, timestamp, _, _ in region.chunks():
+            if index in drop:
+                continue
+            stored = region.read_stored(index)
+            if stored is not None:
+                kept.append((index, timestamp, bytes(stored)))
+    for index in drop:
+        # Oversized chunks live next to the region file
+        x, z = chunk_coords(*region_coords(path), index)
+        external = path.parent / f"c.{x}.{z}.mcc"
+        if external.exists():
+            external.unlink()
+    if kept:
+        write_region(path, kept)
+    else:
+        path.unlink()
+    return before - (path.stat().st_size if path.exists() else 0)
+
+
+class WorldAnalyzer:
+    """Size report and inhabited-time pruning for every region file of a world"""
+
+    def __init__(self, world_dir="server/world", workers=None):
+        self.world_dir = Path(world_dir)
+        self.workers = workers or os.cpu_count() or 2
+        self.logger = logging.getLogger(__name__)
+
+    def region_files(self):
+        """{dimension: [region/*.mca paths]} for every dimension in the world"""
+        dimensions = {}
+        for region_dir in sorted(self.world_dir.rglob("region")):
+            if region_dir.is_dir():
+                files = sorted(region_dir.glob("r.*.*.mca"))
+                if files:
+                    dimensions[dimension_of(self.world_dir, region_dir)] = files
+        return dimensions
+
+    def analyze(self, threshold_seconds=None):
+        """Per-region and per-dimension report; chunks inhabited for less than threshold_seconds are flagged"""
+        started = time.time()
+        threshold = threshold_seconds * TICKS_PER_SECOND if threshold_seconds is not None else None
+        dimensions = self.region_files()
+        jobs = [(dimension, path) for dimension, paths in dimensions.items() for path in paths]
+
+        report = {"world": str(self.world_dir), "threshold_seconds": threshold_seconds, "dimensions": {}}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(analyze_region, [str(path) for _, path in jobs], [threshold] * len(jobs),
+                               chunksize=max(1, len(jobs) // (self.workers * 8)))
+            for (dimension, path), result in zip(jobs, results):
+                summary = report["dimensions"].setdefault(dimension, {
+                    "regions": [], "file_bytes": 0, "chunks": 0, "chunk_bytes": 0, "statuses": Counter(),
+                    "low_chunks": 0, "low_bytes": 0, "errors": 0
+                })
+                result["name"] = path.name
+                summary["regions"].append(result)
+                for key in ("file_bytes", "chunks", "chunk_bytes", "low_bytes", "errors"):
+                    summary[key] += result[key]
+                summary["low_chunks"] += len(result["low_chunks"])
+                summary["statuses"].update(result["statuses"])
+
+        report["file_bytes"] = sum(d["file_bytes"] for d in report["dimensions"].values())
+        report["chunks"] = sum(d["chunks"] for d in report["dimensions"].values())
+        report["seconds"] = round(time.time() - started, 2)
+        self.logger.info(f"Analyzed {len(jobs)} region files ({report['chunks']} chunks) in {report['seconds']}s")
+        return report
+
+    def prune(self, report):
+        """Delete the chunks flagged in an analyze() report, with their entities and POI
+
+        Refuses to touch a world that a running server has locked.
+        """
+        if world_in_use(self.world_dir):
+            raise RuntimeError(f"{self.world_dir} is in use by a running server; stop it before pruning")
+        jobs = []
+        for summary in report["dimensions"].values():
+            for region in summary["regions"]:
+                if region["low_chunks"]:
+                    path = Path(region["path"])
+                    for folder in CHUNK_FOLDERS:
+                        jobs.append((str(path.parent.parent / folder / path.name), region["low_chunks"]))
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            freed = sum(pool.map(prune_region, [path for path, _ in jobs], [indices for _, indices in jobs]))
+        self.logger.info(f"Pruned {sum(d['low_chunks'] for d in report['dimensions'].values())} chunks, "
+                         f"freed {freed} bytes")
+        return freed
@@ -0,0 +1,182 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from mod_sync import FICLONE
+
+
+# Minecraft writes these through a temp file and rename, so a hardlink keeps the
+# saved version; region files are rewritten in place and must be cloned or copied
+LINK_SAFE_SUFFIXES = {".dat", ".dat_old"}
+
+# A file modified this close to when its clone was made may have changed while it was read
+SETTLE_NS = 2 * 10 ** 9
+
+
+class WorldSnapshot:
+    """Point-in-time copy of a running world taken inside a short save-off window
+
+    Saving is paused with save-off, flushed with save-all flush, the world tree is
+    cloned (reflinks where the filesystem supports them) and saving resumes at
+    once; slow copying or compression then reads the frozen snapshot instead of
+    the live world. Only files whose size or mtime changed since the last take are
+    cloned again, so the window scales with what changed.
+
+    Without reflink support (probed once) a clone is a full copy, so the world is
+    copied first with saving still on and the save-off window only recopies what
+    changed meanwhile; that copy is discarded on release() instead of being kept
+    as a second copy of the world.
+    """
+
+    def __init__(self, send_command, world_dir="server/world", snapshot_dir="backups/.snapshot", workers=None):
+        self.send_command = send_command
+        self.world_dir = Path(world_dir)
+        self.snapshot_dir = Path(snapshot_dir)
+        self.workers = workers or min(16, (os.cpu_count() or 2) * 4)
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.reflinks = None
+
+    def supports_reflinks(self):
+        """Whether the snapshot filesystem can clone files; probed on first use"""
+        if self.reflinks is None:
+            self.snapshot_dir.parent.mkdir(parents=True, exist_ok=True)
+            probe = self.snapshot_dir.parent / ".reflink-probe"
+            clone = self.snapshot_dir.parent / ".reflink-probe.clone"
+            self.reflinks = False
+            try:
+                probe.write_bytes(b"\0" * 4096)
+                if fcntl is not None:
+                    with open(probe, "rb") as src, open(clone, "wb") as dst:
+                        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                    self.reflinks = True
+            except OSError:
+                pass
+            finally:
+                for path in (probe, clone):
+                    if path.exists():
+                        path.unlink()
+            self.logger.info(f"Reflinks {'supported' if self.reflinks else 'not supported'} "
+                             f"under {self.snapshot_dir.parent}")
+        return self.reflinks
+
+    def _clone(self, source, target):
+        want = source.stat()
+        try:
+            have = target.stat()
+            if (have.st_size == want.st_size and have.st_mtime_ns == want.st_mtime_ns
+                    and want.st_mtime_ns < have.st_ctime_ns - SETTLE_NS):
+                return "unchanged"
+            # May be a hardlink left by an earlier take; never write through it
+            target.unlink()
+        except FileNotFoundError:
+            pass
+        # Clones carry the mtime from before they were read, so a write during the read shows up next time
+        if self.reflinks:
+            try:
+                with open(source, "rb") as src, open(target, "wb") as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                shutil.copystat(source, target)
+                os.utime(target, ns=(want.st_atime_ns, want.st_mtime_ns))
+                return "reflinked"
+            except OSError:
+                pass
+        if source.suffix in LINK_SAFE_SUFFIXES:
+            try:
+                os.link(source, target)
+                return "linked"
+            except OSError:
+                pass
+        shutil.copy2(source, target)
+        os.utime(target, ns=(want.st_atime_ns, want.st_mtime_ns))
+        return "copied"
+
+    def _clone_tree(self):
+        files = []
+        for root, dirs, names in os.walk(self.world_dir):
+            relative = Path(root).relative_to(self.world_dir)
+            (self.snapshot_dir / relative).mkdir(parents=True, exist_ok=True)
+            files.extend(relative / name for name in names if name != "session.lock")
+
+        counts = {"unchanged": 0, "reflinked": 0, "linked": 0, "copied": 0, "removed": 0}
+        keep = set(files)
+        for root, dirs, names in os.walk(self.snapshot_dir, topdown=False):
+            relative = Path(root).relative_to(self.snapshot_dir)
+            for name in names:
+                if relative / name not in keep:
+                    os.unlink(os.path.join(root, name))
+                    counts["removed"] += 1
+            if not (self.world_dir / relative).is_dir():
+                os.rmdir(root)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for method in pool.map(lambda path: self._clone(self.world_dir / path, self.snapshot_dir / path), files):
+                counts[method] += 1
+        return dict(counts, files=len(files))
+
+    def take(self):
+        """Freeze the world into snapshot_dir; returns timings of the save-off window"""
+        if not self.world_dir.exists():
+            raise FileNotFoundError(f"{self.world_dir} not found")
+        reflinks = self.supports_reflinks()
+        with self.lock:
+            precopied = 0
+            if not reflinks:
+                precopy_started = time.time()
+                precopy = self._clone_tree()
+                precopied = precopy["copied"] + precopy["linked"]
+                self.logger.info(f"Copied {precopied} files in {time.time() - precopy_started:.1f}s "
+                                 f"with saving on; no reflinks, so the save-off window only recopies changes")
+            started = time.time()
+            self.send_command("save-off")
+            try:
+                self.send_command("save-all flush")
+                flushed = time.time()
+                counts = self._clone_tree()
+            finally:
+                self.send_command("save-on")
+                resumed = time.time()
+
+        report = dict(
+            counts,
+            path=str(self.snapshot_dir),
+            reflinks=reflinks,
+            precopied=precopied,
+            taken_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            flush_seconds=round(flushed - started, 3),
+            clone_seconds=round(resumed - flushed, 3),
+            window_seconds=round(resumed - started, 3)
+        )
+        self.logger.info(
+            f"Snapshot of {self.world_dir} in {report['window_seconds']}s with saving off "
+            f"(flush {report['flush_seconds']}s; {counts['unchanged']} unchanged, {counts['reflinked']} reflinked, "
+            f"{counts['linked']} linked, {counts['copied']} copied, {counts['removed']} removed)"
+        )
+        if counts["copied"]:
+            self.logger.warning(f"{counts['copied']} files had to be copied with saving off; "
+                                f"a filesystem with reflinks (btrfs, XFS) keeps the window short")
+        return report
+
+    def release(self):
+        """Done reading the snapshot
+
+        A reflinked snapshot shares its blocks with the world and is kept so the next
+        take() only clones what changed; a copied one is a second world and is deleted.
+        """
+        if not self.reflinks:
+            self.discard()
+
+    def discard(self):
+        """Delete the snapshot, e.g. to reclaim its space; the next take() clones everything"""
+        with self.lock:
+            if self.snapshot_dir.exists():
+                shutil.rmtree(self.snapshot_dir)
@@ -27,6 +27,16 @@ function initializeSocketConnection() {
             }
         });
 
+        socket.on('tick_alert', (alert) => {
+            if (alert.type === 'lag_spike') {
+                showToast(`Server lagging: ${alert.behind_ms}ms (${alert.ticks_behind} ticks) behind`, 'error');
+            } else if (alert.type === 'high_mspt') {
+                showToast(`High tick time: ${alert.mspt.toFixed(1)} ms/tick (${alert.tps.toFixed(1)} TPS)`, 'error');
+            } else if (alert.type === 'mspt_recovered') {
+                showToast(`Tick time recovered: ${alert.mspt.toFixed(1)} ms/tick`, 'success');
+            }
+        });
+
     } catch (error) {
         console.error('Failed to initialize socket connection:', error);
     }
@@ -110,6 +120,9 @@ style.textContent = `
     .server-status-indicator.status-running { color: #27ae60; }
     .server-status-indicator.status-stopped { color: #e74c3c; }
     .server-status-indicator.status-starting { color: #f39c12; }
+    .server-status-indicator.status-restarting { color: #f39c12; }
+    .server-status-indicator.status-crashed,
+    .server-status-indicator.status-crash_loop { color: #e74c3c; }
 `;
 document.head.appendChild(style);
 